@@ -1,7 +1,7 @@
 # exam_preparation/exam/admin.py
 
 from django.contrib import admin  # Djangoの管理サイト用モジュールをインポート
-from .models import Chapter, Question, Choice, Attempt  # 同じアプリのモデルをインポート
+from .models import Chapter, Question, Choice, Attempt, Blueprint, BlueprintQuota, MockExam, MockAnswer, Cohort, CohortMember  # 同じアプリのモデルをインポート
 
 
 @admin.register(Chapter)  # Chapterモデルをadminに登録し、以下の設定を適用
@@ -44,12 +44,62 @@ class AttemptAdmin(admin.ModelAdmin):
         "is_correct",
         "mode",
         "box",
+        "elapsed_ms",
         "answered_at",
     )  
-    # 一覧に表示するフィールド（回答ID、ユーザー、問題、正誤、モード、ボックス、回答日時）
+    # 一覧に表示するフィールド（回答ID、ユーザー、問題、正誤、モード、ボックス、解答時間、回答日時）
     list_filter = ("is_correct", "mode", "box", "answered_at")  
     # 絞り込みに使うフィルター（正誤、モード、ボックス番号、回答日時）
     search_fields = ("user__username",)  
     # ユーザーのusernameを対象に検索可能にする（外部キーのフィールド指定）
     ordering = ("-answered_at",)  
     # 一覧のデフォルト並び順を回答日時の降順に設定（新しい順）
+
+
+class BlueprintQuotaInline(admin.TabularInline):
+    model = BlueprintQuota  # 章別出題数を出題設計の編集画面に組み込み
+    extra = 0  # 追加の空行を表示しない
+    ordering = ("chapter__num",)  # 章番号順に表示
+
+
+@admin.register(Blueprint)  # 出題設計（公式配点以外の名前付き設計）を登録
+class BlueprintAdmin(admin.ModelAdmin):
+    list_display = ("name", "title")
+    # 一覧に表示するフィールド（設計名、表示名）
+    inlines = [BlueprintQuotaInline]
+    # 編集画面で章別出題数をインライン編集可能に
+
+
+class MockAnswerInline(admin.TabularInline):
+    model = MockAnswer  # 解答台帳を模試の詳細画面に組み込み（閲覧用）
+    extra = 0  # 追加の空行を表示しない
+    raw_id_fields = ("question", "choice")  # 問題・選択肢はプルダウンにせずIDで表示
+    readonly_fields = ("answered_at", "elapsed_ms")
+
+
+@admin.register(MockExam)  # 模擬試験の台帳を登録
+class MockExamAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "blueprint", "status", "score", "started_at", "finished_at")
+    # 一覧に表示するフィールド（ID、受験者、出題設計、状態、スコア、開始・確定日時）
+    list_filter = ("status", "blueprint")
+    # 絞り込みに使うフィルター（状態、出題設計）
+    search_fields = ("user__username",)
+    # 受験者のusernameで検索
+    ordering = ("-started_at",)
+    # 新しい順
+    inlines = [MockAnswerInline]
+
+
+class CohortMemberInline(admin.TabularInline):
+    model = CohortMember  # 所属ユーザーをグループの編集画面に組み込み
+    extra = 0  # 追加の空行を表示しない
+    raw_id_fields = ("user",)  # ユーザー数が多くてもプルダウンにしない
+
+
+@admin.register(Cohort)  # 受験者グループを登録
+class CohortAdmin(admin.ModelAdmin):
+    list_display = ("name", "title", "created_at")
+    # 一覧に表示するフィールド（グループ名、表示名、作成日時）
+    search_fields = ("name", "title")
+    inlines = [CohortMemberInline]
+    # 編集画面で所属ユーザーをインライン編集可能に
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ExamConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exam'
+
+    def ready(self):
+        # シグナル受信関数を登録（問題バンク版数の更新）
+        from . import signals  # noqa: F401
+        # 放置された模試の定期確定（EXAM_SWEEP_INTERVAL > 0 のときだけ）
+        from .sweeper import start_sweeper
+        start_sweeper()
+        # 最初のリクエストが払っていた初期化を、トラフィックを受ける前に済ませる（EXAM_WARMUP=True のときだけ）
+        from .startup import is_server_process, warm_up
+        if getattr(settings, "EXAM_WARMUP", False) and is_server_process():
+            warm_up()
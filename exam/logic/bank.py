@@ -0,0 +1,112 @@
+# exam_preparation/exam/logic/bank.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+from typing import Dict, List, Optional, Sequence, Tuple  # 型アノテーション用
+
+from django.conf import settings  # キャッシュ有効期間の設定値を参照
+from django.core.cache import cache  # Django標準のキャッシュ
+from django.db import transaction  # コミット後にキャッシュを更新するため
+from django.db.models import Count, F, Q  # 集計・原子的な加算・条件指定
+from django.utils import timezone  # 更新日時の設定用
+
+from exam.models import BankState, Chapter, Question  # 版数モデル・章モデル・問題モデル
+from exam.logic.bank_image import current_image, schedule_rebuild  # メモリマップした問題バンクイメージ・版数更新後の作り直し
+
+VERSION_KEY = "exam:bank_state"  # (版数, 最終更新時刻) を載せるキャッシュキー
+# 版数キャッシュの有効秒数。書き込んだプロセスは即時反映、他プロセスは最大この秒数で追従する
+VERSION_TTL = getattr(settings, "EXAM_BANK_VERSION_TTL", 5)
+
+
+def bank_state() -> Tuple[int, float]:
+    """
+    現在の (問題バンク版数, 最終更新のUNIX時刻) を返す。通常はキャッシュから読み、切れたときだけDBを1回参照する。
+    """
+    s = cache.get(VERSION_KEY)
+    if s is None:
+        state, _ = BankState.objects.get_or_create(pk=1)
+        s = (state.version, state.updated_at.timestamp())
+        cache.set(VERSION_KEY, s, VERSION_TTL)
+    return s
+
+
+def bank_version() -> int:
+    """現在の問題バンク版数"""
+    return bank_state()[0]
+
+
+def bump_bank_version() -> None:
+    """
+    版数を1つ進める（Chapter / Question / Choice の保存・削除シグナルから呼ばれる）。
+    DB側は F式で原子的に加算し、キャッシュはコミット後に捨てて次回読み直させる。
+    イメージを使っている環境では、コミット後に新しい版数のイメージをバックグラウンドで作り直す。
+    """
+    updated = BankState.objects.filter(pk=1).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        BankState.objects.get_or_create(pk=1, defaults={"version": 2})
+    transaction.on_commit(lambda: cache.delete(VERSION_KEY))
+    transaction.on_commit(schedule_rebuild)
+
+
+def chapter_coverage() -> List[Dict]:
+    """
+    章ごとの出題対象問題数（n）を版数単位でキャッシュして返す。
+    return例: [{"num": 3, "title": "...", "official_quota": 7, "n": 70}, ...]
+    """
+    key = f"exam:coverage:{bank_version()}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            Chapter.objects.annotate(
+                n=Count("question", filter=Q(question__is_excluded=False))
+            )
+            .order_by("num")
+            .values("num", "title", "official_quota", "n")
+        )
+        cache.set(key, rows, None)  # 版数がキーに入っているので期限なしでよい
+    return rows
+
+
+_eligible_memo: Dict[int, Dict[int, List[int]]] = {}  # 版数→章別ID一覧（プロセス内のメモ）
+
+
+def eligible_ids(chapter: int) -> Sequence[int]:
+    """
+    章の出題対象問題ID一覧を返す。
+    版数が一致するイメージがあればメモリマップから（DBアクセスなし）、無ければDBから取得して版数単位でメモする。
+    """
+    version = bank_version()
+    img = current_image(version)
+    if img is not None:
+        return img.chapter_ids(chapter)
+
+    by_ch = _eligible_memo.get(version)
+    if by_ch is None:
+        by_ch = {}
+        for qid, ch in (
+            Question.objects.filter(is_excluded=False)
+            .order_by("id")
+            .values_list("id", "chapter__num")
+            .iterator(chunk_size=5000)
+        ):
+            by_ch.setdefault(ch, []).append(qid)
+        _eligible_memo.clear()  # 古い版数のメモは捨てる
+        _eligible_memo[version] = by_ch
+    return by_ch.get(chapter, [])
+
+
+def load_question(qid: int) -> Optional[Tuple[object, List]]:
+    """
+    出題用に (問題, 選択肢リスト) を返す。イメージにあればそこから、無ければDBから1問+選択肢を取得する。
+    どちらも id / stem / note、選択肢は id / text / is_correct で参照できる。存在しなければ None。
+    """
+    img = current_image(bank_version())
+    if img is not None:
+        q = img.question(qid)
+        if q is not None:
+            return q, list(q.choices)
+    q = Question.objects.filter(pk=qid).prefetch_related("choices").first()
+    if q is None:
+        return None
+    return q, list(q.choices.all())
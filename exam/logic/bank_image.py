@@ -0,0 +1,316 @@
+# exam_preparation/exam/logic/bank_image.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import logging  # 作り直しの失敗の記録
+import mmap  # 読み取り専用のメモリマップ（全ワーカーで物理メモリを共有）
+import os  # アトミックな置き換え（os.replace）用
+import struct  # ヘッダのパック・アンパック用
+import threading  # イメージ差し替え時の排他用
+import time  # 差し替え確認の間隔制御用
+from array import array  # 列データの書き出し用
+from bisect import bisect_right  # 行番号→章の二分探索用
+from dataclasses import dataclass  # 問題・選択肢の軽量表現
+from pathlib import Path  # パス操作用
+from typing import Dict, List, Optional, Sequence  # 型アノテーション用
+
+from django.conf import settings  # 出力先ディレクトリ・自動作り直しの設定値を参照
+
+# ---------------------------------------------------------------------------
+# ファイル形式（リトルエンディアン、各セクションは8バイト境界）
+#   ヘッダ: MAGIC, 形式版, 版数, 問題数n, 選択肢数m, 章数k, 各セクションのオフセット
+#   q_id      Q[n]    問題ID（章番号→ID順に整列）
+#   q_kind    B[n]    種別（KINDS のインデックス）
+#   q_choice  I[n+1]  問題iの選択肢は c_*[q_choice[i]:q_choice[i+1]]
+#   c_id      Q[m]    選択肢ID
+#   c_correct B[m]    正解フラグ
+#   ch_num    H[k]    章番号
+#   ch_start  I[k+1]  章jの問題は q_*[ch_start[j]:ch_start[j+1]]
+#   id_order  I[n]    q_id を昇順にたどる行番号（IDからの二分探索用）
+#   t_off     Q[2n+m+1] 文字列のオフセット（問題iの問題文=2i, 解説=2i+1, 選択肢j=2n+j）
+#   text      UTF-8 文字列の連結
+# ---------------------------------------------------------------------------
+MAGIC = b"EXQB"
+FORMAT_VERSION = 1
+KINDS = ("single", "multi", "judge")  # Question.KIND_CHOICES と同順
+SECTIONS = ("q_id", "q_kind", "q_choice", "c_id", "c_correct", "ch_num", "ch_start", "id_order", "t_off", "text")
+TYPECODES = {"q_id": "Q", "q_kind": "B", "q_choice": "I", "c_id": "Q", "c_correct": "B",
+             "ch_num": "H", "ch_start": "I", "id_order": "I", "t_off": "Q"}
+HEADER = struct.Struct("<4sHxxQIII" + "QQ" * len(SECTIONS))  # 各セクションの (offset, length)
+
+logger = logging.getLogger(__name__)
+
+POINTER_NAME = "current"  # 現在有効なイメージのファイル名を書いたポインタファイル
+CHECK_INTERVAL = 5.0  # ポインタファイルを確認する間隔（秒）
+
+
+def image_dir() -> Path:
+    """イメージの置き場所（settings.EXAM_BANK_IMAGE_DIR）"""
+    return Path(getattr(settings, "EXAM_BANK_IMAGE_DIR", Path(settings.BASE_DIR) / "bankimage"))
+
+
+@dataclass(frozen=True)
+class ImageChoice:
+    """イメージから読み出した選択肢（テンプレートでは Choice と同じ属性名で使える）"""
+    id: int
+    text: str
+    is_correct: bool
+
+
+@dataclass(frozen=True)
+class ImageQuestion:
+    """イメージから読み出した問題（テンプレートでは Question と同じ属性名で使える）"""
+    id: int
+    chapter_num: int
+    kind: str
+    stem: str
+    note: str
+    choices: List[ImageChoice]
+
+
+def build_image(version: int) -> Path:
+    """
+    出題対象（is_excluded=False）の問題バンクをバイナリイメージに書き出し、
+    ポインタファイルをアトミックに差し替えて有効化する。作成したファイルのパスを返す。
+    """
+    from exam.models import Choice, Question  # ワーカーの読み込み時にモデルを引かないよう遅延import
+
+    rows = list(
+        Question.objects.filter(is_excluded=False)
+        .order_by("chapter__num", "id")
+        .values_list("id", "chapter__num", "kind", "stem", "note")
+    )
+    by_q: Dict[int, List[tuple]] = {}
+    for cid, qid, text, ok in (
+        Choice.objects.filter(question__is_excluded=False)
+        .order_by("question_id", "id")
+        .values_list("id", "question_id", "text", "is_correct")
+        .iterator(chunk_size=5000)
+    ):
+        by_q.setdefault(qid, []).append((cid, text, ok))
+
+    cols = {name: array(code) for name, code in TYPECODES.items()}
+    texts: List[bytes] = []
+    choice_texts: List[bytes] = []
+    cols["q_choice"].append(0)
+    for qid, ch, kind, stem, note in rows:
+        if not cols["ch_num"] or cols["ch_num"][-1] != ch:
+            cols["ch_num"].append(ch)
+            cols["ch_start"].append(len(cols["q_id"]))
+        cols["q_id"].append(qid)
+        cols["q_kind"].append(KINDS.index(kind) if kind in KINDS else 0)
+        texts += [stem.encode(), note.encode()]
+        for cid, text, ok in by_q.get(qid, ()):
+            cols["c_id"].append(cid)
+            cols["c_correct"].append(1 if ok else 0)
+            choice_texts.append(text.encode())
+        cols["q_choice"].append(len(cols["c_id"]))
+    cols["ch_start"].append(len(cols["q_id"]))
+    cols["id_order"].extend(sorted(range(len(rows)), key=lambda i: rows[i][0]))
+
+    texts += choice_texts
+    pos = 0
+    cols["t_off"].append(0)
+    for t in texts:
+        pos += len(t)
+        cols["t_off"].append(pos)
+
+    blobs = [cols[name].tobytes() if name != "text" else b"".join(texts) for name in SECTIONS]
+    layout = []
+    offset = HEADER.size
+    for blob in blobs:
+        offset += -offset % 8  # 8バイト境界に揃える
+        layout += [offset, len(blob)]
+        offset += len(blob)
+
+    out_dir = image_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bank-{version}.img"
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")  # 複数プロセスが同じ版数を同時に書いても混ざらない
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, len(rows), len(cols["c_id"]),
+                            len(cols["ch_num"]), *layout))
+        for (off, _), blob in zip(zip(layout[::2], layout[1::2]), blobs):
+            f.write(b"\0" * (off - f.tell()))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # 完成したファイルだけが見えるように置き換え
+
+    if _pointer_version() > version:
+        return path  # 待っている間に他のプロセスが新しい版数を公開した（古い版数に戻さない）
+    pointer_tmp = out_dir / f"{POINTER_NAME}.{os.getpid()}.tmp"
+    pointer_tmp.write_text(path.name)
+    os.replace(pointer_tmp, out_dir / POINTER_NAME)  # ポインタの差し替えで全ワーカーに公開
+    return path
+
+
+def _pointer_version() -> int:
+    # ポインタファイルが指しているイメージの版数（無ければ0）
+    try:
+        name = (image_dir() / POINTER_NAME).read_text().strip()
+    except OSError:
+        return 0
+    try:
+        return int(name.removeprefix("bank-").removesuffix(".img"))
+    except ValueError:
+        return 0
+
+
+def prune_images(keep: int = 2) -> int:
+    """古いイメージを削除する（現行を含めて keep 個残す）。マップ中のワーカーは削除後もそのまま読み続けられる"""
+    images = sorted(image_dir().glob("bank-*.img"), key=lambda p: p.stat().st_mtime, reverse=True)
+    try:
+        current = (image_dir() / POINTER_NAME).read_text().strip()
+    except OSError:
+        current = ""
+    removed = 0
+    for old in images[max(keep, 1):]:
+        if old.name != current:
+            old.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+_rebuild_lock = threading.Lock()
+_rebuild_running = False
+_rebuild_again = False
+
+
+def schedule_rebuild() -> None:
+    """
+    版数が進んだらイメージを作り直す（bump_bank_version のコミット後に呼ぶ）。
+    イメージを使っていない（build_bank_image を一度も実行していない）環境では何もしない。
+    作り直しはバックグラウンドのスレッドで行い、実行中に版数が進んだら終わったあともう一度だけ作る
+    （管理画面での連続編集でも作り直しは高々2回）。作り直すまでの間、各ワーカーはDBから読む。
+    """
+    global _rebuild_running, _rebuild_again
+    if not getattr(settings, "EXAM_BANK_IMAGE_AUTO_REBUILD", True) or not (image_dir() / POINTER_NAME).exists():
+        return
+    with _rebuild_lock:
+        if _rebuild_running:
+            _rebuild_again = True
+            return
+        _rebuild_running = True
+    threading.Thread(target=_rebuild_loop, name="bank-image-rebuild", daemon=True).start()
+
+
+def _rebuild_loop() -> None:
+    global _rebuild_running, _rebuild_again
+    from django.db import connection  # スレッド専用の接続を最後に閉じる
+    from exam.models import BankState  # キャッシュを通さず最新の版数を読む
+
+    try:
+        while True:
+            with _rebuild_lock:
+                _rebuild_again = False
+            version = BankState.objects.filter(pk=1).values_list("version", flat=True).first() or 1
+            if _pointer_version() < version:
+                build_image(version)
+                prune_images()
+            with _rebuild_lock:
+                if not _rebuild_again:
+                    _rebuild_running = False
+                    return
+    except Exception:
+        logger.exception("問題バンクイメージの作り直しに失敗しました")
+        with _rebuild_lock:
+            _rebuild_running = False
+    finally:
+        connection.close()
+
+
+class BankImage:
+    """
+    読み取り専用でメモリマップしたイメージ。列は memoryview.cast でコピーせずに参照する。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        head = HEADER.unpack_from(self._mm, 0)
+        magic, fmt, self.bank_version, self.n, self.m, self.k = head[:6]
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"問題バンクイメージの形式が不正です: {path}")
+        buf = memoryview(self._mm)
+        layout = head[6:]
+        self._cols = {}
+        for i, name in enumerate(SECTIONS):
+            off, length = layout[2 * i], layout[2 * i + 1]
+            view = buf[off:off + length]
+            self._cols[name] = view.cast(TYPECODES[name]) if name in TYPECODES else view
+        self._chapters = {num: j for j, num in enumerate(self._cols["ch_num"])}
+
+    def _text(self, i: int) -> str:
+        off = self._cols["t_off"]
+        return bytes(self._cols["text"][off[i]:off[i + 1]]).decode()
+
+    def chapter_ids(self, chapter: int) -> Sequence[int]:
+        """章の出題対象問題IDを返す（コピーなしのビュー。random.sample にそのまま渡せる）"""
+        j = self._chapters.get(chapter)
+        if j is None:
+            return ()
+        start = self._cols["ch_start"]
+        return self._cols["q_id"][start[j]:start[j + 1]]
+
+    def chapter_counts(self) -> Dict[int, int]:
+        """章番号→出題対象の問題数"""
+        start = self._cols["ch_start"]
+        return {num: start[j + 1] - start[j] for num, j in self._chapters.items()}
+
+    def question(self, qid: int) -> Optional[ImageQuestion]:
+        """IDで問題を引く（O(log n)）。イメージに無ければ None"""
+        q_id, order = self._cols["q_id"], self._cols["id_order"]
+        lo, hi = 0, self.n
+        while lo < hi:  # id_order 経由で q_id を昇順にたどる二分探索
+            mid = (lo + hi) // 2
+            if q_id[order[mid]] < qid:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo >= self.n or q_id[order[lo]] != qid:
+            return None
+        i = order[lo]
+        j = bisect_right(self._cols["ch_start"], i) - 1  # 行番号から章を求める
+        c0, c1 = self._cols["q_choice"][i], self._cols["q_choice"][i + 1]
+        choices = [
+            ImageChoice(self._cols["c_id"][c], self._text(2 * self.n + c), bool(self._cols["c_correct"][c]))
+            for c in range(c0, c1)
+        ]
+        return ImageQuestion(
+            id=qid,
+            chapter_num=self._cols["ch_num"][j],
+            kind=KINDS[self._cols["q_kind"][i]],
+            stem=self._text(2 * i),
+            note=self._text(2 * i + 1),
+            choices=choices,
+        )
+
+
+_lock = threading.Lock()
+_current: Optional[BankImage] = None
+_checked_at = 0.0
+
+
+def current_image(version: int) -> Optional[BankImage]:
+    """
+    現在の版数（version）と一致するイメージを返す。無い・古い場合は None（呼び出し側はDBを使う）。
+    ポインタファイルは CHECK_INTERVAL 秒ごとにだけ確認し、変わっていれば新しいイメージに差し替える。
+    古いイメージは参照が無くなった時点で解放される（使用中のワーカーには影響しない）。
+    """
+    global _current, _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= CHECK_INTERVAL:
+        with _lock:
+            _checked_at = now
+            try:
+                name = (image_dir() / POINTER_NAME).read_text().strip()
+            except OSError:
+                name = ""
+            if name and (_current is None or _current.path.name != name):
+                try:
+                    _current = BankImage(image_dir() / name)
+                except (OSError, ValueError, struct.error):
+                    _current = None
+    img = _current
+    return img if img is not None and img.bank_version == version else None
@@ -0,0 +1,177 @@
+# exam_preparation/exam/logic/bank_validator.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import json  # 配列要素単位のデコード（raw_decode）に使用
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple  # 型アノテーション用
+
+# ※ このモジュールはプロセスプールのワーカーから呼ばれるため、Django（モデル・設定）に依存させない。
+#   許可する章番号・問題種別は呼び出し側（管理コマンド）から引数で渡す。
+
+CHUNK_SIZE = 64 * 1024  # 1回に読み込む文字数（ファイル全体は読み込まない）
+WS = " \t\r\n"  # JSONの空白文字
+TOKEN_TAIL = 8  # バッファ末尾で切れたトークン（false・\uXXXX・指数表記など）とみなす、エラー位置から末尾までの最大文字数
+
+
+class BankSyntaxError(Exception):
+    """JSONとして読めない箇所を行番号付きで表す例外"""
+
+    def __init__(self, message: str, line: int):
+        super().__init__(message)
+        self.line = line  # エラー位置の行番号（1始まり）
+
+
+def iter_json_array(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, int, object]]:
+    """
+    トップレベルが配列のJSONファイルを少しずつ読み込み、要素を1件ずつ返す。
+    戻り値は (要素のインデックス, 要素の開始行, 要素の値) のタプル。
+    バッファには「読みかけの1要素」分しか保持しないため、巨大なファイルでもメモリ使用量は一定。
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = ""  # 未処理の文字列バッファ
+        pos = 0  # バッファ内の現在位置
+        line = 1  # posの位置の行番号
+        eof = False  # ファイル末尾まで読んだか
+
+        def fill() -> bool:
+            # バッファに次のチャンクを追加する。消費済みの先頭部分はここで捨てる
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_ws() -> Optional[str]:
+            # 空白を読み飛ばし（改行は行番号に加算）、次の1文字を返す。末尾ならNone
+            nonlocal pos, line
+            while True:
+                while pos < len(buf) and buf[pos] in WS:
+                    if buf[pos] == "\n":
+                        line += 1
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return None
+
+        if skip_ws() != "[":
+            raise BankSyntaxError("トップレベルが配列ではありません", line)
+        pos += 1
+
+        index = 0
+        while True:
+            ch = skip_ws()
+            if ch is None:
+                raise BankSyntaxError("配列が閉じられていません", line)
+            if ch == "]":
+                return  # 配列の終端
+            if index > 0:
+                if ch != ",":
+                    raise BankSyntaxError("要素の区切り（,）がありません", line)
+                pos += 1
+                if skip_ws() is None:
+                    raise BankSyntaxError("配列が閉じられていません", line)
+
+            # 1要素ぶんをデコード。途中で切れていれば追加で読み込んで再試行する
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    # 追加で読み込むのは、要素がバッファ末尾で切れている場合（未終端の文字列・途中までのトークン）だけ。
+                    # バッファの途中で壊れている要素は、ファイル末尾まで読まずにその場で報告する
+                    truncated = e.msg.startswith("Unterminated string") or len(buf) - e.pos <= TOKEN_TAIL
+                    if truncated and fill():
+                        continue
+                    raise BankSyntaxError(e.msg, line + buf.count("\n", pos, e.pos)) from None
+                if end == len(buf) and fill():
+                    continue  # 数値などが境界で切れている可能性があるので読み直す
+                break
+
+            start_line = line
+            line += buf.count("\n", pos, end)  # 要素内の改行を行番号に反映
+            pos = end
+            yield index, start_line, value
+            index += 1
+
+
+def validate_question(
+    q: object, chapters: Iterable[int], kinds: Iterable[str]
+) -> List[Tuple[str, str]]:
+    """
+    問題1件を検査し、(エラーコード, メッセージ) のリストを返す。問題がなければ空リスト。
+    """
+    if not isinstance(q, dict):
+        return [("not_object", "問題がオブジェクトではありません")]
+
+    issues: List[Tuple[str, str]] = []
+
+    ch = q.get("chapter")
+    if not isinstance(ch, int) or isinstance(ch, bool) or ch not in chapters:
+        issues.append(("unknown_chapter", f"章 {ch!r} は CHAPTER_QUOTA にありません"))
+
+    kind = q.get("kind", "single")
+    if kind not in kinds:
+        issues.append(("unknown_kind", f"種別 {kind!r} は未定義です"))
+
+    stem = q.get("stem")
+    if not isinstance(stem, str) or not stem.strip():
+        issues.append(("empty_stem", "問題文が空です"))
+
+    if not isinstance(q.get("is_excluded", False), bool):
+        issues.append(("bad_is_excluded", "is_excluded が真偽値ではありません"))
+
+    choices = q.get("choices")
+    if not isinstance(choices, list) or len(choices) < 2:
+        issues.append(("too_few_choices", "選択肢が2つ未満です"))
+        return issues
+
+    seen = set()  # 重複検出用（前後の空白は無視）
+    n_correct = 0
+    for i, c in enumerate(choices):
+        if not isinstance(c, dict):
+            issues.append(("bad_choice", f"選択肢{i + 1}がオブジェクトではありません"))
+            continue
+        text = c.get("text")
+        if not isinstance(text, str) or not text.strip():
+            issues.append(("empty_choice", f"選択肢{i + 1}が空です"))
+            continue
+        key = text.strip()
+        if key in seen:
+            issues.append(("duplicate_choice", f"選択肢{i + 1}が重複しています: {key[:40]}"))
+        seen.add(key)
+        if c.get("correct") is True:
+            n_correct += 1
+
+    if n_correct == 0:
+        issues.append(("no_correct_choice", "正解の選択肢がありません"))
+    elif n_correct > 1 and kind != "multi":
+        issues.append(("multiple_correct", f"{kind} なのに正解が{n_correct}個あります"))
+
+    return issues
+
+
+def validate_file(path: str, chapters: Iterable[int], kinds: Iterable[str]) -> Dict:
+    """
+    1ファイルを逐次読み込みながら検査し、件数と指摘事項を辞書で返す（プロセスプールから呼ばれる）。
+    """
+    chapters = frozenset(chapters)
+    kinds = frozenset(kinds)
+    issues: List[Dict] = []
+    count = 0
+    try:
+        for index, line, q in iter_json_array(path):
+            count += 1
+            for code, message in validate_question(q, chapters, kinds):
+                issues.append(
+                    {"file": path, "line": line, "index": index, "code": code, "message": message}
+                )
+    except BankSyntaxError as e:
+        issues.append({"file": path, "line": e.line, "index": count, "code": "syntax", "message": str(e)})
+    except (OSError, UnicodeDecodeError) as e:
+        issues.append({"file": path, "line": 0, "index": None, "code": "io", "message": str(e)})
+    return {"file": path, "questions": count, "issues": issues}
@@ -0,0 +1,117 @@
+# exam_preparation/exam/logic/export.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import csv  # CSV出力用
+import json  # 列指向フォーマット（NDJSON）出力用
+from datetime import datetime, time, timedelta  # 日付範囲の境界計算用
+from typing import Iterator, Optional  # 型アノテーション用
+
+from django.db.models import QuerySet  # 型アノテーション用
+from django.utils import timezone  # タイムゾーン付き日時への変換用
+from django.utils.dateparse import parse_date, parse_datetime  # 文字列→日付/日時の変換
+
+from exam.models import Attempt  # 解答履歴モデル
+
+# 出力する列名と、それに対応する values_list のフィールド（順序を一致させること）
+EXPORT_COLUMNS = (
+    "id", "user", "question_id", "chapter", "is_correct", "mode", "box", "answered_at",
+)
+EXPORT_FIELDS = (
+    "id", "user__username", "question_id", "question__chapter__num",
+    "is_correct", "mode", "box", "answered_at",
+)
+
+EXPORT_FORMATS = ("csv", "coljson")  # csv: 1行1レコード / coljson: チャンク単位の列指向NDJSON
+DEFAULT_CHUNK_SIZE = 2000  # DBから一度に取り出す行数
+
+
+def _parse_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    """
+    "2025-10-01" または ISO形式の日時をタイムゾーン付き日時に変換する。
+    日付のみの終端（end=True）はその日の翌日0時（未満で比較）にする。
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise ValueError(f"日付の形式が不正です: {value}")
+        dt = datetime.combine(d + timedelta(days=1) if end else d, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def export_queryset(
+    user: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    mode: Optional[str] = None,
+    chapter: Optional[int] = None,
+) -> QuerySet:
+    """
+    絞り込み条件（ユーザー名・期間・モード・章）を適用した values_list のクエリセットを返す。
+    モデルインスタンスを作らずタプルのまま流すため、行数が増えてもメモリは増えない。
+    """
+    qs = Attempt.objects.all()
+    if user:
+        qs = qs.filter(user__username=user)
+    start = _parse_bound(since)
+    if start:
+        qs = qs.filter(answered_at__gte=start)
+    stop = _parse_bound(until, end=True)
+    if stop:
+        if parse_datetime(until) is None:
+            qs = qs.filter(answered_at__lt=stop)  # 日付のみ：翌日0時未満＝その日の終わりまで含める
+        else:
+            qs = qs.filter(answered_at__lte=stop)  # 日時指定：その時刻まで含める
+    if mode:
+        qs = qs.filter(mode=mode)
+    if chapter:
+        qs = qs.filter(question__chapter__num=chapter)
+    return qs.order_by("id").values_list(*EXPORT_FIELDS)
+
+
+class _Echo:
+    """csv.writer の書き込み先。書いた行をそのまま返すだけの疑似バッファ"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(qs: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """ヘッダ行に続けて、1レコードずつCSV行を返す"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in qs.iterator(chunk_size=chunk_size):
+        yield writer.writerow(
+            [v.isoformat() if isinstance(v, datetime) else int(v) if isinstance(v, bool) else v for v in row]
+        )
+
+
+def iter_coljson(qs: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    列指向のNDJSONを返す。1行目は列名、以降は chunk_size 行ごとに列ごとの配列をまとめた1行。
+    同じ値が並ぶ列（mode, chapter など）は圧縮が効きやすく、CSVより小さくなる。
+    """
+    yield json.dumps({"columns": EXPORT_COLUMNS}) + "\n"
+    block = [[] for _ in EXPORT_COLUMNS]
+    n = 0
+    for row in qs.iterator(chunk_size=chunk_size):
+        for col, v in zip(block, row):
+            col.append(v.isoformat() if isinstance(v, datetime) else v)
+        n += 1
+        if n >= chunk_size:
+            yield json.dumps({"n": n, "data": block}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            block = [[] for _ in EXPORT_COLUMNS]
+            n = 0
+    if n:
+        yield json.dumps({"n": n, "data": block}, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def iter_export(qs: QuerySet, fmt: str = "csv", chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """形式名に応じた行ジェネレーターを返す"""
+    if fmt == "coljson":
+        return iter_coljson(qs, chunk_size)
+    return iter_csv(qs, chunk_size)
@@ -0,0 +1,15 @@
+# exam_preparation/exam/logic/freshness.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+
+from exam.models import UserReadiness  # ユーザー固有の表示内容（合格可能性）の保存先
+
+
+def user_stamp(user_id: int) -> float:
+    """
+    ユーザー固有の表示内容（合格可能性）が最後に変わったUNIX時刻。ETag / Last-Modified の材料。
+    UserReadiness.updated_at（auto_now）を読むので、どのプロセスで解答を記録しても全ワーカーで同じ値になる。
+    行が無ければ 0（事前分布だけの表示。行が作られた時点で時刻が進む）。
+    """
+    at = UserReadiness.objects.filter(user_id=user_id).values_list("updated_at", flat=True).first()
+    return at.timestamp() if at is not None else 0.0
@@ -0,0 +1,181 @@
+# exam_preparation/exam/logic/leaderboard.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+from collections import defaultdict  # ユーザーごとの集計
+from typing import Dict, Iterable, List, Optional, Tuple  # 型アノテーション用
+
+from django.db import transaction  # 順位表の行の更新
+from django.db.models import Count, F, FloatField, IntegerField, Q, QuerySet, Sum  # 台帳からの再構築・差分の加算・順位の数え上げ
+from django.db.models.functions import Cast  # 正誤(bool)を数値として合計・正答率を実数で計算
+
+from exam.models import (  # 所属・順位表・台帳
+    CohortMember,
+    LeaderboardChapter,
+    LeaderboardEntry,
+    MockAnswer,
+    MockExam,
+    Question,
+)
+from .quota import CHAPTER_QUOTA, DEFAULT_BLUEPRINT  # 章の一覧・順位に数える出題設計
+
+PAGE_SIZE = 50  # 1ページの表示件数
+METRIC_SCORE = "score"  # 模試の最高点で並べる
+CLOSED = (MockExam.STATUS_FINISHED, MockExam.STATUS_EXPIRED)  # 確定済みの模試
+
+SCORE_ORDER = ("-best_score", "best_at", "user_id")  # 最高点が高い順、同点なら先に取った順（lb_score_order）
+CHAPTER_ORDER = ("-rate", "-answered", "correct", "user_id")  # 正答率が高い順、同率なら解答数が多い順（lb_chapter_order）
+
+
+def chapter_metric(num: int) -> str:
+    return f"ch{num}"
+
+
+def metrics() -> List[str]:
+    """選べる並べ方（最高点と、章ごとの正答率）"""
+    return [METRIC_SCORE] + [chapter_metric(num) for num in sorted(CHAPTER_QUOTA)]
+
+
+def _ranked(cohort_id: int, metric: str) -> Tuple[QuerySet, Tuple[str, ...]]:
+    # 順位表に載る行（公式配点の模試が未受験・その章が未解答の行は載せない）と並び順
+    if metric == METRIC_SCORE:
+        return LeaderboardEntry.objects.filter(cohort_id=cohort_id, best_at__isnull=False), SCORE_ORDER
+    rows = LeaderboardChapter.objects.filter(cohort_id=cohort_id, chapter_num=int(metric[2:]), answered__gt=0)
+    return rows, CHAPTER_ORDER
+
+
+def _ahead_of(order: Tuple[str, ...], row) -> Q:
+    # 並び順で row より前にある行の条件（(a, b, c) > (x, y, z) を辞書式に展開）。user_id で必ず順序が決まる
+    cond, same = Q(), {}
+    for field in order:
+        name = field.lstrip("-")
+        cond |= Q(**same, **{f"{name}__{'gt' if field.startswith('-') else 'lt'}": getattr(row, name)})
+        same[name] = getattr(row, name)
+    return cond
+
+
+def page(cohort_id: int, metric: str, offset: int, limit: int = PAGE_SIZE) -> List[Tuple[int, object]]:
+    """
+    (順位, 行) のリスト。行は最高点なら LeaderboardEntry、章なら LeaderboardChapter（user を読み込み済み）。
+    並び順のインデックスをたどって offset から limit 件だけ読む。
+    """
+    rows, order = _ranked(cohort_id, metric)
+    return [
+        (offset + i + 1, row)
+        for i, row in enumerate(rows.select_related("user").order_by(*order)[offset:offset + limit])
+    ]
+
+
+def rank(cohort_id: int, metric: str, user_id: int) -> Optional[int]:
+    """1始まりの順位（順位表に載っていなければ None）。自分の行と、インデックス上で前にある行の COUNT の2クエリ"""
+    rows, order = _ranked(cohort_id, metric)
+    mine = rows.filter(user_id=user_id).first()
+    if mine is None:
+        return None
+    return rows.filter(_ahead_of(order, mine)).count() + 1
+
+
+def size(cohort_id: int, metric: str) -> int:
+    """順位表に載っている人数"""
+    rows, _ = _ranked(cohort_id, metric)
+    return rows.count()
+
+
+def remove_member(cohort_id: int, user_id: int) -> None:
+    """所属を外れたユーザーの行を順位表から消す"""
+    LeaderboardEntry.objects.filter(cohort_id=cohort_id, user_id=user_id).delete()
+    LeaderboardChapter.objects.filter(cohort_id=cohort_id, user_id=user_id).delete()
+
+
+def _add_chapters(cohort_id: int, user_id: int, per_ch: Dict[int, List[int]]) -> None:
+    # 章別の行が無ければ作り（一意なので同時に作られても1行）、正解数・解答数・正答率を F() の UPDATE で加算する
+    LeaderboardChapter.objects.bulk_create(
+        [LeaderboardChapter(cohort_id=cohort_id, user_id=user_id, chapter_num=ch) for ch in per_ch],
+        ignore_conflicts=True,
+    )
+    for ch, (c, n) in per_ch.items():
+        LeaderboardChapter.objects.filter(cohort_id=cohort_id, user_id=user_id, chapter_num=ch).update(
+            correct=F("correct") + c,
+            answered=F("answered") + n,
+            rate=Cast(F("correct") + c, FloatField()) / (F("answered") + n),  # 右辺は更新前の値
+        )
+
+
+def record_exams(exams: Iterable[MockExam], answers: Dict[int, List[Tuple[int, bool]]]) -> None:
+    """
+    確定した模試をグループの順位表に反映する（finalize_exam / sweep_expired から呼ぶ）。
+    answers は模試ID→[(問題ID, 正誤)]。グループに属さないユーザーの模試は所属の確認1回で終わる。
+    最高点の行は select_for_update で読み書きし、章別の行は F() で加算するので、同時に確定しても取りこぼさない。
+    """
+    by_user: Dict[int, List[MockExam]] = defaultdict(list)
+    for exam in exams:
+        by_user[exam.user_id].append(exam)
+    memberships = list(
+        CohortMember.objects.filter(user_id__in=by_user).values_list("cohort_id", "user_id")
+    )
+    if not memberships:
+        return
+
+    qids = {qid for user_exams in by_user.values() for e in user_exams for qid, _ in answers[e.id]}
+    chapter_of = dict(Question.objects.filter(id__in=qids).values_list("id", "chapter__num"))
+    per_user: Dict[int, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(lambda: [0, 0]))  # 章→[正解数, 解答数]
+    for user_id, user_exams in by_user.items():
+        for exam in user_exams:
+            for qid, ok in answers[exam.id]:
+                ch = chapter_of.get(qid)
+                if ch is not None:
+                    per_user[user_id][ch][0] += int(ok)
+                    per_user[user_id][ch][1] += 1
+
+    for cohort_id, user_id in memberships:
+        with transaction.atomic():
+            entry, _ = LeaderboardEntry.objects.select_for_update().get_or_create(
+                cohort_id=cohort_id, user_id=user_id
+            )
+            for exam in by_user[user_id]:
+                entry.exams += 1
+                if exam.blueprint == DEFAULT_BLUEPRINT and (
+                    entry.best_at is None or exam.score > entry.best_score
+                ):
+                    entry.best_score, entry.best_at = exam.score, exam.finished_at
+            entry.save()
+            if per_user[user_id]:
+                _add_chapters(cohort_id, user_id, per_user[user_id])
+
+
+def rebuild_entries(cohort_id: int, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    確定済みの模試の台帳から順位表の行を作り直す（新規所属・初回導入時の取り込み用。オフライン受験の模試は除く）。
+    user_ids を省略するとグループ全員。作り直した行数を返す。
+    """
+    members = CohortMember.objects.filter(cohort_id=cohort_id)
+    if user_ids is not None:
+        members = members.filter(user_id__in=list(user_ids))
+    uids = list(members.values_list("user_id", flat=True))
+
+    entries = {uid: LeaderboardEntry(cohort_id=cohort_id, user_id=uid) for uid in uids}
+    for uid, blueprint, score, finished_at in (
+        MockExam.objects.filter(user_id__in=uids, status__in=CLOSED, offline=False)
+        .order_by("finished_at")
+        .values_list("user_id", "blueprint", "score", "finished_at")
+        .iterator()
+    ):
+        e = entries[uid]
+        e.exams += 1
+        if blueprint == DEFAULT_BLUEPRINT and (e.best_at is None or score > e.best_score):
+            e.best_score, e.best_at = score, finished_at
+    chapters = [
+        LeaderboardChapter(cohort_id=cohort_id, user_id=uid, chapter_num=ch, correct=c, answered=n, rate=c / n)
+        for uid, ch, c, n in (
+            MockAnswer.objects.filter(exam__user_id__in=uids, exam__status__in=CLOSED, exam__offline=False)
+            .values_list("exam__user_id", "question__chapter__num")
+            .annotate(c=Sum(Cast("is_correct", IntegerField())), n=Count("id"))
+            .values_list("exam__user_id", "question__chapter__num", "c", "n")
+        )
+    ]
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(cohort_id=cohort_id, user_id__in=uids).delete()
+        LeaderboardChapter.objects.filter(cohort_id=cohort_id, user_id__in=uids).delete()
+        LeaderboardEntry.objects.bulk_create(entries.values())
+        LeaderboardChapter.objects.bulk_create(chapters, batch_size=2000)
+    return len(entries)
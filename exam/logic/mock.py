@@ -0,0 +1,212 @@
+# exam_preparation/exam/logic/mock.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import logging  # 掃除結果の記録
+import random  # 選択肢の表示順（模試×問題で固定）
+from datetime import timedelta  # 期限切れの判定
+from typing import Dict, Iterable, List, Optional, Tuple  # 型アノテーション用
+
+from django.db import IntegrityError, transaction  # 一意制約違反の検出・確定処理のトランザクション
+from django.utils import timezone  # 開始・確定日時
+
+from exam.models import Attempt, MockAnswer, MockExam, Question  # 解答履歴・模試の台帳・章の参照
+from . import leaderboard, pacing, readiness  # 確定した模試の反映先（グループの順位表・解答時間の累計・合格可能性）
+from .seen import mark_seen  # 解答済みビット列の更新
+
+logger = logging.getLogger(__name__)
+
+EXAM_DURATION_SEC = 75 * 60  # 試験時間は75分（秒数に換算）
+
+
+def start_exam(user, question_ids: List[int], blueprint: str, offline: bool = False) -> MockExam:
+    """出題セットを確定して模試を1件作成する（offline はオフライン受験の出題パッケージを渡す模試）"""
+    return MockExam.objects.create(
+        user=user,
+        blueprint=blueprint,
+        question_ids=list(question_ids),
+        started_at=timezone.now(),
+        offline=offline,
+    )
+
+
+def mock_session_keys(include_exam: bool = True) -> List[str]:
+    """
+    模試の出題状態としてセッションに置くキー（問題番号・期限・表示時刻など、問題数によらず固定の数）。
+    選択肢の表示順はセッションに置かず ordered_choices で毎回同じ順に並べる。
+    """
+    keys = ["mock_index", "mock_deadline", "mock_touched", "mock_shown", "mock_ids", "mock_correct", "mock_started_at", "mock_blueprint"]
+    # mock_ids 以降は台帳導入前のセッションに残っている可能性のあるキー
+    if include_exam:
+        keys.append("mock_exam_id")
+    return keys
+
+
+def ordered_choices(exam: MockExam, question_id: int, choices: Iterable) -> List:
+    """選択肢の表示順。模試×問題で固定（セッションに順序を保存しない。offline.build_bundle と同じ種）"""
+    choices = sorted(choices, key=lambda c: c.id)  # 読み込み元（イメージ・DB）の並びに左右されないよう ID 順から並べ替える
+    random.Random(f"{exam.id}:{question_id}").shuffle(choices)
+    return choices
+
+
+def remaining_seconds(exam: MockExam, now=None) -> int:
+    """制限時間の残り秒数（0未満にならない）"""
+    now = now or timezone.now()
+    elapsed = max(0, int((now - exam.started_at).total_seconds()))
+    return max(0, EXAM_DURATION_SEC - elapsed)
+
+
+def record_answer(exam: MockExam, question_id: int, choice, elapsed_ms: Optional[int] = None) -> MockAnswer:
+    """
+    解答を台帳に記録する。同じ設問への2回目以降の送信は最初の解答をそのまま返す（スコアは変わらない）。
+    通常は INSERT 1回で済み、一意制約に当たったときだけ既存行を読む。elapsed_ms は表示から解答までの時間。
+    """
+    try:
+        with transaction.atomic():
+            return MockAnswer.objects.create(
+                exam=exam,
+                question_id=question_id,
+                choice_id=choice.id if choice else None,
+                is_correct=bool(choice and choice.is_correct),
+                elapsed_ms=elapsed_ms,
+            )
+    except IntegrityError:
+        return MockAnswer.objects.get(exam=exam, question_id=question_id)
+
+
+def exam_score(exam: MockExam) -> int:
+    """台帳から数えた現時点の正解数"""
+    if exam.status != MockExam.STATUS_OPEN:
+        return exam.score
+    return exam.answers.filter(is_correct=True).count()
+
+
+def finalize_exam(exam: MockExam, now=None) -> bool:
+    """
+    模試を確定する。スコアを台帳から集計し、解答履歴（Attempt）をまとめて書き込み、解答済みビット列を更新する。
+    status=open の条件付き UPDATE で確定権を取るため、同時に呼ばれても書き込みは1回だけ。
+    確定したら True、既に確定済みなら False を返す。
+    """
+    now = now or timezone.now()
+    status = (
+        MockExam.STATUS_EXPIRED if remaining_seconds(exam, now) <= 0 else MockExam.STATUS_FINISHED
+    )
+    with transaction.atomic():
+        timed = list(exam.answers.values_list("question_id", "is_correct", "elapsed_ms"))
+        answers = [(qid, ok) for qid, ok, _ in timed]
+        score = sum(1 for _, ok in answers if ok)
+        won = MockExam.objects.filter(pk=exam.pk, status=MockExam.STATUS_OPEN).update(
+            status=status, finished_at=now, score=score
+        )
+        if not won:
+            exam.refresh_from_db(fields=["status", "finished_at", "score"])
+            return False
+        _write_attempts((exam, qid, ok, ms) for qid, ok, ms in timed)
+    exam.status, exam.finished_at, exam.score = status, now, score
+    mark_seen(exam.user_id, [qid for qid, _ in answers])  # 次回の出題で未解答の問題を優先させる
+    _record_standings([exam], {exam.id: answers})
+    pacing.record(timed)
+    return True
+
+
+def chapter_breakdown(exam: MockExam) -> Dict[int, Dict[str, int]]:
+    """
+    章ごとの正解数(c)・出題数(n)。未解答の設問も出題数に含める。
+    """
+    answered = dict(exam.answers.values_list("question_id", "is_correct"))
+    chapters = dict(
+        Question.objects.filter(id__in=exam.question_ids).values_list("id", "chapter__num")
+    )
+    stat: Dict[int, Dict[str, int]] = {}
+    for qid in exam.question_ids:
+        ch = chapters.get(qid)
+        if ch is None:
+            continue  # 出題後に削除された問題
+        row = stat.setdefault(ch, {"c": 0, "n": 0})
+        row["n"] += 1
+        row["c"] += int(answered.get(qid, False))
+    return dict(sorted(stat.items()))
+
+
+def open_exam_for(user, exam_id: Optional[int]) -> Optional[MockExam]:
+    """セッションに保存した模試IDから、本人の模試を取得する（他人のIDや削除済みは None）"""
+    if not exam_id:
+        return None
+    return MockExam.objects.filter(pk=exam_id, user=user).first()
+
+
+def _write_attempts(rows: Iterable[Tuple[MockExam, int, bool, Optional[int]]]) -> None:
+    # 確定した模試の解答（模試, 問題ID, 正誤, 解答時間）を解答履歴（Attempt）にまとめて書き込む
+    Attempt.objects.bulk_create(
+        [
+            Attempt(
+                user_id=exam.user_id,
+                question_id=qid,
+                is_correct=ok,
+                mode=Attempt.MODE_OFFLINE if exam.offline else Attempt.MODE_MOCK,
+                elapsed_ms=ms,
+            )
+            for exam, qid, ok, ms in rows
+        ]
+    )
+
+
+def _record_standings(exams: List[MockExam], answers: Dict[int, List[Tuple[int, bool]]]) -> None:
+    # 確定した模試を順位表・合格可能性に反映する。オフライン受験は正解キーを端末に渡しているので数えない
+    counted = [e for e in exams if not e.offline]
+    if counted:
+        leaderboard.record_exams(counted, answers)
+        readiness.record_exams(counted, answers)
+
+
+def sweep_expired(now=None, grace_sec: int = 0, batch: int = 500) -> int:
+    """
+    制限時間（＋猶予）を過ぎても受験中のままの模試を、まとめて採点・確定（expired）する。確定した件数を返す。
+    セッションには触らない。残る出題状態は mock_session_keys の固定数のキーだけで（問題ごとのキーは置かない）、
+    ビューが模試の status（open 以外）を見て使わず、結果画面の表示か次の模試の開始で消える。
+
+    確定権は status=open の条件付き UPDATE で取り、finished_at に今回の時刻を入れて自分が確定した行を見分ける。
+    ユーザーが結果画面を開いて同時に finalize_exam が走っても、解答履歴の書き込みは1回だけ。
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=EXAM_DURATION_SEC + grace_sec)
+    total = 0
+    while True:
+        candidates = list(
+            MockExam.objects.filter(status=MockExam.STATUS_OPEN, started_at__lt=cutoff)
+            .order_by("started_at")
+            .values_list("id", flat=True)[:batch]
+        )  # (status, started_at) インデックスで古い順に取得
+        if not candidates:
+            break
+        with transaction.atomic():
+            MockExam.objects.filter(pk__in=candidates, status=MockExam.STATUS_OPEN).update(
+                status=MockExam.STATUS_EXPIRED, finished_at=now
+            )
+            exams = list(
+                MockExam.objects.filter(
+                    pk__in=candidates, status=MockExam.STATUS_EXPIRED, finished_at=now
+                ).only("id", "user_id", "blueprint", "question_ids", "finished_at", "offline")
+            )  # 今回確定した行（他で確定済みの行は除かれる）
+            answers: Dict[int, List[Tuple[int, bool]]] = {e.id: [] for e in exams}
+            timed: List[Tuple[int, int, bool, Optional[int]]] = []
+            for exam_id, qid, ok, ms in MockAnswer.objects.filter(exam_id__in=answers).values_list(
+                "exam_id", "question_id", "is_correct", "elapsed_ms"
+            ):
+                answers[exam_id].append((qid, ok))
+                timed.append((exam_id, qid, ok, ms))
+            exam_of = {e.id: e for e in exams}
+            for exam in exams:
+                exam.score = sum(1 for _, ok in answers[exam.id] if ok)
+            MockExam.objects.bulk_update(exams, ["score"])
+            _write_attempts((exam_of[eid], qid, ok, ms) for eid, qid, ok, ms in timed)
+
+        for exam in exams:
+            mark_seen(exam.user_id, [qid for qid, _ in answers[exam.id]])
+        _record_standings(exams, answers)
+        pacing.record((qid, ok, ms) for _, qid, ok, ms in timed)
+        total += len(exams)
+        if len(candidates) < batch:
+            break
+    if total:
+        logger.info("期限切れの模試を確定しました: %d件", total)
+    return total
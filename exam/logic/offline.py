@@ -0,0 +1,134 @@
+# exam_preparation/exam/logic/offline.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import hashlib  # 正解キーのハッシュ
+import random  # 選択肢の表示順（模試×問題で固定）
+import secrets  # 正解キーのソルト
+from typing import Dict, Iterable, List, Optional, Tuple  # 型アノテーション用
+
+from django.conf import settings  # EXAM_SWEEP_GRACE
+from django.core import signing  # 模試IDの署名（改ざん・期限切れの検出）
+from django.db import transaction  # 解答の一括記録
+
+from exam.models import Choice, MockAnswer, MockExam, Question  # 正誤の判定元・解答台帳・模試
+from .bank import bank_version  # イメージの版数
+from .bank_image import ImageChoice, ImageQuestion, current_image  # 出題用の軽量表現・メモリマップ
+from .mock import EXAM_DURATION_SEC, finalize_exam  # 制限時間・確定処理
+
+TOKEN_SALT = "exam.offline"  # 署名の用途（他の署名値と取り違えないため）
+KEY_LENGTH = 16  # 正解キー（sha256 の16進）の先頭何文字を使うか
+
+
+def sync_window() -> int:
+    """
+    同期を受け付ける秒数（開始から）。制限時間＋掃除の猶予を過ぎると、
+    期限切れの掃除で無解答のまま確定されるため、それ以降の署名は受け付けない。
+    """
+    return EXAM_DURATION_SEC + getattr(settings, "EXAM_SWEEP_GRACE", 60)
+
+
+def answer_key(salt: str, question_id: int, choice_id: int) -> str:
+    """端末側の自己採点用のキー（ソルト・問題ID・選択肢IDのハッシュ）"""
+    return hashlib.sha256(f"{salt}:{question_id}:{choice_id}".encode()).hexdigest()[:KEY_LENGTH]
+
+
+def _questions(ids: List[int]) -> List[ImageQuestion]:
+    # 出題順の問題と選択肢。版数が一致するイメージがあればそこから、無ければ問題1回＋選択肢1回のクエリ
+    img = current_image(bank_version())
+    if img is not None:
+        found = [img.question(qid) for qid in ids]
+        if all(q is not None for q in found):
+            return found
+    rows = {
+        q.id: q
+        for q in Question.objects.filter(id__in=ids).select_related("chapter").prefetch_related("choices")
+    }
+    return [
+        ImageQuestion(
+            id=q.id,
+            chapter_num=q.chapter.num,
+            kind=q.kind,
+            stem=q.stem,
+            note=q.note,
+            choices=[ImageChoice(c.id, c.text, c.is_correct) for c in q.choices.all()],
+        )
+        for q in (rows.get(qid) for qid in ids)
+        if q is not None  # 出題後に削除された問題
+    ]
+
+
+def build_bundle(exam: MockExam) -> Dict:
+    """
+    オフライン受験用の出題パッケージ。選択肢は模試×問題で固定の順に並べ、正解は選択肢IDではなく
+    ソルト付きハッシュで渡す（画面やファイルに正解がそのまま出ないだけで、秘匿はしていない）。
+    ソルトも一緒に渡すので、選択肢は4つ程度しかなく、各選択肢の answer_key を計算すれば正解は割り出せる。
+    そのため模試は offline=True で作り、確定しても順位表・合格可能性には数えない（練習扱い）。
+    採点は同期時にサーバ側で選択肢の正誤から行い、端末の判定は使わない。
+    """
+    salt = secrets.token_hex(8)
+    questions = []
+    for q in _questions(exam.question_ids):
+        choices = list(q.choices)
+        random.Random(f"{exam.id}:{q.id}").shuffle(choices)
+        questions.append(
+            {
+                "id": q.id,
+                "ch": q.chapter_num,
+                "kind": q.kind,
+                "stem": q.stem,
+                "choices": [[c.id, c.text] for c in choices],
+                "keys": sorted(answer_key(salt, q.id, c.id) for c in choices if c.is_correct),
+            }
+        )
+    return {
+        "token": signing.dumps({"e": exam.id, "u": exam.user_id}, salt=TOKEN_SALT, compress=True),
+        "exam": exam.id,
+        "started_at": int(exam.started_at.timestamp()),
+        "duration_sec": EXAM_DURATION_SEC,
+        "sync_by": int(exam.started_at.timestamp()) + sync_window(),
+        "salt": salt,
+        "questions": questions,
+    }
+
+
+def read_token(token: str, user_id: int) -> Optional[int]:
+    """同期で送られた署名を検証して模試IDを返す。改ざん・期限切れ・他人の署名は None"""
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=sync_window())
+    except signing.BadSignature:  # SignatureExpired を含む
+        return None
+    if data.get("u") != user_id:
+        return None
+    return data.get("e")
+
+
+def sync_answers(exam: MockExam, answers: Iterable[Tuple[int, Optional[int], Optional[int]]]) -> Tuple[int, bool]:
+    """
+    端末でまとめた解答（問題ID, 選択肢ID または None, 解答ミリ秒 または None）を台帳に一括記録し、模試を確定する。
+    出題セット外の問題・その問題に属さない選択肢は無視し、正誤は選択肢の is_correct から決める。
+    同じ問題が既に記録済みなら最初の解答を残す（再送しても結果は変わらない）。
+    確定済みの模試には書き込まない。(受け付けた解答数, 今回確定したか) を返す。
+    """
+    allowed = set(exam.question_ids)
+    picked: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+    for qid, cid, ms in answers:
+        if qid in allowed and qid not in picked:
+            picked[qid] = (cid, ms)
+    choice_of = {
+        cid: (qid, ok)
+        for cid, qid, ok in Choice.objects.filter(question_id__in=list(picked)).values_list(
+            "id", "question_id", "is_correct"
+        )
+    }
+    rows = []
+    for qid, (cid, ms) in picked.items():
+        owner, ok = choice_of.get(cid, (None, False))
+        if owner != qid:
+            cid, ok = None, False  # 別の問題の選択肢・存在しない選択肢は未選択扱い
+        rows.append(MockAnswer(exam=exam, question_id=qid, choice_id=cid, is_correct=ok, elapsed_ms=ms))
+    with transaction.atomic():
+        if not MockExam.objects.select_for_update().filter(pk=exam.pk, status=MockExam.STATUS_OPEN).exists():
+            exam.refresh_from_db(fields=["status", "finished_at", "score"])
+            return 0, False  # 確定済み（再送・掃除済み）。台帳は変えない
+        MockAnswer.objects.bulk_create(rows, ignore_conflicts=True)  # uniq_mock_answer に当たった行は捨てる
+    return len(rows), finalize_exam(exam)
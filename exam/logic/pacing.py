@@ -0,0 +1,133 @@
+# exam_preparation/exam/logic/pacing.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import time  # 問題の表示時刻
+from collections import defaultdict  # 問題・章ごとの加算値
+from typing import Dict, Iterable, List, Optional, Tuple  # 型アノテーション用
+
+from django.core import signing  # 演習フォームに埋め込む表示時刻の署名
+from django.db import transaction  # 累計の加算・作り直し
+from django.db.models import Count, F, IntegerField, Q, Sum  # 累計の加算・解答履歴からの集計
+from django.db.models.functions import Cast  # 正誤(bool)を数値として合計
+
+from exam.models import Attempt, ChapterPacing, Question, QuestionPacing  # 解答履歴・累計の保存先
+from .quota import quota_plan  # 公式配点の出題数（1問あたりの持ち時間）
+
+Sample = Tuple[int, bool, Optional[int]]  # (問題ID, 正誤, 解答時間ms または None)
+SHOWN_SALT = "exam.pacing.shown"  # 表示時刻の署名の用途
+
+
+def _exam_duration_sec() -> int:
+    from .mock import EXAM_DURATION_SEC  # mock がこのモジュールを読み込むため、ここで参照する
+
+    return EXAM_DURATION_SEC
+
+
+def budget_ms() -> int:
+    """1問あたりの持ち時間（試験時間÷公式配点の出題数。75分40問なら112.5秒）"""
+    return _exam_duration_sec() * 1000 // max(quota_plan().total, 1)
+
+
+def clamp_ms(ms) -> Optional[int]:
+    """解答時間を 0〜試験時間 に収める（数値でなければ None）"""
+    try:
+        ms = int(ms)
+    except (TypeError, ValueError):
+        return None
+    return min(max(ms, 0), _exam_duration_sec() * 1000)
+
+
+def mark_shown(session, key: str, question_id: int) -> None:
+    """
+    問題を表示した時刻をセッションに置く（[問題ID, UNIX時刻] の1組だけ）。
+    セッションの書き込みを増やさないよう、出題状態を書き換えるとき（開始・「次へ」）に一緒に呼ぶ。
+    """
+    session[key] = [question_id, time.time()]
+
+
+def elapsed_since_shown(session, key: str, question_id: int) -> Optional[int]:
+    """mark_shown からの経過ミリ秒。別の問題の時刻しか無ければ None"""
+    shown = session.get(key)
+    if not shown or shown[0] != question_id:
+        return None
+    return clamp_ms((time.time() - shown[1]) * 1000)
+
+
+def shown_token(question_id: int) -> str:
+    """演習フォームに埋め込む表示時刻（問題IDと時刻の署名付き文字列。セッションに書かない）"""
+    return signing.dumps([question_id, round(time.time(), 3)], salt=SHOWN_SALT)
+
+
+def elapsed_from_token(token: Optional[str], question_id: int) -> Optional[int]:
+    """shown_token からの経過ミリ秒。改ざん・別の問題・形式違いは None"""
+    try:
+        qid, shown = signing.loads(token or "", salt=SHOWN_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    if qid != question_id:
+        return None
+    return clamp_ms((time.time() - shown) * 1000)
+
+
+def record(samples: Iterable[Sample]) -> int:
+    """
+    解答時間を問題別・章別の累計に加える（解答を記録した後に呼ぶ）。解答時間が None の解答は数えない。
+    行が無ければ先に作り（一意なので同時に作られても1行）、加算は F() の UPDATE で行う。加算した解答数を返す。
+    """
+    budget = budget_ms()
+    per_q: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])  # [解答数, 正解数, 合計ms, 超過数]
+    for qid, ok, ms in samples:
+        if ms is None:
+            continue
+        row = per_q[qid]
+        row[0] += 1
+        row[1] += int(ok)
+        row[2] += ms
+        row[3] += int(ms > budget)
+    if not per_q:
+        return 0
+
+    chapter_of = dict(Question.objects.filter(id__in=list(per_q)).values_list("id", "chapter_id"))
+    per_ch: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for qid, row in per_q.items():
+        if qid in chapter_of:
+            per_ch[chapter_of[qid]] = [a + b for a, b in zip(per_ch[chapter_of[qid]], row)]
+
+    with transaction.atomic():
+        _add(QuestionPacing, "question_id", {q: r for q, r in per_q.items() if q in chapter_of})
+        _add(ChapterPacing, "chapter_id", per_ch)
+    return sum(r[0] for r in per_q.values())
+
+
+def _add(model, key: str, rows: Dict[int, List[int]]) -> None:
+    model.objects.bulk_create([model(**{key: k}) for k in rows], ignore_conflicts=True)
+    for k, (n, c, ms, slow) in rows.items():
+        model.objects.filter(**{key: k}).update(
+            answered=F("answered") + n, correct=F("correct") + c, total_ms=F("total_ms") + ms, slow=F("slow") + slow
+        )
+
+
+def rebuild() -> Tuple[int, int]:
+    """解答履歴（elapsed_ms のある行）から累計を作り直す。(問題数, 章数) を返す"""
+    budget = budget_ms()
+    aggregates = dict(
+        answered=Count("id"),
+        correct=Sum(Cast("is_correct", IntegerField())),
+        total_ms=Sum("elapsed_ms"),
+        slow=Count("id", filter=Q(elapsed_ms__gt=budget)),
+    )
+    timed = Attempt.objects.filter(elapsed_ms__isnull=False).order_by()
+    questions = [
+        QuestionPacing(question_id=row.pop("question_id"), **row)
+        for row in timed.values("question_id").annotate(**aggregates)
+    ]
+    chapters = [
+        ChapterPacing(chapter_id=row.pop("question__chapter_id"), **row)
+        for row in timed.values("question__chapter_id").annotate(**aggregates)
+    ]
+    with transaction.atomic():
+        QuestionPacing.objects.all().delete()
+        ChapterPacing.objects.all().delete()
+        QuestionPacing.objects.bulk_create(questions, batch_size=2000)
+        ChapterPacing.objects.bulk_create(chapters)
+    return len(questions), len(chapters)
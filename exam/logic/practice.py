@@ -0,0 +1,117 @@
+# exam_preparation/exam/logic/practice.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import random  # 選択肢の表示順（ユーザー×問題で固定）
+from bisect import bisect_right  # イメージ上の章の問題IDからカーソル位置を探す
+from typing import List, Optional, Tuple  # 型アノテーション用
+
+from django.core.cache import cache  # 取得済みページの保存先
+from django.db import transaction  # 解答の記録
+from django.db.models import F  # 進捗の加算
+
+from exam.models import Attempt, PracticeProgress, Question  # 解答履歴・進捗・問題
+from . import pacing  # 解答時間の累計
+from .bank import bank_version  # ページキャッシュの版数
+from .bank_image import ImageChoice, ImageQuestion, current_image  # 出題用の軽量表現・メモリマップ
+from .readiness import record_attempts  # 合格可能性の章別累計
+from .seen import mark_seen  # 解答済みビット列の更新
+
+PAGE_SIZE = 20  # 1回に取得する問題数（選択肢もまとめて取得）
+PAGE_TTL = 3600  # 取得済みページのキャッシュ有効秒数
+
+
+def _page_key(user_id: int, chapter: int) -> str:
+    return f"exam:practice:{user_id}:{chapter}"
+
+
+def fetch_page(chapter: int, after_id: int, size: int = PAGE_SIZE) -> List[ImageQuestion]:
+    """
+    章の出題対象のうち id > after_id の先頭 size 問を ID 順に返す（キーセット方式。OFFSET を使わない）。
+    版数が一致するイメージがあればそこから（DBアクセスなし）、無ければ問題1回＋選択肢1回のクエリで取得する。
+    """
+    img = current_image(bank_version())
+    if img is not None:
+        ids = img.chapter_ids(chapter)
+        i = bisect_right(ids, after_id)
+        return [q for q in (img.question(qid) for qid in ids[i:i + size]) if q is not None]
+
+    rows = (
+        Question.objects.filter(chapter__num=chapter, is_excluded=False, id__gt=after_id)
+        .order_by("id")
+        .prefetch_related("choices")[:size]
+    )  # (chapter, is_excluded) インデックス＋主キー順
+    return [
+        ImageQuestion(
+            id=q.id,
+            chapter_num=chapter,
+            kind=q.kind,
+            stem=q.stem,
+            note=q.note,
+            choices=[ImageChoice(c.id, c.text, c.is_correct) for c in q.choices.all()],
+        )
+        for q in rows
+    ]
+
+
+def next_question(user_id: int, chapter: int, after_id: int) -> Optional[ImageQuestion]:
+    """
+    カーソルの次の問題。ユーザーごとに取得済みのページをキャッシュし、ページを使い切ったら次のページを取得する。
+    """
+    key = _page_key(user_id, chapter)
+    version = bank_version()
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        page = cached[1]
+        for q in page:
+            if q.id > after_id:
+                return q
+        if len(page) < PAGE_SIZE:
+            return None  # 最終ページを解き終えた
+    page = fetch_page(chapter, after_id)
+    cache.set(key, (version, page), PAGE_TTL)
+    return page[0] if page else None
+
+
+def ordered_choices(user_id: int, q: ImageQuestion) -> List[ImageChoice]:
+    """選択肢の表示順。ユーザー×問題で固定（セッションに順序を保存しない）"""
+    choices = list(q.choices)
+    random.Random(f"{user_id}:{q.id}").shuffle(choices)
+    return choices
+
+
+def progress_for(user, chapter) -> PracticeProgress:
+    progress, _ = PracticeProgress.objects.get_or_create(user=user, chapter=chapter)
+    return progress
+
+
+def record_practice(
+    progress: PracticeProgress, q: ImageQuestion, choice, elapsed_ms: Optional[int] = None
+) -> Tuple[bool, bool]:
+    """
+    演習の解答を記録し、カーソルを進める。(正誤, 今回記録したか) を返す。elapsed_ms は表示から解答までの時間。
+    カーソルが既に先へ進んでいる（二重送信・別タブ）ときは記録しない。
+    """
+    ok = bool(choice and choice.is_correct)
+    with transaction.atomic():
+        won = PracticeProgress.objects.filter(pk=progress.pk, last_id__lt=q.id).update(
+            last_id=q.id, answered=F("answered") + 1, correct=F("correct") + int(ok)
+        )
+        if not won:
+            return ok, False
+        Attempt.objects.create(
+            user_id=progress.user_id,
+            question_id=q.id,
+            is_correct=ok,
+            mode=Attempt.MODE_PRACTICE,
+            elapsed_ms=elapsed_ms,
+        )
+    mark_seen(progress.user_id, [q.id])
+    record_attempts(progress.user_id, [(q.chapter_num, ok)])
+    pacing.record([(q.id, ok, elapsed_ms)])
+    return ok, True
+
+
+def restart(progress: PracticeProgress) -> None:
+    """章の最初から解き直す（カーソルと周回の集計を戻す）"""
+    PracticeProgress.objects.filter(pk=progress.pk).update(last_id=0, answered=0, correct=0)
+    cache.delete(_page_key(progress.user_id, progress.chapter.num))
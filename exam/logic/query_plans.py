@@ -0,0 +1,107 @@
+# exam_preparation/exam/logic/query_plans.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import re  # 実行計画の行の判定用
+from datetime import datetime, timezone as dt_timezone  # 順位の数え上げの条件値
+from typing import Callable, Dict, List, Tuple  # 型アノテーション用
+
+from django.db import connection  # EXPLAIN QUERY PLAN の実行用
+from django.db.models import Count, Q, QuerySet  # 章別在庫の集計クエリ
+
+from exam.models import Attempt, Chapter, Choice, LeaderboardChapter, LeaderboardEntry, MockAnswer, Question  # 対象のモデル
+
+_AT = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)  # 順位の数え上げに使う達成日時（値は何でもよい）
+
+# 画面・選出で実際に発行しているクエリ（ビュー・logic と同じ形）、全表走査を許さないテーブル、
+# 並べ替えをインデックスで済ませる必要があるか（一時B-treeを許さないか）
+HOT_QUERIES: Dict[str, Tuple[Callable[[], QuerySet], Tuple[str, ...], bool]] = {
+    # selector / bank.eligible_ids：章ごとの出題対象ID
+    "selector_chapter_ids": (
+        lambda: Question.objects.filter(chapter__num=3, is_excluded=False).values_list("id", flat=True),
+        ("exam_question",),
+        False,
+    ),
+    # bank.chapter_coverage：章ごとの出題対象在庫（章は19行なので走査してよい）
+    "chapter_coverage": (
+        lambda: Chapter.objects.annotate(
+            n=Count("question", filter=Q(question__is_excluded=False))
+        ).order_by("num").values("num", "title", "official_quota", "n"),
+        ("exam_question",),
+        False,  # 章の並べ替えは19行なので一時ソートでよい
+    ),
+    # mock_session：受験中の模試の正解数（解答台帳の一意インデックスで絞り込む）
+    "mock_exam_score": (
+        lambda: MockAnswer.objects.filter(exam_id=1, is_correct=True).values("id"),
+        ("exam_mockanswer",),
+        False,
+    ),
+    # ユーザー×モードの直近履歴（(user, mode, answered_at) インデックスで並べ替えまで済ませる）
+    "recent_mock_attempts": (
+        lambda: Attempt.objects.filter(user_id=1, mode=Attempt.MODE_MOCK)
+        .order_by("-answered_at")
+        .values_list("question__chapter__num", "is_correct")[:40],
+        ("exam_attempt", "exam_question", "exam_chapter"),
+        True,
+    ),
+    # seen._from_attempts：ユーザーの解答済み問題ID（UserSeen の行が無いときの作成元）
+    "seen_question_ids": (
+        lambda: Attempt.objects.filter(user_id=1).values_list("question_id", flat=True).distinct(),
+        ("exam_attempt",),
+        True,  # DISTINCT もインデックス順で処理できること
+    ),
+    # leaderboard.page：最高点の順位表の1ページ（lb_score_order の順に読む）
+    "leaderboard_score_page": (
+        lambda: LeaderboardEntry.objects.filter(cohort_id=1, best_at__isnull=False)
+        .order_by("-best_score", "best_at", "user_id")
+        .values_list("user_id", "best_score")[:50],
+        ("exam_leaderboardentry",),
+        True,
+    ),
+    # leaderboard.page：章の順位表の1ページ（lb_chapter_order の順に読む）
+    "leaderboard_chapter_page": (
+        lambda: LeaderboardChapter.objects.filter(cohort_id=1, chapter_num=3, answered__gt=0)
+        .order_by("-rate", "-answered", "correct", "user_id")
+        .values_list("user_id", "rate")[:50],
+        ("exam_leaderboardchapter",),
+        True,
+    ),
+    # leaderboard.rank：自分より上位の人数（並び順のインデックス上で数える）
+    "leaderboard_score_rank": (
+        lambda: LeaderboardEntry.objects.filter(cohort_id=1, best_at__isnull=False)
+        .filter(Q(best_score__gt=30) | Q(best_score=30, best_at__lt=_AT) | Q(best_score=30, best_at=_AT, user_id__lt=1))
+        .values("id"),
+        ("exam_leaderboardentry",),
+        False,
+    ),
+    # load_question：1問分の選択肢
+    "question_choices": (
+        lambda: Choice.objects.filter(question_id=1),
+        ("exam_choice",),
+        False,
+    ),
+}
+
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?! USING (?:COVERING )?INDEX)")  # インデックスを使わない全表走査
+TEMP_SORT_RE = re.compile(r"USE TEMP B-TREE FOR (?:ORDER BY|DISTINCT)")  # インデックスで並べ替えできていない
+
+
+def explain(qs: QuerySet) -> List[str]:
+    """クエリセットのSQLに EXPLAIN QUERY PLAN を付けて実行し、detail 列を返す（SQLite専用）"""
+    sql, params = qs.query.sql_with_params()
+    with connection.cursor() as cur:
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cur.fetchall()]
+
+
+def check_plan(name: str) -> Tuple[List[str], List[str]]:
+    """HOT_QUERIES の1件の (実行計画, 問題点) を返す。問題点が空なら退化していない"""
+    build, guarded, index_sorted = HOT_QUERIES[name]
+    plan = explain(build())
+    problems = []
+    for line in plan:
+        m = FULL_SCAN_RE.match(line)
+        if m and m.group(1) in guarded:
+            problems.append(f"全表走査: {line}")
+        if index_sorted and TEMP_SORT_RE.search(line):
+            problems.append(f"一時ソート: {line}")
+    return plan, problems
@@ -0,0 +1,98 @@
+# exam_preparation/exam/logic/quota.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+from dataclasses import dataclass, field  # 出題設計の値オブジェクト
+from typing import Dict, List, Optional  # 型アノテーション用
+
+from django.core.cache import cache  # 版数単位の共有キャッシュ
+
+from exam.logic.bank import bank_version  # 問題バンク版数（章・設計の変更で進む）
+from exam.models import Blueprint, Chapter  # 設計・章モデル
+
+# 各章における公式出題数（合計40問になる設計）。
+# DBに章が登録されるまでの初期値で、登録後は Chapter.official_quota を正とする（0003 マイグレーションで反映）。
+CHAPTER_QUOTA = {
+    1: 1,   # 第1章からは1問
+    2: 2,   # 第2章からは2問
+    3: 7,   # 第3章からは7問（最多）
+    4: 3,
+    5: 2,
+    6: 4,
+    7: 0,   # 第7章は出題しない
+    8: 2,
+    9: 5,
+    10: 2,
+    11: 2,
+    12: 0,  # 第12章は出題しない
+    13: 2,
+    14: 2,
+    15: 0,  # 第15章は出題しない
+    16: 3,
+    17: 2,
+    18: 1,
+    19: 0   # 第19章は出題しない
+}
+
+DEFAULT_BLUEPRINT = "official"  # 既定の設計名（公式配点）
+
+
+@dataclass(frozen=True)
+class QuotaPlan:
+    """章番号→出題数の組。選出・不足検知・ダッシュボードはすべてこれを参照する"""
+
+    name: str
+    title: str
+    quotas: Dict[int, int] = field(default_factory=dict)  # 章番号順
+
+    @property
+    def total(self) -> int:
+        # 合計出題数（公式配点なら40問）
+        return sum(self.quotas.values())
+
+    def get(self, ch: int) -> int:
+        return self.quotas.get(ch, 0)
+
+
+_memo: Dict[int, Dict[str, QuotaPlan]] = {}  # 版数→全設計（プロセス内のメモ）
+
+
+def _load_plans() -> Dict[str, QuotaPlan]:
+    # 既定の設計は Chapter.official_quota、DBに無い章は CHAPTER_QUOTA で補う
+    official = dict(CHAPTER_QUOTA)
+    official.update(Chapter.objects.values_list("num", "official_quota"))
+    plans = {
+        DEFAULT_BLUEPRINT: QuotaPlan(DEFAULT_BLUEPRINT, "公式配点", dict(sorted(official.items())))
+    }
+    for bp in Blueprint.objects.prefetch_related("quotas__chapter"):
+        quotas = {q.chapter.num: q.quota for q in bp.quotas.all()}
+        plans[bp.name] = QuotaPlan(bp.name, bp.title, dict(sorted(quotas.items())))
+    return plans
+
+
+def all_plans() -> Dict[str, QuotaPlan]:
+    """
+    全設計を返す。問題バンク版数ごとに一度だけDBから読み込み、以後はプロセス内メモ→共有キャッシュの順に参照する。
+    """
+    version = bank_version()
+    plans = _memo.get(version)
+    if plans is None:
+        key = f"exam:quota_plans:{version}"
+        plans = cache.get(key)
+        if plans is None:
+            plans = _load_plans()
+            cache.set(key, plans, None)  # 版数がキーに入っているので期限なしでよい
+        _memo.clear()  # 古い版数のメモは捨てる
+        _memo[version] = plans
+    return plans
+
+
+def quota_plan(name: Optional[str] = None) -> QuotaPlan:
+    """名前で設計を返す。未指定・不明な名前は既定の設計"""
+    plans = all_plans()
+    return plans.get(name or DEFAULT_BLUEPRINT) or plans[DEFAULT_BLUEPRINT]
+
+
+def blueprint_choices() -> List[QuotaPlan]:
+    """画面で選べる設計の一覧（既定の設計が先頭）"""
+    plans = all_plans()
+    return [plans[DEFAULT_BLUEPRINT]] + [p for n, p in plans.items() if n != DEFAULT_BLUEPRINT]
@@ -0,0 +1,151 @@
+# exam_preparation/exam/logic/readiness.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import math  # 正規分布の累積分布関数（erfc）
+from dataclasses import dataclass, field  # 推定結果の型
+from typing import Dict, Iterable, List, Tuple  # 型アノテーション用
+
+from django.db import transaction  # 累計の差分更新
+from django.db.models import Count, IntegerField, Sum  # 解答履歴からの再構築
+from django.db.models.functions import Cast  # 正誤(bool)を数値として合計
+
+from exam.models import Attempt, Question, UserReadiness  # 解答履歴・問題の章・章別累計
+from .quota import quota_plan  # 章ごとの出題数（重み）
+
+PASS_RATIO = 0.7  # 合格ライン（40問中28問）
+PRIOR_A = 2.0  # 章の習熟度の事前分布 Beta(a, b)。未解答の章は 50% とみなし、数問で実績に寄る
+PRIOR_B = 2.0
+
+Stats = Dict[str, List[int]]  # {"章番号": [正解数, 解答数]}
+
+
+def pass_score(total: int) -> int:
+    """合格に必要な正解数（40問なら28問）"""
+    return math.ceil(total * PASS_RATIO - 1e-9)
+
+
+@dataclass
+class Readiness:
+    """合格可能性の推定結果"""
+
+    probability: float  # 合格点以上を取る確率（0〜1）
+    expected: float  # 予想得点
+    total: int  # 出題数
+    pass_score: int  # 合格点
+    answered: int  # 推定に使った解答数
+    weak: List[Tuple[int, float]] = field(default_factory=list)  # 失点の大きい章（章番号, 習熟度）
+
+    @property
+    def percent(self) -> int:
+        return round(self.probability * 100)
+
+
+def estimate(stats: Stats, quotas: Dict[int, int]) -> Readiness:
+    """
+    章ごとの習熟度を Beta 事後分布の平均とし、章の得点を Beta-二項分布とみなして合計点の分布を正規近似する。
+    合格確率は P(合計 ≥ 合格点)（連続性補正あり）。
+    """
+    total = sum(quotas.values())
+    need = pass_score(total)
+    mean = var = 0.0
+    answered = 0
+    loss = []
+    for ch, q in quotas.items():
+        if q <= 0:
+            continue
+        c, n = stats.get(str(ch), (0, 0))
+        answered += n
+        a, b = c + PRIOR_A, n - c + PRIOR_B
+        p = a / (a + b)
+        mean += q * p
+        var += q * p * (1 - p) * (a + b + q) / (a + b + 1)
+        loss.append((q * (1 - p), ch, p))
+    loss.sort(reverse=True)
+    return Readiness(
+        probability=_upper_tail(need, mean, var),
+        expected=mean,
+        total=total,
+        pass_score=need,
+        answered=answered,
+        weak=[(ch, p) for _, ch, p in loss[:3]],
+    )
+
+
+def _upper_tail(need: int, mean: float, var: float) -> float:
+    # 正規近似での P(X ≥ need)
+    if var <= 0:
+        return 1.0 if mean >= need else 0.0
+    z = (need - 0.5 - mean) / math.sqrt(var)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def stats_from_attempts(user_ids: Iterable[int] | None = None) -> Dict[int, Stats]:
+    """解答履歴からユーザーごとの章別累計を集計する（user_ids 省略時は全ユーザー。オフライン受験の模試は除く）"""
+    qs = Attempt.objects.exclude(mode=Attempt.MODE_OFFLINE)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=list(user_ids))
+    out: Dict[int, Stats] = {}
+    for uid, ch, c, n in (
+        qs.values_list("user_id", "question__chapter__num")
+        .annotate(c=Sum(Cast("is_correct", IntegerField())), n=Count("id"))
+        .values_list("user_id", "question__chapter__num", "c", "n")
+        .order_by()
+        .iterator(chunk_size=5000)
+    ):
+        out.setdefault(uid, {})[str(ch)] = [c, n]
+    return out
+
+
+def user_stats(user_id: int) -> Stats:
+    """
+    ユーザーの章別累計（UserReadiness の主キー検索1回）。行が無ければ空（事前分布だけの推定になる）。
+    GET から書き込まないよう、ここでは行を作らない。行は record_attempts と recompute_readiness が作る。
+    """
+    stats = UserReadiness.objects.filter(user_id=user_id).values_list("chapter_stats", flat=True).first()
+    return stats if stats is not None else {}
+
+
+def readiness(user_id: int) -> Readiness:
+    """ダッシュボード用の合格可能性（公式配点で推定）"""
+    return estimate(user_stats(user_id), quota_plan().quotas)
+
+
+def _save(user_id: int, stats: Stats) -> None:
+    r = estimate(stats, quota_plan().quotas)
+    UserReadiness.objects.update_or_create(
+        user_id=user_id,
+        defaults={"chapter_stats": stats, "probability": r.probability, "expected": r.expected},
+    )
+
+
+def record_exams(exams, answers: Dict[int, List[Tuple[int, bool]]]) -> None:
+    """
+    確定した模試の解答を章別累計に差分で加える（finalize_exam / sweep_expired から呼ぶ）。
+    answers は模試ID→[(問題ID, 正誤)]。
+    """
+    qids = {qid for e in exams for qid, _ in answers[e.id]}
+    chapter_of = dict(Question.objects.filter(id__in=qids).values_list("id", "chapter__num"))
+    by_user: Dict[int, List[Tuple[int, bool]]] = {}
+    for e in exams:
+        by_user.setdefault(e.user_id, []).extend(
+            (chapter_of[qid], ok) for qid, ok in answers[e.id] if qid in chapter_of
+        )
+    for user_id, pairs in by_user.items():
+        record_attempts(user_id, pairs)
+
+
+def record_attempts(user_id: int, pairs: Iterable[Tuple[int, bool]]) -> None:
+    """
+    新しい解答（章番号, 正誤）を章別累計に加え、推定値を更新する。
+    累計が未作成のユーザーは、解答履歴（書き込み済みの今回分を含む）から作る。
+    """
+    with transaction.atomic():
+        row = UserReadiness.objects.select_for_update().filter(user_id=user_id).first()
+        if row is None:
+            stats = stats_from_attempts([user_id]).get(user_id, {})
+        else:
+            stats = row.chapter_stats
+            for ch, ok in pairs:
+                c, n = stats.get(str(ch), (0, 0))
+                stats[str(ch)] = [c + int(ok), n + 1]
+        _save(user_id, stats)  # updated_at が進み、ダッシュボードの ETag が変わる
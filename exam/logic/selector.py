@@ -2,50 +2,54 @@
 
 from __future__ import annotations  # Pythonの将来のバージョンとの互換性のための記述（主に型アノテーション向け）
 import random  # リストをシャッフルするために使用
-from typing import List  # 戻り値の型注釈（List[int]など）に使う
-from exam.models import Question  # DBモデルのQuestionをインポート
-
-# 各章における公式出題数（合計40問になる設計）
-CHAPTER_QUOTA = {
-    1: 1,   # 第1章からは1問
-    2: 2,   # 第2章からは2問
-    3: 7,   # 第3章からは7問（最多）
-    4: 3,
-    5: 2,
-    6: 4,
-    7: 0,   # 第7章は出題しない
-    8: 2,
-    9: 5,
-    10: 2,
-    11: 2,
-    12: 0,  # 第12章は出題しない
-    13: 2,
-    14: 2,
-    15: 0,  # 第15章は出題しない
-    16: 3,
-    17: 2,
-    18: 1,
-    19: 0   # 第19章は出題しない
-}
-
-def build_mock_set_ids() -> List[int]:
+from typing import List, Optional, Sequence  # 戻り値の型注釈（List[int]など）に使う
+from exam.logic.bank import eligible_ids  # 章別の出題対象ID一覧（イメージまたはキャッシュ）
+from exam.logic.quota import CHAPTER_QUOTA, quota_plan  # noqa: F401  CHAPTER_QUOTA は後方互換のため再公開
+from exam.logic.seen import SeenSet, seen_set  # ユーザーごとの解答済みビット列
+
+PROBE_FACTOR = 8  # 未出題の問題を探すとき、出題数の何倍まで候補を調べるか
+PROBE_MIN = 64  # 調べる候補数の下限
+
+
+def _pick_novel(pool: Sequence[int], n: int, seen: SeenSet) -> List[int]:
     """
-    公式出題数（CHAPTER_QUOTA）に基づき、ランダムに問題IDを選出してリストで返す。
+    pool からn件を選ぶ。未出題の問題を優先し、足りなければ解答済みの問題で埋める。
+    候補は出題数に比例した件数だけランダムに調べるため、章の問題数によらず O(出題数)。
+    """
+    k = min(len(pool), max(n * PROBE_FACTOR, PROBE_MIN))
+    fresh: List[int] = []
+    stale: List[int] = []
+    for i in random.sample(range(len(pool)), k):  # ランダム順に候補を調べる
+        qid = pool[i]
+        if qid in seen:
+            stale.append(qid)
+        else:
+            fresh.append(qid)
+            if len(fresh) >= n:
+                break
+    return (fresh + stale)[:n]
+
+
+def build_mock_set_ids(blueprint: Optional[str] = None, user_id: Optional[int] = None) -> List[int]:
+    """
+    出題設計（既定は公式配点。quota_plan 参照）に基づき、ランダムに問題IDを選出してリストで返す。
     各章の問題が不足している場合は、取得できる分だけ採用し、不足章はスキップする。
+    user_id を渡すと、そのユーザーがまだ解いていない問題を優先して選ぶ。
     """
     picked_ids: List[int] = []  # 選ばれた問題IDを格納するリストを初期化
+    seen = seen_set(user_id) if user_id is not None else None  # 解答済みビット列（UserSeen の1行）
 
-    for ch, n in CHAPTER_QUOTA.items():  # 各章番号と必要な問題数nをループ
+    for ch, n in quota_plan(blueprint).quotas.items():  # 各章番号と必要な問題数nをループ
         if n == 0:  # 出題数0の章はスキップ
             continue
 
-        # 対象章(ch)で「除外されていない」問題（is_excluded=False）をランダム順でn件取得
-        qs = Question.objects.filter(
-            chapter__num=ch, is_excluded=False  # 章番号が一致 & 除外されていない問題
-        ).order_by("?")[:n]  # ランダムに並べて、最大n件を取得
-
-        # 取得した問題のIDだけを抽出し、リストに追加
-        picked_ids.extend(qs.values_list("id", flat=True))
+        # 対象章(ch)で「除外されていない」問題（is_excluded=False）のID一覧から、ランダムに最大n件を取得
+        # （ORDER BY RANDOM() で章全体を並べ替えず、手元のID一覧から抽出する）
+        pool = eligible_ids(ch)
+        if seen is not None:
+            picked_ids.extend(_pick_novel(pool, n, seen))
+        else:
+            picked_ids.extend(random.sample(pool, min(n, len(pool))))
 
     # 全ての章から集めた問題IDリストをシャッフルして順番をランダム化（章横断的なランダム性）
     random.shuffle(picked_ids)
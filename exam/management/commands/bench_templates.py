@@ -0,0 +1,113 @@
+# exam_preparation/exam/management/commands/bench_templates.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import time  # 処理時間の計測用
+
+from django.contrib.auth.models import AnonymousUser, User  # ベーステンプレートが参照するユーザー
+from django.core.cache import cache  # フラグメントキャッシュ（計測中は専用のlocmemに差し替わる）
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+from django.db import connection  # 発行クエリ数の計測用
+from django.db.models import Count, Q  # 導入前の章別在庫の集計
+from django.template.loader import render_to_string  # テンプレート描画
+from django.test.client import RequestFactory  # ダミーリクエストの生成
+from django.test.utils import CaptureQueriesContext, override_settings  # 発行クエリの捕捉・キャッシュ設定の差し替え
+
+from exam.logic.bank import bank_version, chapter_coverage  # 版数・章別在庫
+from exam.logic.quota import quota_plan  # 出題設計
+from exam.models import Chapter, Question  # 描画に使う章・問題
+
+# 計測専用のキャッシュ。cold の計測で毎回消去するため、設定済みのキャッシュ（共有サーバーの場合もある）には触れない
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-templates",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "session.html / dashboard.html の描画時間を、フラグメントキャッシュ導入前のテンプレート（before）、"
+        "キャッシュなし（cold）、キャッシュあり（warm）で比較する"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--iterations", type=int, default=200, help="各条件での描画回数")
+
+    def handle(self, *args, **opts):
+        q = Question.objects.filter(is_excluded=False).prefetch_related("choices").first()
+        if q is None:
+            raise CommandError("出題対象の問題がありません。先に問題を登録してください。")
+
+        request = RequestFactory().get("/")
+        request.user = User.objects.filter(is_staff=True).first() or AnonymousUser()
+
+        choices = list(q.choices.all())
+        version = bank_version()
+        plan = quota_plan()
+        coverage = [dict(ch, quota=plan.get(ch["num"])) for ch in chapter_coverage()]
+        session_ctx = {
+            "question": q,
+            "judged": True,  # 正解・解説まで表示される重いケース
+            "was_correct": True,
+            "chosen_id": None,
+            "progress": {"now": 1, "total": 40, "score": 0, "percent": 0},
+            "remaining_sec": 4500,
+            "duration_sec": 4500,
+            "choices": choices,
+            "answer_key": [c for c in choices if c.is_correct],
+            "bank_version": version,
+        }
+        dashboard_ctx = {
+            "q_count": sum(ch["n"] for ch in coverage),
+            "ch_coverage": coverage,
+            "total_quota": plan.total,
+            "total_stock_for_quota": 0,
+            "deficits": [],
+            "has_deficit": False,
+            "bank_version": version,
+            "blueprints": [plan],
+        }
+
+        # 導入前のビューが渡していた形の文脈。問題は prefetch なしで取得していたため、
+        # 正解欄の question.choices.all が描画のたびにクエリを発行する
+        before_session_ctx = dict(session_ctx, question=Question.objects.get(pk=q.pk))
+        before_coverage = list(
+            Chapter.objects.annotate(n=Count("question", filter=Q(question__is_excluded=False))).order_by("num")
+        )
+        before_dashboard_ctx = dict(
+            dashboard_ctx,
+            ch_coverage=before_coverage,
+            total_quota=sum(ch.official_quota for ch in before_coverage),
+        )
+
+        n = opts["iterations"]
+        cases = (
+            ("exam/session.html", "exam/bench/session_before.html", session_ctx, before_session_ctx),
+            ("exam/dashboard.html", "exam/bench/dashboard_before.html", dashboard_ctx, before_dashboard_ctx),
+        )
+        with override_settings(CACHES=BENCH_CACHES):
+            for name, before_name, ctx, before_ctx in cases:
+                before = self._bench(before_name, before_ctx, request, n, clear=True)
+                cold = self._bench(name, ctx, request, n, clear=True)
+                warm = self._bench(name, ctx, request, n, clear=False)
+                self.stdout.write(
+                    f"{name}: before {before[0]:.3f}ms ({before[1]} queries) / "
+                    f"cold {cold[0]:.3f}ms ({cold[1]} queries) / "
+                    f"warm {warm[0]:.3f}ms ({warm[1]} queries) / x{before[0] / max(warm[0], 1e-9):.1f} vs before"
+                )
+
+    def _bench(self, name, ctx, request, n, clear):
+        # 1回あたりの平均描画時間(ms)と、最後の1回で発行されたクエリ数を返す
+        render_to_string(name, ctx, request)  # テンプレートのコンパイルを計測から除外
+        total = 0.0
+        queries = 0
+        for _ in range(n):
+            if clear:
+                cache.clear()  # cold: 毎回フラグメントを作り直させる（計測専用のキャッシュのみ）
+            with CaptureQueriesContext(connection) as captured:
+                t0 = time.perf_counter()
+                render_to_string(name, ctx, request)
+                total += time.perf_counter() - t0
+            queries = len(captured)
+        return total * 1000 / n, queries
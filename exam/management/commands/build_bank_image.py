@@ -0,0 +1,28 @@
+# exam_preparation/exam/management/commands/build_bank_image.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import time  # 処理時間の計測用
+
+from django.core.management.base import BaseCommand  # 管理コマンドの基底クラス
+
+from exam.logic.bank import bank_version  # 現在の問題バンク版数
+from exam.logic.bank_image import build_image, prune_images  # イメージの書き出し・旧イメージの削除
+
+
+class Command(BaseCommand):
+    help = (
+        "出題対象の問題バンクをメモリマップ用のバイナリイメージに書き出し、全ワーカーに公開する。"
+        "一度実行すれば、以後は問題の追加・編集（版数の更新）のたびに自動で作り直される"
+        "（EXAM_BANK_IMAGE_AUTO_REBUILD=False なら、編集後にこのコマンドを再実行する）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=2, help="残しておく旧イメージの数（現行を含む）")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        path = build_image(bank_version())
+        elapsed = time.perf_counter() - t0
+        self.stdout.write(f"{path} を作成しました（{path.stat().st_size:,} bytes, {elapsed:.2f}秒）")
+
+        prune_images(opts["keep"])  # マップ中のワーカーは削除後もそのまま読み続けられる
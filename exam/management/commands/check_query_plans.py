@@ -0,0 +1,37 @@
+# exam_preparation/exam/management/commands/check_query_plans.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+from typing import List  # 型アノテーション用
+
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+from django.db import connection  # 接続先のDB種別
+
+from exam.logic.query_plans import HOT_QUERIES, check_plan  # 対象のクエリと判定（exam.tests と共通）
+
+
+class Command(BaseCommand):
+    help = (
+        "ホットなクエリの EXPLAIN QUERY PLAN を確認し、全表走査や一時B-treeでの並べ替えに退化していたら失敗する"
+        "（SQLite用。同じ判定は exam.tests.QueryPlanTests でも行う。本番DBの計画確認に使う）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plan", action="store_true", help="すべての実行計画を表示する")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            self.stdout.write(f"{connection.vendor} は未対応のためスキップします（SQLite専用）")
+            return
+
+        failures: List[str] = []
+        for name in HOT_QUERIES:
+            plan, problems = check_plan(name)
+            status = "NG" if problems else "ok"
+            self.stdout.write(f"[{status}] {name}")
+            if problems or opts["verbose_plan"]:
+                for line in plan:
+                    self.stdout.write(f"      {line}")
+            failures += [f"{name}: {p}" for p in problems]
+
+        if failures:
+            raise CommandError("実行計画が退化しています:\n" + "\n".join(failures))
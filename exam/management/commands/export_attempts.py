@@ -0,0 +1,51 @@
+# exam_preparation/exam/management/commands/export_attempts.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import sys  # 標準出力への書き出し用
+
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+
+from exam.logic.export import (  # エクスポート共通ロジック（ビューと共用）
+    DEFAULT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    export_queryset,
+    iter_export,
+)
+
+
+class Command(BaseCommand):
+    help = "解答履歴（Attempt）を CSV または列指向NDJSON でストリーミング出力する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="ユーザー名で絞り込み")
+        parser.add_argument("--from", dest="since", help="開始日（YYYY-MM-DD またはISO日時）")
+        parser.add_argument("--to", dest="until", help="終了日（日付のみならその日を含む）")
+        parser.add_argument("--mode", help="モードで絞り込み（mock / rehab / srs）")
+        parser.add_argument("--chapter", type=int, help="章番号で絞り込み")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="出力形式")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="DBから一度に取り出す行数")
+        parser.add_argument("-o", "--output", help="出力ファイル（省略時は標準出力）")
+
+    def handle(self, *args, **opts):
+        try:
+            qs = export_queryset(
+                user=opts["user"],
+                since=opts["since"],
+                until=opts["until"],
+                mode=opts["mode"],
+                chapter=opts["chapter"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        out = open(opts["output"], "w", encoding="utf-8", newline="") if opts["output"] else sys.stdout
+        try:
+            n = 0
+            for line in iter_export(qs, opts["format"], opts["chunk_size"]):
+                out.write(line)
+                n += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if opts["output"]:
+            self.stderr.write(f"{opts['output']} に {n}行を書き出しました")
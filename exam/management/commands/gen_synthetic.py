@@ -0,0 +1,162 @@
+# exam_preparation/exam/management/commands/gen_synthetic.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import random  # 再現可能な乱数（シード指定）
+import time  # 処理時間の計測用
+from datetime import timedelta  # 解答日時の分散用
+
+from django.contrib.auth.hashers import make_password  # 全ユーザー共通のダミーパスワード
+from django.contrib.auth.models import User  # 受験者
+from django.core.management.base import BaseCommand  # 管理コマンドの基底クラス
+from django.db import connection, transaction  # 生SQLでの一括INSERT・トランザクション
+from django.utils import timezone  # 基準日時
+
+from exam.logic.bank import bump_bank_version  # bulk_create はシグナルを出さないので手動で版数更新
+from exam.logic.quota import CHAPTER_QUOTA  # 章の一覧と出題数（問題の配分に使用）
+from exam.models import Attempt, Chapter, Choice, Question  # 生成対象のモデル
+from exam.signals import bank_signals_muted  # 削除中は1行ごとの版数更新を止める
+
+STEM_PREFIX = "[synthetic]"  # 生成した問題の目印（--purge で削除する際に使う）
+USER_PREFIX = "synth_"  # 生成したユーザー名の接頭辞
+
+
+class Command(BaseCommand):
+    help = (
+        "スケーリング検証用の合成データ（問題・選択肢・ユーザー・解答履歴）を一括生成する。"
+        "同じ --seed なら同じデータになる"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100_000, help="問題数（19章に配分）")
+        parser.add_argument("--choices", type=int, default=4, help="1問あたりの選択肢数")
+        parser.add_argument("--users", type=int, default=50_000, help="ユーザー数")
+        parser.add_argument("--attempts", type=int, default=10_000_000, help="解答履歴の件数")
+        parser.add_argument("--days", type=int, default=365, help="解答日時を分散させる日数")
+        parser.add_argument("--excluded-rate", type=float, default=0.02, help="出題除外にする問題の割合")
+        parser.add_argument("--seed", type=int, default=42, help="乱数シード")
+        parser.add_argument("--batch", type=int, default=20_000, help="1回のINSERTの行数")
+        parser.add_argument("--purge", action="store_true", help="生成済みの合成データを削除して終了")
+
+    def handle(self, *args, **opts):
+        if opts["purge"]:
+            self._purge()
+            return
+
+        rng = random.Random(opts["seed"])
+        self.batch = opts["batch"]
+
+        chapters = self._chapters()
+        qids = self._questions(rng, chapters, opts["questions"], opts["choices"], opts["excluded_rate"])
+        uids = self._users(opts["users"])
+        self._attempts(rng, qids, uids, opts["attempts"], opts["days"])
+        bump_bank_version()  # キャッシュ・フラグメントを無効化
+
+    def _timed(self, label, n, t0):
+        dt = time.perf_counter() - t0
+        self.stdout.write(f"{label}: {n:,}件 {dt:.1f}秒 ({n / max(dt, 1e-9):,.0f}件/秒)")
+
+    def _chapters(self):
+        # 19章すべてを用意（無ければ CHAPTER_QUOTA の出題数で作成）
+        chapters = {c.num: c for c in Chapter.objects.all()}
+        for num, quota in CHAPTER_QUOTA.items():
+            if num not in chapters:
+                chapters[num] = Chapter.objects.create(num=num, title=f"Chapter {num}", official_quota=quota)
+        return [chapters[num] for num in sorted(chapters)]
+
+    def _questions(self, rng, chapters, n, n_choices, excluded_rate):
+        # 出題数に比例（出題数0の章にも少し）して問題を配分し、bulk_create でIDを受け取る
+        t0 = time.perf_counter()
+        weights = [CHAPTER_QUOTA.get(c.num, 0) + 1 for c in chapters]
+        qids = []
+        made = 0
+        while made < n:
+            size = min(self.batch, n - made)
+            rows = [
+                Question(
+                    chapter=rng.choices(chapters, weights)[0],
+                    kind=Question.KIND_SINGLE if rng.random() < 0.9 else Question.KIND_JUDGE,
+                    stem=f"{STEM_PREFIX} 問題 {made + i}",
+                    note="",
+                    is_excluded=rng.random() < excluded_rate,
+                )
+                for i in range(size)
+            ]
+            with transaction.atomic():
+                created = Question.objects.bulk_create(rows)
+                choices = []
+                for q in created:
+                    k = 2 if q.kind == Question.KIND_JUDGE else n_choices
+                    correct = rng.randrange(k)
+                    choices += [
+                        Choice(question_id=q.id, text=f"選択肢 {j}", is_correct=(j == correct)) for j in range(k)
+                    ]
+                Choice.objects.bulk_create(choices, batch_size=self.batch)
+            qids += [q.id for q in created]
+            made += size
+        self._timed("問題", n, t0)
+        return qids
+
+    def _users(self, n):
+        # パスワードハッシュは1回だけ計算して全員で共有（ログイン不要の検証用ユーザー）
+        t0 = time.perf_counter()
+        password = make_password(None)
+        start = User.objects.filter(username__startswith=USER_PREFIX).count()
+        for lo in range(0, n, self.batch):
+            User.objects.bulk_create(
+                [User(username=f"{USER_PREFIX}{start + i:07d}", password=password)
+                 for i in range(lo, min(lo + self.batch, n))]
+            )
+        # 今回作った分だけ（ゼロ埋めの連番なので範囲で引ける）を id 順に返す。残っている行に結果を左右させない
+        uids = list(
+            User.objects.filter(
+                username__gte=f"{USER_PREFIX}{start:07d}", username__lte=f"{USER_PREFIX}{start + n - 1:07d}"
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        ) if n else []
+        self._timed("ユーザー", n, t0)
+        return uids
+
+    def _attempts(self, rng, qids, uids, n, days):
+        # 件数が多いのでモデルを作らず executemany で直接INSERTする
+        if not qids or not uids:
+            return
+        t0 = time.perf_counter()
+        now = timezone.now()
+        span = days * 86400
+        modes = [Attempt.MODE_MOCK] * 8 + [Attempt.MODE_REHAB, Attempt.MODE_SRS]
+        table = Attempt._meta.db_table
+        sql = (
+            f"INSERT INTO {table} (user_id, question_id, is_correct, answered_at, mode, box) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
+        )
+        ops = connection.ops
+        done = 0
+        while done < n:
+            size = min(self.batch, n - done)
+            rows = [
+                (
+                    rng.choice(uids),
+                    rng.choice(qids),
+                    rng.random() < 0.65,  # 正答率65%前後
+                    ops.adapt_datetimefield_value(now - timedelta(seconds=rng.randrange(span))),
+                    rng.choice(modes),
+                    rng.randrange(5),
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic(), connection.cursor() as cur:
+                cur.executemany(sql, rows)
+            done += size
+        self._timed("解答履歴", n, t0)
+
+    def _purge(self):
+        # ユーザー削除で解答履歴も、問題削除で選択肢も CASCADE で消える。
+        # 問題・選択肢の削除シグナルは1行ごとに版数を進めるので外し、最後に1回だけ進める
+        t0 = time.perf_counter()
+        n_users, _ = User.objects.filter(username__startswith=USER_PREFIX).delete()
+        with transaction.atomic():
+            with bank_signals_muted():
+                n_q, _ = Question.objects.filter(stem__startswith=STEM_PREFIX).delete()
+            bump_bank_version()
+        self.stdout.write(f"削除: {n_users:,}行（ユーザー関連） / {n_q:,}行（問題関連） {time.perf_counter() - t0:.1f}秒")
@@ -0,0 +1,56 @@
+# exam_preparation/exam/management/commands/pacing_report.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+
+from django.core.management.base import BaseCommand  # 管理コマンドの基底クラス
+from django.db.models import F, FloatField, Sum  # 平均時間の計算
+from django.db.models.functions import Cast  # 整数同士の割り算を実数で行う
+
+from exam.logic import pacing  # 1問あたりの持ち時間・累計の作り直し
+from exam.models import ChapterPacing, QuestionPacing  # 解答時間の累計
+
+
+class Command(BaseCommand):
+    help = (
+        "解答時間の累計（問題別・章別）から、章ごとのペースと時間のかかる問題を表示する"
+        "（解答履歴は走査しない。--rebuild で解答履歴から累計を作り直す）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="表示する問題数")
+        parser.add_argument("--min-answers", type=int, default=5, help="問題の一覧に載せる最小の解答数")
+        parser.add_argument("--rebuild", action="store_true", help="先に解答履歴から累計を作り直す")
+
+    def handle(self, *args, **opts):
+        if opts["rebuild"]:
+            nq, nc = pacing.rebuild()
+            self.stdout.write(f"作り直し: {nq}問 / {nc}章")
+
+        budget = pacing.budget_ms() / 1000
+        avg = Cast(F("total_ms"), FloatField()) / F("answered")
+        self.stdout.write(f"1問あたりの持ち時間: {budget:.1f}秒")
+
+        self.stdout.write(f"\n{'章':>4} {'解答数':>8} {'平均秒':>7} {'超過率':>7} {'正答率':>7}")
+        for row in ChapterPacing.objects.filter(answered__gt=0).select_related("chapter").order_by("chapter__num"):
+            self.stdout.write(
+                f"{row.chapter.num:>4} {row.answered:>8,} {row.total_ms / row.answered / 1000:>7.1f} "
+                f"{row.slow / row.answered:>7.0%} {row.correct / row.answered:>7.0%}"
+            )
+        totals = ChapterPacing.objects.aggregate(n=Sum("answered"), ms=Sum("total_ms"))
+        if totals["n"]:
+            per_q = totals["ms"] / totals["n"] / 1000
+            self.stdout.write(f"全体: 平均 {per_q:.1f}秒/問（持ち時間の {per_q / budget:.0%}）")
+
+        rows = (
+            QuestionPacing.objects.filter(answered__gte=opts["min_answers"])
+            .annotate(avg_ms=avg)
+            .select_related("question__chapter")
+            .order_by("-avg_ms")[: opts["top"]]
+        )
+        self.stdout.write(f"\n時間のかかる問題（解答{opts['min_answers']}件以上）")
+        self.stdout.write(f"{'問題ID':>8} {'章':>4} {'解答数':>7} {'平均秒':>7} {'超過率':>7} {'正答率':>7}  問題文")
+        for row in rows:
+            self.stdout.write(
+                f"{row.question_id:>8} {row.question.chapter.num:>4} {row.answered:>7,} {row.avg_ms / 1000:>7.1f} "
+                f"{row.slow / row.answered:>7.0%} {row.correct / row.answered:>7.0%}  {row.question.stem[:30]!r}"
+            )
@@ -0,0 +1,67 @@
+# exam_preparation/exam/management/commands/profile_imports.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import os  # 子プロセスの環境変数
+import re  # -X importtime の出力の解析
+import subprocess  # 計測用の子プロセス
+import sys  # 同じインタプリタで計測する
+import time  # 全体の所要時間
+from typing import List, Tuple  # 型アノテーション用
+
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+
+# ワーカー起動と同じ読み込み（WSGIアプリ生成＝django.setup＋ミドルウェア、URL定義＝ビュー）
+BOOT_CODE = (
+    "import exam_preparation.wsgi; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+# 出力例: "import time:       412 |       1523 |   exam.views"
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+OWN_PREFIXES = ("exam", "exam_preparation")  # 自前のモジュール
+
+
+class Command(BaseCommand):
+    help = (
+        "ワーカー起動時のモジュール読み込み時間を python -X importtime で計測し、上位を表示する。"
+        "合計が --budget-ms を超えたら失敗する（CIで起動コストの悪化を検知する）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget-ms", type=float, default=1500.0, help="読み込み時間の上限（ミリ秒）")
+        parser.add_argument("--top", type=int, default=20, help="表示する上位件数")
+        parser.add_argument("--own", action="store_true", help="自前のモジュール（exam / exam_preparation）だけ表示")
+
+    def handle(self, *args, **opts):
+        env = dict(os.environ)
+        env.update(EXAM_WARMUP="False", EXAM_SWEEP_INTERVAL="0")  # 読み込みだけを測る（ウォームアップ・掃除は除く）
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_CODE],
+            env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - t0) * 1000
+        if proc.returncode != 0:
+            raise CommandError("起動に失敗しました:\n" + proc.stderr[-2000:])
+
+        rows = self._parse(proc.stderr)
+        total_ms = sum(cum for _, cum, depth, _ in rows if depth == 0) / 1000
+        shown = [r for r in rows if not opts["own"] or r[3].split(".")[0] in OWN_PREFIXES]
+        shown.sort(key=lambda r: r[1], reverse=True)
+
+        self.stdout.write(f"{'累積ms':>9} {'自身ms':>9}  モジュール")
+        for self_us, cum_us, depth, name in shown[:opts["top"]]:
+            self.stdout.write(f"{cum_us / 1000:9.1f} {self_us / 1000:9.1f}  {'  ' * depth}{name}")
+        self.stdout.write(
+            f"読み込み合計: {total_ms:.1f}ms（{len(rows)}モジュール） / プロセス全体: {wall_ms:.0f}ms / 上限: {opts['budget_ms']:.0f}ms"
+        )
+        if total_ms > opts["budget_ms"]:
+            raise CommandError(f"読み込み時間が上限を超えています: {total_ms:.1f}ms > {opts['budget_ms']:.0f}ms")
+
+    def _parse(self, stderr: str) -> List[Tuple[int, int, int, str]]:
+        # (自身µs, 累積µs, ネストの深さ, モジュール名)
+        rows = []
+        for line in stderr.splitlines():
+            m = LINE_RE.match(line)
+            if m:
+                rows.append((int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2, m.group(4)))
+        return rows
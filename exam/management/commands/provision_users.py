@@ -0,0 +1,160 @@
+# exam_preparation/exam/management/commands/provision_users.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import csv  # 受講者一覧の読み込み
+import os  # 既定のプロセス数
+import sys  # 標準入力からの読み込み
+import time  # 処理時間の計測用
+from concurrent.futures import ProcessPoolExecutor  # パスワードハッシュの並列計算
+from typing import Dict, List, Optional  # 型アノテーション用
+
+import django  # ワーカープロセスの初期化
+from django.contrib.auth.hashers import make_password  # PBKDF2 などの設定どおりのハッシュ
+from django.contrib.auth.password_validation import validate_password  # AUTH_PASSWORD_VALIDATORS の検証
+from django.contrib.auth.models import User  # 作成するユーザー
+from django.contrib.auth.validators import UnicodeUsernameValidator  # サインアップと同じユーザー名の規則
+from django.core.exceptions import ValidationError  # ユーザー名・パスワードの検証エラー
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+from django.db import transaction  # 一括作成
+
+from exam.logic.leaderboard import rebuild_entries  # bulk_create は所属のシグナルを出さないので手動で反映
+from exam.models import Cohort, CohortMember  # 所属させるグループ
+
+FIELDS = ("username", "password", "email", "first_name", "last_name")  # CSV の列（username 以外は省略可）
+
+
+def _init_worker() -> None:
+    # spawn 方式（macOS・Windows）の子プロセスでも設定を読み込ませる（fork 方式では読み込み済み）
+    django.setup()
+
+
+def _hash(password: str) -> str:
+    # 空欄は使用不可のパスワード（--allow-unusable のときだけ。パスワード再設定で有効にする）
+    return make_password(password or None)
+
+
+class Command(BaseCommand):
+    help = (
+        "CSV（username,password[,email,first_name,last_name]。1行目は見出し）から受講者アカウントを一括作成する。"
+        "パスワードのハッシュはプロセスプールで並列に計算し、ユーザーは bulk_create でまとめて登録する。"
+        "既存のユーザー名は飛ばす。パスワードはサインアップと同じ AUTH_PASSWORD_VALIDATORS で検証し、"
+        "空欄は --allow-unusable を付けたときだけ使用不可のパスワードとして受け付ける"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv", help="CSVファイルのパス（- で標準入力）")
+        parser.add_argument("--cohort", help="作成したユーザーを所属させるグループ名")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="ハッシュ計算のプロセス数")
+        parser.add_argument("--batch", type=int, default=1000, help="1回のINSERTの行数")
+        parser.add_argument(
+            "--allow-unusable", action="store_true",
+            help="パスワードが空欄の行を、使用不可のパスワード（再設定するまでログインできない）で作成する",
+        )
+
+    def handle(self, *args, **opts):
+        cohort = self._cohort(opts["cohort"])
+        rows = self._read(opts["csv"], opts["allow_unusable"])
+        existing = set(
+            User.objects.filter(username__in=[r["username"] for r in rows]).values_list("username", flat=True)
+        )
+        new = [r for r in rows if r["username"] not in existing]
+        if not new:
+            self.stdout.write(f"作成対象なし（既存 {len(existing)}人）")
+            return
+
+        t0 = time.perf_counter()
+        hashes = self._hash_all([r["password"] for r in new], opts["workers"])
+        t_hash = time.perf_counter() - t0
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=r["username"],
+                        password=h,
+                        email=r["email"],
+                        first_name=r["first_name"],
+                        last_name=r["last_name"],
+                    )
+                    for r, h in zip(new, hashes)
+                ],
+                batch_size=opts["batch"],
+            )
+            if cohort is not None:
+                uids = list(
+                    User.objects.filter(username__in=[r["username"] for r in new]).values_list("id", flat=True)
+                )
+                CohortMember.objects.bulk_create(
+                    [CohortMember(cohort=cohort, user_id=uid) for uid in uids],
+                    batch_size=opts["batch"],
+                    ignore_conflicts=True,
+                )
+                rebuild_entries(cohort.id, uids)
+        dt = time.perf_counter() - t0
+
+        self.stdout.write(
+            f"作成: {len(new):,}人 / 既存で除外: {len(existing):,}人"
+            f"{f' / グループ {cohort.name} に所属' if cohort else ''}"
+        )
+        self.stdout.write(
+            f"ハッシュ {t_hash:.1f}秒（{opts['workers']}プロセス） / 全体 {dt:.1f}秒 "
+            f"({len(new) / max(dt, 1e-9):,.1f}人/秒)"
+        )
+
+    def _cohort(self, name: Optional[str]) -> Optional[Cohort]:
+        if not name:
+            return None
+        cohort = Cohort.objects.filter(name=name).first()
+        if cohort is None:
+            raise CommandError(f"グループが見つかりません: {name}")
+        return cohort
+
+    def _read(self, path: str, allow_unusable: bool) -> List[Dict[str, str]]:
+        # 見出し付きCSVを読み、ユーザー名の形式・重複とパスワードを確認する（1件でも不正なら何も作らない）
+        f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        try:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or "username" not in reader.fieldnames:
+                raise CommandError("CSV の1行目に username 列が必要です")
+            rows = [{k: (row.get(k) or "").strip() for k in FIELDS} for row in reader]
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        validate = UnicodeUsernameValidator()
+        errors, seen = [], set()
+        for line, row in enumerate(rows, start=2):
+            name = row["username"]
+            try:
+                validate(name)
+            except ValidationError:
+                errors.append(f"{line}行目: ユーザー名が不正です（{name!r}）")
+                continue
+            if len(name) > User._meta.get_field("username").max_length:
+                errors.append(f"{line}行目: ユーザー名が長すぎます（{name!r}）")
+            elif name in seen:
+                errors.append(f"{line}行目: ユーザー名が重複しています（{name!r}）")
+            seen.add(name)
+            errors += [f"{line}行目: {msg}" for msg in self._password_errors(row, allow_unusable)]
+        if errors:
+            raise CommandError("\n".join(errors[:20]) + (f"\n…ほか{len(errors) - 20}件" if len(errors) > 20 else ""))
+        return rows
+
+    def _password_errors(self, row: Dict[str, str], allow_unusable: bool) -> List[str]:
+        # 空欄は --allow-unusable が無ければエラー。それ以外は属性類似度の検証のため、保存しない User を渡す
+        if not row["password"]:
+            return [] if allow_unusable else ["パスワードが空欄です（使用不可のパスワードで作るには --allow-unusable）"]
+        user = User(**{k: row[k] for k in FIELDS if k != "password"})
+        try:
+            validate_password(row["password"], user)
+        except ValidationError as e:
+            return list(e.messages)
+        return []
+
+    def _hash_all(self, passwords: List[str], workers: int) -> List[str]:
+        # PBKDF2 は1件ごとにCPUを使い切るため、件数が少なければプロセスを起動しない
+        if workers <= 1 or len(passwords) < 2:
+            return [_hash(p) for p in passwords]
+        chunksize = max(1, len(passwords) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            return list(pool.map(_hash, passwords, chunksize=chunksize))
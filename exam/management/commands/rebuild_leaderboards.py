@@ -0,0 +1,29 @@
+# exam_preparation/exam/management/commands/rebuild_leaderboards.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+
+from exam.logic.leaderboard import rebuild_entries  # 台帳からの順位表の再構築
+from exam.models import Cohort  # 対象のグループ
+
+
+class Command(BaseCommand):
+    help = (
+        "確定済みの模試の台帳からグループの順位表を作り直す"
+        "（初回導入時や、順位表の行（LeaderboardEntry・LeaderboardChapter）が台帳とずれたときに実行する）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cohort", action="append", default=[], help="対象のグループ名（複数指定可。省略時は全グループ）")
+
+    def handle(self, *args, **opts):
+        cohorts = Cohort.objects.all()
+        if opts["cohort"]:
+            cohorts = cohorts.filter(name__in=opts["cohort"])
+            missing = set(opts["cohort"]) - set(cohorts.values_list("name", flat=True))
+            if missing:
+                raise CommandError(f"グループが見つかりません: {', '.join(sorted(missing))}")
+        for cohort in cohorts:
+            n = rebuild_entries(cohort.id)
+            self.stdout.write(f"{cohort.name}: {n}人")
@@ -0,0 +1,26 @@
+# exam_preparation/exam/management/commands/sweep_mocks.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+
+from django.conf import settings  # 猶予秒数の既定値
+from django.core.management.base import BaseCommand  # 管理コマンドの基底クラス
+
+from exam.logic.mock import sweep_expired  # 期限切れの模試の一括確定
+
+
+class Command(BaseCommand):
+    help = (
+        "制限時間を過ぎても受験中のままの模試をまとめて採点・確定する"
+        "（cron などで定期実行する。EXAM_SWEEP_INTERVAL を設定すればプロセス内でも実行される）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace", type=int, default=settings.EXAM_SWEEP_GRACE,
+            help="制限時間に加える猶予秒数（最後の解答の送信中に確定しないため）",
+        )
+        parser.add_argument("--batch", type=int, default=500, help="1トランザクションで確定する件数")
+
+    def handle(self, *args, **opts):
+        n = sweep_expired(grace_sec=opts["grace"], batch=opts["batch"])
+        self.stdout.write(f"確定: {n}件")
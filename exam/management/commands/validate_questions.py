@@ -0,0 +1,93 @@
+# exam_preparation/exam/management/commands/validate_questions.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import json  # レポートの出力用
+import os  # CPU数の取得用
+import time  # 処理時間の計測用
+from concurrent.futures import ProcessPoolExecutor  # ファイル単位の並列検査用
+from functools import partial  # ワーカーへ固定引数を渡すため
+from pathlib import Path  # パス操作用
+from typing import List  # 型アノテーション用
+
+from django.core.management.base import BaseCommand, CommandError  # 管理コマンドの基底クラスと例外
+
+from exam.logic.bank_validator import validate_file  # 1ファイル分の検査ロジック
+from exam.logic.quota import CHAPTER_QUOTA  # 許可する章番号の定義
+from exam.models import Question  # 問題種別（kind）の定義
+
+# 既定の問題データ置き場（exam/data/questions）
+DEFAULT_DIR = Path(__file__).resolve().parents[2] / "data" / "questions"
+
+
+class Command(BaseCommand):
+    help = "問題データ（JSON）を逐次読み込み・並列で検査し、ファイル/行番号付きのレポートを出力する"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*", help="検査するJSONファイルまたはディレクトリ（省略時は exam/data/questions）"
+        )
+        parser.add_argument(
+            "--jobs", type=int, default=os.cpu_count() or 1, help="並列プロセス数（1で逐次実行）"
+        )
+        parser.add_argument(
+            "--format", choices=["json", "jsonl", "text"], default="json", help="レポート形式"
+        )
+
+    def handle(self, *args, **opts):
+        files = self._collect(opts["paths"] or [str(DEFAULT_DIR)])
+        if not files:
+            raise CommandError("検査対象のJSONファイルがありません")
+
+        worker = partial(
+            validate_file,
+            chapters=tuple(CHAPTER_QUOTA),  # 出題数0の章も「存在する章」として扱う
+            kinds=tuple(k for k, _ in Question.KIND_CHOICES),
+        )
+
+        started = time.perf_counter()
+        jobs = max(1, min(opts["jobs"], len(files)))
+        if jobs == 1:
+            results = [worker(p) for p in files]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(worker, files))
+        elapsed = time.perf_counter() - started
+
+        issues = [i for r in results for i in r["issues"]]
+        n_questions = sum(r["questions"] for r in results)
+        self._emit(opts["format"], files, n_questions, issues, elapsed)
+
+        if issues:
+            raise CommandError(f"{len(issues)}件の問題が見つかりました")
+
+    def _collect(self, paths: List[str]) -> List[str]:
+        # ディレクトリは直下の *.json を展開。大きいファイルから処理して並列の偏りを減らす
+        files: List[Path] = []
+        for p in map(Path, paths):
+            if p.is_dir():
+                files.extend(p.glob("*.json"))
+            elif p.is_file():
+                files.append(p)
+            else:
+                raise CommandError(f"パスが存在しません: {p}")
+        files.sort(key=lambda p: p.stat().st_size, reverse=True)
+        return [str(p) for p in files]
+
+    def _emit(self, fmt, files, n_questions, issues, elapsed):
+        if fmt == "jsonl":
+            for i in issues:
+                self.stdout.write(json.dumps(i, ensure_ascii=False))
+        elif fmt == "text":
+            for i in issues:
+                self.stdout.write(f"{i['file']}:{i['line']}: [{i['code']}] {i['message']}")
+            self.stdout.write(
+                f"{len(files)}ファイル / {n_questions}問 / 指摘{len(issues)}件 ({elapsed:.2f}秒)"
+            )
+        else:
+            report = {
+                "files": len(files),
+                "questions": n_questions,
+                "issues": issues,
+                "elapsed_sec": round(elapsed, 3),
+            }
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
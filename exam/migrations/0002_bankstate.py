@@ -0,0 +1,22 @@
+# exam_preparation/exam/migrations/0002_bankstate.py
+# Generated by Django 4.2.30 on 2026-10-19 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+# exam_preparation/exam/migrations/0003_blueprint.py
+# Generated by Django 4.2.30 on 2026-10-19 06:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# 移行時点の selector.CHAPTER_QUOTA（マイグレーションはアプリのコードに依存させないため複製）
+SEED_QUOTA = {
+    1: 1, 2: 2, 3: 7, 4: 3, 5: 2, 6: 4, 7: 0, 8: 2, 9: 5, 10: 2,
+    11: 2, 12: 0, 13: 2, 14: 2, 15: 0, 16: 3, 17: 2, 18: 1, 19: 0,
+}
+
+
+def seed_official_quota(apps, schema_editor):
+    # 出題数が未設定（0）の章に CHAPTER_QUOTA の値を入れ、以後は Chapter.official_quota を正とする
+    Chapter = apps.get_model("exam", "Chapter")
+    for ch in Chapter.objects.filter(official_quota=0, num__in=SEED_QUOTA):
+        if SEED_QUOTA[ch.num]:
+            ch.official_quota = SEED_QUOTA[ch.num]
+            ch.save(update_fields=["official_quota"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0002_bankstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blueprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(unique=True)),
+                ('title', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BlueprintQuota',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quota', models.PositiveSmallIntegerField(default=0)),
+                ('blueprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quotas', to='exam.blueprint')),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.chapter')),
+            ],
+            options={
+                'ordering': ['blueprint', 'chapter__num'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='blueprintquota',
+            constraint=models.UniqueConstraint(fields=('blueprint', 'chapter'), name='uniq_blueprint_chapter'),
+        ),
+        migrations.RunPython(seed_official_quota, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# exam_preparation/exam/migrations/0004_hot_query_indexes.py
+# Generated by Django 4.2.30 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0003_blueprint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attempt',
+            name='exam_attemp_mode_b68b73_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='choice',
+            name='exam_choice_questio_a635c3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='choice',
+            name='exam_choice_is_corr_3a85e9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='exam_questi_chapter_99eb2c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='question',
+            name='exam_questi_is_excl_4a858b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user', 'mode', 'answered_at'], name='exam_attemp_user_id_db76bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user', 'question'], name='exam_attemp_user_id_573fca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['chapter', 'is_excluded'], name='exam_questi_chapter_6a9eb9_idx'),
+        ),
+    ]
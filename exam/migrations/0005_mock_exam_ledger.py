@@ -0,0 +1,53 @@
+# exam_preparation/exam/migrations/0005_mock_exam_ledger.py
+# Generated by Django 4.2.30 on 2026-10-19 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockExam',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blueprint', models.CharField(default='official', max_length=50)),
+                ('question_ids', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('open', 'open'), ('finished', 'finished'), ('expired', 'expired')], default='open', max_length=16)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MockAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_correct', models.BooleanField()),
+                ('answered_at', models.DateTimeField(auto_now_add=True)),
+                ('choice', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='exam.choice')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='exam.mockexam')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.question')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='mockexam',
+            index=models.Index(fields=['status', 'started_at'], name='exam_mockex_status_ed2823_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mockexam',
+            index=models.Index(fields=['user', 'started_at'], name='exam_mockex_user_id_7515a8_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mockanswer',
+            constraint=models.UniqueConstraint(fields=('exam', 'question'), name='uniq_mock_answer'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# exam_preparation/exam/migrations/0006_mockexam_session_key.py
+# Generated by Django 4.2.30 on 2026-10-19 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0005_mock_exam_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockexam',
+            name='session_key',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# exam_preparation/exam/migrations/0007_cohort_leaderboard.py
+# Generated by Django 4.2.30 on 2026-10-19 07:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0006_mockexam_session_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cohort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.SlugField(unique=True)),
+                ('title', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('best_score', models.PositiveSmallIntegerField(default=0)),
+                ('best_at', models.DateTimeField(blank=True, null=True)),
+                ('exams', models.PositiveIntegerField(default=0)),
+                ('chapter_stats', models.JSONField(default=dict)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='exam.cohort')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CohortMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='exam.cohort')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('cohort', 'user'), name='uniq_leaderboard_entry'),
+        ),
+        migrations.AddIndex(
+            model_name='cohortmember',
+            index=models.Index(fields=['user'], name='exam_cohort_user_id_f58632_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cohortmember',
+            constraint=models.UniqueConstraint(fields=('cohort', 'user'), name='uniq_cohort_member'),
+        ),
+    ]
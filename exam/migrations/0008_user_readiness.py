@@ -0,0 +1,27 @@
+# exam_preparation/exam/migrations/0008_user_readiness.py
+# Generated by Django 4.2.30 on 2026-10-19 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('exam', '0007_cohort_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserReadiness',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('chapter_stats', models.JSONField(default=dict)),
+                ('probability', models.FloatField(default=0.0)),
+                ('expected', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
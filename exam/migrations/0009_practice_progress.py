@@ -0,0 +1,38 @@
+# exam_preparation/exam/migrations/0009_practice_progress.py
+# Generated by Django 4.2.30 on 2026-10-19 07:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0008_user_readiness'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attempt',
+            name='mode',
+            field=models.CharField(choices=[('mock', 'mock'), ('rehab', 'rehab'), ('srs', 'srs'), ('practice', 'practice')], max_length=16),
+        ),
+        migrations.CreateModel(
+            name='PracticeProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chapter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exam.chapter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='practiceprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'chapter'), name='uniq_practice_progress'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# exam_preparation/exam/migrations/0010_pacing.py
+# Generated by Django 4.2.30 on 2026-10-19 07:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0009_practice_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapterPacing',
+            fields=[
+                ('chapter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='exam.chapter')),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.PositiveBigIntegerField(default=0)),
+                ('slow', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionPacing',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='exam.question')),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.PositiveBigIntegerField(default=0)),
+                ('slow', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='elapsed_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mockanswer',
+            name='elapsed_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# exam_preparation/exam/migrations/0011_user_seen.py
+# Generated by Django 4.2.30 on 2026-10-19 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('exam', '0010_pacing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSeen',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('bits', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# exam_preparation/exam/migrations/0012_drop_mock_session_key.py
+# Generated by Django 4.2.30 on 2026-10-19 07:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0011_user_seen'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='mockexam',
+            name='session_key',
+        ),
+    ]
@@ -0,0 +1,67 @@
+# exam_preparation/exam/migrations/0013_leaderboard_indexes.py
+# Generated by Django 4.2.30 on 2026-10-19 07:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def split_chapter_stats(apps, schema_editor):
+    # 順位表の行の chapter_stats（{"章番号": [正解数, 解答数]}）を章別の行に移す
+    Entry = apps.get_model('exam', 'LeaderboardEntry')
+    Chapter = apps.get_model('exam', 'LeaderboardChapter')
+    rows = [
+        Chapter(cohort_id=e.cohort_id, user_id=e.user_id, chapter_num=int(ch), correct=c, answered=n, rate=c / n)
+        for e in Entry.objects.all().iterator()
+        for ch, (c, n) in e.chapter_stats.items()
+        if n
+    ]
+    Chapter.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0012_drop_mock_session_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardChapter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chapter_num', models.PositiveSmallIntegerField()),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('rate', models.FloatField(default=0.0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['cohort', '-best_score', 'best_at', 'user'], name='lb_score_order'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardchapter',
+            name='cohort',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chapter_entries', to='exam.cohort'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardchapter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardchapter',
+            index=models.Index(fields=['cohort', 'chapter_num', '-rate', '-answered', 'correct', 'user'], name='lb_chapter_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardchapter',
+            constraint=models.UniqueConstraint(fields=('cohort', 'user', 'chapter_num'), name='uniq_leaderboard_chapter'),
+        ),
+        migrations.RunPython(split_chapter_stats, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='leaderboardentry',
+            name='chapter_stats',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# exam_preparation/exam/migrations/0014_offline_exams.py
+# Generated by Django 4.2.30 on 2026-10-19 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0013_leaderboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockexam',
+            name='offline',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='mode',
+            field=models.CharField(choices=[('mock', 'mock'), ('rehab', 'rehab'), ('srs', 'srs'), ('practice', 'practice'), ('offline', 'offline')], max_length=16),
+        ),
+    ]
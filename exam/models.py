@@ -60,10 +60,9 @@ class Question(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["chapter"]),
-            # chapterフィールドにインデックス（章単位検索高速化）
-            models.Index(fields=["is_excluded"]),
-            # is_excludedフィールドにインデックス（除外検索用）
+            models.Index(fields=["chapter", "is_excluded"]),
+            # 章×除外フラグの複合インデックス（選出・章別在庫の集計をインデックスだけで処理）
+            # ※ chapter 単独は外部キーの自動インデックスがあるため不要
         ]
 
     def __str__(self) -> str:
@@ -87,13 +86,8 @@ class Choice(models.Model):
     is_correct = models.BooleanField(default=False)
     # 正解選択肢かどうかのフラグ。Falseがデフォルト
 
-    class Meta:
-        indexes = [
-            models.Index(fields=["question"]),
-            # questionフィールドにインデックス（問題単位で選択肢取得を高速化）
-            models.Index(fields=["is_correct"]),
-            # 正解・不正解の判定検索用にインデックス
-        ]
+    # ※ 選択肢は常に問題単位で取得するため、外部キー(question)の自動インデックスのみで足りる
+    #   （単独の is_correct インデックスは選択性が低く使われないため持たない）
 
     def __str__(self) -> str:
         # 表示用。正解なら✓、そうでなければ空白を先頭につけて表示
@@ -105,16 +99,21 @@ class Attempt(models.Model):
     """
     受験者の解答履歴モデル。
     Leitner方式の復習間隔管理用のbox番号も保持。
-    modeは 'mock'（本番模擬）, 'rehab'（弱点リハビリ）, 'srs'（短期記憶直上げ）を表す。
+    modeは 'mock'（本番模擬）, 'rehab'（弱点リハビリ）, 'srs'（短期記憶直上げ）, 'practice'（章別演習）,
+    'offline'（オフライン受験の模試。端末に正解キーを渡しているため合格可能性の推定には数えない）を表す。
     """
 
     MODE_MOCK = "mock"
     MODE_REHAB = "rehab"
     MODE_SRS = "srs"
+    MODE_PRACTICE = "practice"
+    MODE_OFFLINE = "offline"
     MODE_CHOICES = [
         (MODE_MOCK, "mock"),
         (MODE_REHAB, "rehab"),
         (MODE_SRS, "srs"),
+        (MODE_PRACTICE, "practice"),
+        (MODE_OFFLINE, "offline"),
     ]
     # 回答モードの選択肢定義
 
@@ -130,6 +129,8 @@ class Attempt(models.Model):
     # 回答モード。最大16文字まで
     box = models.PositiveSmallIntegerField(default=0)  # 0..4
     # 復習ボックス番号。Leitner方式の箱番号で復習レベル管理。0が初期値
+    elapsed_ms = models.PositiveIntegerField(null=True, blank=True)
+    # 問題を表示してから解答するまでのミリ秒（計測前の履歴・計測できなかった解答はNULL）
 
     class Meta:
         indexes = [
@@ -137,11 +138,337 @@ class Attempt(models.Model):
             # ユーザーごとの回答履歴を日時順に高速検索可能にする複合インデックス
             models.Index(fields=["question", "answered_at"]),
             # 問題ごとの回答履歴を日時順に高速検索可能にする複合インデックス
-            models.Index(fields=["mode"]),
-            # モード別回答履歴検索を高速化するためのインデックス
+            models.Index(fields=["user", "mode", "answered_at"]),
+            # ユーザー×モードの直近履歴（結果画面）を並べ替えなしで取得する複合インデックス
+            models.Index(fields=["user", "question"]),
+            # ユーザーの解答済み問題ID一覧（未出題優先の選出）をインデックスだけで取得する
         ]
 
     def __str__(self) -> str:
         # 表示用。ユーザー名、正誤記号、問題ID、モードを表示
         mark = "✓" if self.is_correct else "×"
         return f"{self.user.username} {mark} Q{self.question_id} ({self.mode})"
+
+
+class MockExam(models.Model):
+    """
+    1回分の模擬試験。出題順の問題ID・開始/終了日時・確定したスコアを保持する。
+    スコアはセッションのカウンタではなく、解答台帳（MockAnswer）から確定時に集計する。
+    """
+
+    STATUS_OPEN = "open"  # 受験中
+    STATUS_FINISHED = "finished"  # 時間内に終了
+    STATUS_EXPIRED = "expired"  # 制限時間切れで終了
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "open"),
+        (STATUS_FINISHED, "finished"),
+        (STATUS_EXPIRED, "expired"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # 受験者。ユーザー削除時に試験も削除
+    blueprint = models.CharField(max_length=50, default="official")
+    # 出題設計名（quota_plan の名前）
+    question_ids = models.JSONField(default=list)
+    # 出題順の問題IDリスト
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    # 試験の状態
+    started_at = models.DateTimeField()
+    # 開始日時（制限時間の起点）
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # 確定日時。受験中はNULL
+    score = models.PositiveSmallIntegerField(default=0)
+    # 確定時に台帳から集計した正解数
+    offline = models.BooleanField(default=False)
+    # オフライン受験（出題パッケージで正解キーを渡した）。順位表・合格可能性には数えない
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "started_at"]),
+            # 受験中のまま放置された試験を開始日時順に探すためのインデックス
+            models.Index(fields=["user", "started_at"]),
+            # ユーザーごとの受験履歴を日時順に取得するためのインデックス
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user.username} mock#{self.pk} {self.status} {self.score}/{len(self.question_ids)}"
+
+
+class MockAnswer(models.Model):
+    """
+    模擬試験の解答台帳。(exam, question) は一意で、同じ設問への再送信（二重クリック・再読み込み）は無視される。
+    """
+
+    exam = models.ForeignKey(MockExam, on_delete=models.CASCADE, related_name="answers")
+    # 試験への外部キー。exam.answers で逆参照可能
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    # 解答した問題
+    choice = models.ForeignKey(Choice, on_delete=models.SET_NULL, null=True, blank=True)
+    # 選んだ選択肢（未選択・削除済みはNULL）
+    is_correct = models.BooleanField()
+    # 採点結果
+    answered_at = models.DateTimeField(auto_now_add=True)
+    # 解答日時
+    elapsed_ms = models.PositiveIntegerField(null=True, blank=True)
+    # 問題を表示してから解答するまでのミリ秒（確定時に Attempt へ引き継ぐ）
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["exam", "question"], name="uniq_mock_answer"),
+            # 1試験1問につき1行（再送信は既存行を返すだけ）
+        ]
+
+    def __str__(self) -> str:
+        mark = "✓" if self.is_correct else "×"
+        return f"mock#{self.exam_id} {mark} Q{self.question_id}"
+
+
+class Cohort(models.Model):
+    """受験者のグループ（クラス）。講師はグループ内の順位表を見られる"""
+
+    name = models.SlugField(max_length=50, unique=True)
+    # グループ名。URL（/cohorts/<name>/leaderboard/）で使う識別子
+    title = models.CharField(max_length=100)
+    # 表示名
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.title}"
+
+
+class CohortMember(models.Model):
+    """グループの所属"""
+
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name="members")
+    # グループへの外部キー。cohort.members で逆参照可能
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # 所属ユーザー
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cohort", "user"], name="uniq_cohort_member"),
+            # 同じグループに同じユーザーは1行のみ
+        ]
+        indexes = [
+            models.Index(fields=["user"]),
+            # 模試確定時に、そのユーザーが属するグループを引くためのインデックス
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cohort.name}: {self.user.username}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    グループ内順位表の1行（グループ×ユーザー）。模試の確定ごとに差分で更新する。
+    上位のページは (cohort, -best_score, best_at, user) インデックス順の ORDER BY、順位は同じインデックス上の COUNT で引く。
+    """
+
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name="entries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    best_score = models.PositiveSmallIntegerField(default=0)
+    # 公式配点の模試での最高正解数
+    best_at = models.DateTimeField(null=True, blank=True)
+    # 最高点を最初に取った日時（同点なら早い方が上位）。公式配点の模試が未受験ならNULL
+    exams = models.PositiveIntegerField(default=0)
+    # 確定した模試の回数
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cohort", "user"], name="uniq_leaderboard_entry"),
+        ]
+        indexes = [
+            models.Index(fields=["cohort", "-best_score", "best_at", "user"], name="lb_score_order"),
+            # 最高点の順位表の並び順（上位のページと順位の COUNT）
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cohort.name}: {self.user.username} {self.best_score}"
+
+
+class LeaderboardChapter(models.Model):
+    """
+    グループ内順位表の章別の行（グループ×ユーザー×章）。模試の確定ごとに F() で加算する。
+    正答率は並べ替えのインデックスに載せるため、正解数・解答数と一緒に保存する。
+    """
+
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE, related_name="chapter_entries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    chapter_num = models.PositiveSmallIntegerField()
+    # 章番号（順位表の指標 ch<章番号> に対応）
+    correct = models.PositiveIntegerField(default=0)
+    # 正解数の累計
+    answered = models.PositiveIntegerField(default=0)
+    # 解答数の累計
+    rate = models.FloatField(default=0.0)
+    # 正答率（correct / answered）
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cohort", "user", "chapter_num"], name="uniq_leaderboard_chapter"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["cohort", "chapter_num", "-rate", "-answered", "correct", "user"], name="lb_chapter_order"
+            ),
+            # 章の順位表の並び順（正答率が高い順、同率なら解答数が多い順）
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cohort.name}: {self.user.username} ch{self.chapter_num} {self.correct}/{self.answered}"
+
+
+class PracticeProgress(models.Model):
+    """
+    章別演習の進捗。問題IDの一覧ではなく「最後に解答した問題ID」（カーソル）だけを持ち、
+    次の問題は id > last_id の先頭から取る。章の問題数によらず1行で済む。
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE)
+    last_id = models.BigIntegerField(default=0)
+    # 最後に解答した問題ID（0なら未着手）
+    answered = models.PositiveIntegerField(default=0)
+    # この周回での解答数
+    correct = models.PositiveIntegerField(default=0)
+    # この周回での正解数
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "chapter"], name="uniq_practice_progress"),
+            # ユーザー×章で1行
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user.username} Ch{self.chapter.num} @{self.last_id} {self.correct}/{self.answered}"
+
+
+class UserReadiness(models.Model):
+    """
+    合格可能性の推定に使う、ユーザーごとの章別の累計正解数・解答数。
+    解答履歴が増えるたびに差分で更新し、ダッシュボードは集計クエリなしで推定値を出す。
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    chapter_stats = models.JSONField(default=dict)
+    # 章ごとの累計 {"章番号": [正解数, 解答数]}（全モードの解答履歴）
+    probability = models.FloatField(default=0.0)
+    # 最後に計算した合格可能性（0〜1。スタッフ向けの一覧・集計用）
+    expected = models.FloatField(default=0.0)
+    # 最後に計算した予想得点
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.user.username} {self.probability:.0%}"
+
+
+class UserSeen(models.Model):
+    """
+    ユーザーが解答済みの問題IDのビット列（exam.logic.seen.SeenSet）。
+    全ワーカーが同じ行を読むため、どのワーカーで模試を確定しても次の出題にすぐ反映される。
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    bits = models.BinaryField(default=bytes)
+    # 問題ID＝ビット位置（10万問で約12.5KB）
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.user_id} seen {len(self.bits)}B"
+
+
+class QuestionPacing(models.Model):
+    """
+    問題ごとの解答時間の累計。解答を記録するたびに F() で加算し、平均・時間超過率を解答履歴を走査せずに出す。
+    """
+
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True)
+    answered = models.PositiveIntegerField(default=0)
+    # 解答時間を計測できた解答数
+    correct = models.PositiveIntegerField(default=0)
+    # そのうちの正解数
+    total_ms = models.PositiveBigIntegerField(default=0)
+    # 解答時間の合計（ミリ秒）
+    slow = models.PositiveIntegerField(default=0)
+    # 1問あたりの持ち時間（試験時間÷出題数）を超えた解答数
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Q{self.question_id} {self.total_ms / max(self.answered, 1) / 1000:.1f}s x{self.answered}"
+
+
+class ChapterPacing(models.Model):
+    """章ごとの解答時間の累計（QuestionPacing と同時に加算する）"""
+
+    chapter = models.OneToOneField(Chapter, on_delete=models.CASCADE, primary_key=True)
+    answered = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    total_ms = models.PositiveBigIntegerField(default=0)
+    slow = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Ch{self.chapter.num} {self.total_ms / max(self.answered, 1) / 1000:.1f}s x{self.answered}"
+
+
+class Blueprint(models.Model):
+    """
+    名前付きの出題設計（章ごとの出題数の組）。
+    既定の設計（公式配点）は Chapter.official_quota そのもので、ここには追加の設計（ミニ模試など）を登録する。
+    """
+
+    name = models.SlugField(max_length=50, unique=True)
+    # 設計名。URLパラメータ（?blueprint=...）で指定する識別子
+    title = models.CharField(max_length=100)
+    # 表示名
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.title}"
+
+
+class BlueprintQuota(models.Model):
+    """出題設計ごとの章別出題数"""
+
+    blueprint = models.ForeignKey(
+        Blueprint, on_delete=models.CASCADE, related_name="quotas"
+    )
+    # 設計への外部キー。blueprint.quotas で逆参照可能
+    chapter = models.ForeignKey(Chapter, on_delete=models.CASCADE)
+    # 対象の章
+    quota = models.PositiveSmallIntegerField(default=0)
+    # この設計での出題数
+
+    class Meta:
+        ordering = ["blueprint", "chapter__num"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["blueprint", "chapter"], name="uniq_blueprint_chapter"
+            ),
+            # 1つの設計で同じ章は1行のみ
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.blueprint.name} Ch{self.chapter.num}: {self.quota}"
+
+
+class BankState(models.Model):
+    """
+    問題バンク全体の版数を保持する単一行モデル（pk=1 のみ使用）。
+    Chapter / Question / Choice が書き換わるたびに version を1つ進める。
+    キャッシュのキーに version を含めることで、内容変更時に古いキャッシュを自動で無効化する。
+    """
+
+    version = models.PositiveBigIntegerField(default=1)
+    # 問題バンクの版数。単調増加
+    updated_at = models.DateTimeField(auto_now=True)
+    # 最終更新日時。版数を進めたときに更新される
+
+    def __str__(self) -> str:
+        return f"bank v{self.version} ({self.updated_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,61 @@
+# exam_preparation/exam/signals.py
+
+from contextlib import contextmanager  # 一括処理の間だけ受信を外す
+
+from django.db.models.signals import post_delete, post_save  # 保存・削除後に発火するシグナル
+from django.dispatch import receiver  # シグナル受信デコレーター
+
+from .logic.bank import bump_bank_version  # 問題バンク版数の更新
+from .logic.leaderboard import rebuild_entries, remove_member  # グループの順位表
+from .models import Blueprint, BlueprintQuota, Chapter, Choice, CohortMember, Question  # 版数・順位表に影響するモデル
+
+
+# ※ QuerySet.update() / bulk_create() はシグナルを発火しないため、
+#   一括更新を行う場合は呼び出し側で bump_bank_version() を呼ぶこと。
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+@receiver(post_save, sender=Blueprint)
+@receiver(post_delete, sender=Blueprint)
+@receiver(post_save, sender=BlueprintQuota)
+@receiver(post_delete, sender=BlueprintQuota)
+def on_bank_changed(sender, **kwargs):
+    # 問題・選択肢・章・出題設計のいずれかが変わったら版数を進め、関連キャッシュを無効化する
+    bump_bank_version()
+
+
+BANK_MODELS = (Chapter, Question, Choice, Blueprint, BlueprintQuota)  # on_bank_changed を受けるモデル
+
+
+@contextmanager
+def bank_signals_muted():
+    """
+    一括削除の間だけ on_bank_changed を外す（1行ごとの版数更新・イメージ再作成の予約を出さない）。
+    受信先が無くなるので、Django は行を読み込まずに DELETE をまとめて発行できる。
+    抜けた後で、呼び出し側が bump_bank_version() を1回だけ呼ぶこと。
+    """
+    for model in BANK_MODELS:
+        post_save.disconnect(on_bank_changed, sender=model)
+        post_delete.disconnect(on_bank_changed, sender=model)
+    try:
+        yield
+    finally:
+        for model in BANK_MODELS:
+            post_save.connect(on_bank_changed, sender=model)
+            post_delete.connect(on_bank_changed, sender=model)
+
+
+@receiver(post_save, sender=CohortMember)
+def on_member_added(sender, instance, created, **kwargs):
+    # 新しく所属したユーザーは、過去の模試の台帳から順位表の行を作る
+    if created:
+        rebuild_entries(instance.cohort_id, [instance.user_id])
+
+
+@receiver(post_delete, sender=CohortMember)
+def on_member_removed(sender, instance, **kwargs):
+    # 所属を外れたユーザーの行を順位表から消す
+    remove_member(instance.cohort_id, instance.user_id)
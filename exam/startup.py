@@ -0,0 +1,83 @@
+# exam_preparation/exam/startup.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import logging  # 各段階の所要時間の記録
+import os  # runserver の自動リロード判定
+import sys  # runserver の判定
+import time  # 所要時間の計測
+import warnings  # 起動時のDBアクセスに関する警告の抑制
+from typing import Callable, Dict, List, Tuple  # 型アノテーション用
+
+logger = logging.getLogger(__name__)
+
+
+def is_server_process() -> bool:
+    """
+    リクエストを受けるプロセスか。起動コマンドからは推測せず、WSGI / ASGI のエントリポイント
+    （exam_preparation/wsgi.py・asgi.py）が立てる EXAM_SERVER_PROCESS 設定で判定する。
+    pytest・シェル・管理コマンド・ワーカー（Celery など）はこの設定が無いので False。
+    runserver は設定の読み込みがエントリポイントより先なので、自動リロードの子プロセス（RUN_MAIN）で判定する。
+    """
+    from django.conf import settings  # アプリ読み込み後に参照する
+
+    if getattr(settings, "EXAM_SERVER_PROCESS", False):
+        return True
+    return sys.argv[1:2] == ["runserver"] and os.environ.get("RUN_MAIN") == "true"
+
+
+def _steps() -> List[Tuple[str, Callable[[], object]]]:
+    # アプリ読み込み完了後に参照する
+    from django.template.loader import get_template
+    from django.urls import reverse
+
+    from .logic.bank import bank_version, chapter_coverage, eligible_ids
+    from .logic.bank_image import current_image
+    from .logic.quota import CHAPTER_QUOTA, all_plans
+    from .logic.smart_explain import build_diff_html, extract_hints
+
+    return [
+        # 問題バンク：イメージのメモリマップ（無ければ章別IDのメモ）と章別在庫
+        ("bank_image", lambda: current_image(bank_version())),
+        ("eligible_ids", lambda: [eligible_ids(ch) for ch in CHAPTER_QUOTA]),
+        ("chapter_coverage", chapter_coverage),
+        # 出題設計（プロセス内メモ）
+        ("quota_plans", all_plans),
+        # スマート解説の正規表現・知識ベースを1回通す
+        ("smart_explain", lambda: (
+            build_diff_html("sorted(a)", "a.sort()"),
+            extract_hints("list.sort と sorted の違い [::-1]", "sorted"),
+        )),
+        # URL リゾルバとテンプレート（キャッシュローダーでコンパイル済みにする）
+        ("urls", lambda: reverse("dashboard")),
+        ("templates", lambda: [
+            get_template(name)
+            for name in ("exam/dashboard.html", "exam/session.html", "exam/result.html", "exam/practice.html")
+        ]),
+    ]
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    最初のリクエストが払っていた初期化（問題バンク・出題設計・正規表現・テンプレート）を先に済ませる。
+    段階ごとの所要時間（ミリ秒）を返す。失敗した段階は記録して飛ばす（起動は止めない）。
+    """
+    timings: Dict[str, float] = {}
+    with warnings.catch_warnings():
+        # ready() 中のDBアクセスに対する警告（Django 5.0+）。ここでは意図して読む
+        warnings.filterwarnings("ignore", message="Accessing the database during app initialization")
+        for name, step in _steps():
+            t0 = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception("ウォームアップに失敗しました: %s", name)
+                continue
+            timings[name] = (time.perf_counter() - t0) * 1000
+    # gunicorn --preload 等でフォーク前に実行された場合に、接続をワーカー間で共有しないよう閉じておく
+    from django.db import connections
+    connections.close_all()
+    logger.info(
+        "ウォームアップ完了: %s",
+        ", ".join(f"{k}={v:.1f}ms" for k, v in timings.items()),
+    )
+    return timings
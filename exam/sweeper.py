@@ -0,0 +1,46 @@
+# exam_preparation/exam/sweeper.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import logging  # 失敗時の記録
+import threading  # バックグラウンドスレッド
+
+from django.conf import settings  # 実行間隔・猶予秒数
+from django.db import close_old_connections  # スレッドで使ったDB接続の後始末
+
+from .startup import is_server_process  # リクエストを受けるプロセスでだけ動かす
+
+logger = logging.getLogger(__name__)
+
+_started = False  # プロセス内で1回だけ起動する
+_lock = threading.Lock()
+
+
+def _loop(interval: int, stop: threading.Event) -> None:
+    from .logic.mock import sweep_expired  # アプリ読み込み完了後に参照する
+
+    while not stop.wait(interval):
+        try:
+            sweep_expired(grace_sec=settings.EXAM_SWEEP_GRACE)
+        except Exception:
+            logger.exception("模試の掃除に失敗しました")
+        finally:
+            close_old_connections()
+
+
+def start_sweeper() -> threading.Event | None:
+    """
+    EXAM_SWEEP_INTERVAL（秒）が正ならデーモンスレッドで sweep_expired を定期実行する。
+    複数ワーカーで同時に動いても、確定は条件付き UPDATE で1回だけになる。
+    戻り値の Event を set すると停止する（起動しなかったときは None）。
+    """
+    global _started
+    interval = getattr(settings, "EXAM_SWEEP_INTERVAL", 0)
+    if interval <= 0 or not is_server_process():
+        return None
+    with _lock:
+        if _started:
+            return None
+        _started = True
+    stop = threading.Event()
+    threading.Thread(target=_loop, args=(interval, stop), name="exam-sweeper", daemon=True).start()
+    return stop
@@ -0,0 +1,685 @@
+# exam_preparation/exam/tests.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import gzip  # 事前圧縮版の作成
+import io  # 管理コマンドの出力の受け取り
+import json  # 問題ファイルの作成
+import os  # 静的ファイルのパス
+import shutil  # 一時ディレクトリの削除
+import tempfile  # テスト用の STATIC_ROOT
+import unittest  # DB種別によるスキップ
+from datetime import timedelta  # 制限時間切れの模試を作る
+from typing import List  # 型アノテーション用
+
+from django.contrib.auth.models import User  # 受験者
+from django.core.cache import cache  # テスト間でキャッシュを持ち越さない
+from django.core.management import CommandError, call_command  # 管理コマンドの実行
+from django.db import connection  # 接続先のDB種別
+from django.db.models.signals import post_delete  # 削除シグナルの受信先
+from django.http import Http404  # 配信しないファイル
+from django.test import Client, RequestFactory, TestCase  # 別セッションのクライアント・ビューの直接呼び出し・テストごとにトランザクションで巻き戻す
+from django.utils import timezone  # 開始日時
+
+from exam.logic import bank, bank_image, bank_validator  # 問題バンク（版数単位のメモ）・イメージ・問題ファイルの検査
+from exam.logic.bank import bank_version, bump_bank_version, eligible_ids  # 問題バンクの版数・章別の出題対象
+from exam.logic import leaderboard as lb, mock, offline, pacing, practice, readiness  # 順位表・模試の台帳・オフライン受験・解答時間・章別演習・合格可能性
+from exam.logic.query_plans import HOT_QUERIES, check_plan  # ホットなクエリと実行計画の判定
+from exam.models import (  # 問題バンク・台帳・解答履歴・順位表
+    Attempt,
+    BankState,
+    Chapter,
+    ChapterPacing,
+    Choice,
+    Cohort,
+    CohortMember,
+    LeaderboardChapter,
+    LeaderboardEntry,
+    MockAnswer,
+    MockExam,
+    PracticeProgress,
+    Question,
+    QuestionPacing,
+    UserReadiness,
+)
+from exam_preparation import staticfiles  # 静的ファイルの配信ビュー
+
+
+def make_bank(chapters: int = 2, per_chapter: int = 5) -> List[Question]:
+    """章ごとに per_chapter 問（選択肢4つ、1つ目が正解）の小さな問題バンクを作る"""
+    questions = []
+    for num in range(1, chapters + 1):
+        ch = Chapter.objects.create(num=num, title=f"Chapter {num}", official_quota=per_chapter)
+        for i in range(per_chapter):
+            q = Question.objects.create(chapter=ch, stem=f"Q{num}-{i}")
+            for j in range(4):
+                Choice.objects.create(question=q, text=f"c{j}", is_correct=(j == 0))
+            questions.append(q)
+    return questions
+
+
+def correct_choice(q: Question) -> Choice:
+    return q.choices.get(is_correct=True)
+
+
+def wrong_choice(q: Question) -> Choice:
+    return q.choices.filter(is_correct=False).first()
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN の判定は SQLite 専用")
+class QueryPlanTests(TestCase):
+    """ホットなクエリが全表走査・一時B-treeでの並べ替えに退化していないこと（マイグレーション後のスキーマで確認）"""
+
+    def test_hot_queries_use_indexes(self):
+        for name in HOT_QUERIES:
+            with self.subTest(query=name):
+                plan, problems = check_plan(name)
+                self.assertEqual(problems, [], "\n".join(plan))
+
+
+class MockLedgerTests(TestCase):
+    """模試の解答台帳：二重送信で解答・スコアが変わらず、確定（解答履歴の書き込み）は1回だけ"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+        self.exam = mock.start_exam(self.user, [q.id for q in self.questions], "official")
+
+    def test_resubmit_keeps_first_answer(self):
+        q = self.questions[0]
+        first = mock.record_answer(self.exam, q.id, correct_choice(q))
+        again = mock.record_answer(self.exam, q.id, wrong_choice(q))
+        self.assertEqual(again.pk, first.pk)
+        self.assertTrue(again.is_correct)
+        self.assertEqual(MockAnswer.objects.filter(exam=self.exam).count(), 1)
+        self.assertEqual(mock.exam_score(self.exam), 1)
+
+    def test_finalize_writes_attempts_once(self):
+        for q in self.questions[:3]:
+            mock.record_answer(self.exam, q.id, correct_choice(q))
+        mock.record_answer(self.exam, self.questions[3].id, wrong_choice(self.questions[3]))
+
+        self.assertTrue(mock.finalize_exam(self.exam))
+        self.assertFalse(mock.finalize_exam(self.exam))
+        self.assertEqual(self.exam.status, MockExam.STATUS_FINISHED)
+        self.assertEqual(self.exam.score, 3)
+        self.assertEqual(Attempt.objects.filter(user=self.user, mode=Attempt.MODE_MOCK).count(), 4)
+
+    def test_finalize_loses_to_concurrent_finalize(self):
+        # 別のワーカーが先に確定した（手元のインスタンスは open のまま）
+        mock.record_answer(self.exam, self.questions[0].id, correct_choice(self.questions[0]))
+        other = MockExam.objects.get(pk=self.exam.pk)
+        self.assertTrue(mock.finalize_exam(other))
+
+        self.assertFalse(mock.finalize_exam(self.exam))
+        self.assertEqual(self.exam.status, MockExam.STATUS_FINISHED)  # 確定済みの状態を読み直す
+        self.assertEqual(self.exam.score, 1)
+        self.assertEqual(Attempt.objects.filter(user=self.user).count(), 1)
+
+
+class SweepTests(TestCase):
+    """期限切れの掃除：制限時間を過ぎた模試だけを1回だけ確定し、後から来た確定処理は何もしない"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+        ids = [q.id for q in self.questions]
+        self.expired = mock.start_exam(self.user, ids, "official")
+        MockExam.objects.filter(pk=self.expired.pk).update(
+            started_at=timezone.now() - timedelta(seconds=mock.EXAM_DURATION_SEC + 120)
+        )
+        self.running = mock.start_exam(self.user, ids, "official")
+
+    def test_sweep_finalizes_expired_once(self):
+        q = self.questions[0]
+        mock.record_answer(self.expired, q.id, correct_choice(q))
+
+        self.assertEqual(mock.sweep_expired(grace_sec=60), 1)
+        self.assertEqual(mock.sweep_expired(grace_sec=60), 0)
+        self.expired.refresh_from_db()
+        self.assertEqual(self.expired.status, MockExam.STATUS_EXPIRED)
+        self.assertEqual(self.expired.score, 1)
+        self.assertEqual(Attempt.objects.filter(user=self.user).count(), 1)
+
+    def test_finalize_after_sweep_is_noop(self):
+        stale = MockExam.objects.get(pk=self.expired.pk)  # 掃除の前に読み込んだワーカー
+        mock.record_answer(stale, self.questions[0].id, correct_choice(self.questions[0]))
+        mock.sweep_expired(grace_sec=60)
+
+        self.assertFalse(mock.finalize_exam(stale))
+        self.assertEqual(stale.status, MockExam.STATUS_EXPIRED)
+        self.assertEqual(Attempt.objects.filter(user=self.user).count(), 1)
+
+    def test_open_exam_within_limit_is_untouched(self):
+        mock.sweep_expired(grace_sec=60)
+        self.running.refresh_from_db()
+        self.assertEqual(self.running.status, MockExam.STATUS_OPEN)
+        self.assertIsNone(self.running.finished_at)
+
+
+class LeaderboardTests(TestCase):
+    """順位表：インデックス順のページと COUNT の順位が一致し、確定ごとの差分が作り直しと同じ結果になる"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.cohort = Cohort.objects.create(name="c1", title="C1")
+        self.users = [User.objects.create_user(name, password="x") for name in ("taro", "hanako", "jiro")]
+        for user in self.users:
+            CohortMember.objects.create(cohort=self.cohort, user=user)
+
+    def take(self, user, n_correct: int) -> None:
+        exam = mock.start_exam(user, [q.id for q in self.questions], lb.DEFAULT_BLUEPRINT)
+        for i, q in enumerate(self.questions):
+            mock.record_answer(exam, q.id, correct_choice(q) if i < n_correct else wrong_choice(q))
+        mock.finalize_exam(exam)
+
+    def test_page_and_rank_agree(self):
+        taro, hanako, jiro = self.users
+        self.take(taro, 4)
+        self.take(hanako, 7)
+        self.take(jiro, 4)  # taro と同点。先に取った taro が上位
+        self.take(taro, 2)  # 最高点は変わらない
+
+        rows = lb.page(self.cohort.id, lb.METRIC_SCORE, 0)
+        self.assertEqual([(r, e.user_id, e.best_score) for r, e in rows], [(1, hanako.id, 7), (2, taro.id, 4), (3, jiro.id, 4)])
+        for r, e in rows:
+            self.assertEqual(lb.rank(self.cohort.id, lb.METRIC_SCORE, e.user_id), r)
+        self.assertEqual(lb.size(self.cohort.id, lb.METRIC_SCORE), 3)
+
+        ch1 = lb.chapter_metric(1)
+        for r, e in lb.page(self.cohort.id, ch1, 0):
+            self.assertEqual(lb.rank(self.cohort.id, ch1, e.user_id), r)
+        self.assertEqual(lb.rank(self.cohort.id, ch1, hanako.id), 1)  # 1章5問すべて正解
+
+    def test_incremental_matches_rebuild(self):
+        self.take(self.users[0], 3)
+        self.take(self.users[0], 6)
+        self.take(self.users[1], 8)
+
+        def snapshot():
+            return (
+                set(LeaderboardEntry.objects.values_list("user_id", "best_score", "exams")),
+                set(LeaderboardChapter.objects.values_list("user_id", "chapter_num", "correct", "answered", "rate")),
+            )
+
+        before = snapshot()
+        lb.rebuild_entries(self.cohort.id)
+        self.assertEqual(snapshot(), before)
+
+    def test_unranked_user(self):
+        self.take(self.users[0], 3)
+        self.assertIsNone(lb.rank(self.cohort.id, lb.METRIC_SCORE, self.users[2].id))
+        self.assertEqual(lb.size(self.cohort.id, lb.METRIC_SCORE), 1)
+
+
+class ReadinessTests(TestCase):
+    """合格可能性：表示（GET）では UserReadiness の行を作らず、解答の記録で作られる"""
+
+    def setUp(self):
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+
+    def test_read_does_not_write(self):
+        Attempt.objects.create(user=self.user, question=self.questions[0], is_correct=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(readiness.user_stats(self.user.id), {})
+        self.assertFalse(UserReadiness.objects.filter(user=self.user).exists())
+
+    def test_record_attempts_creates_row_from_history(self):
+        q = self.questions[0]
+        Attempt.objects.create(user=self.user, question=q, is_correct=True)
+        Attempt.objects.create(user=self.user, question=q, is_correct=False)
+        readiness.record_attempts(self.user.id, [(q.chapter.num, False)])  # 書き込み済みの今回分を含めて集計
+        self.assertEqual(readiness.user_stats(self.user.id), {str(q.chapter.num): [1, 2]})
+
+        readiness.record_attempts(self.user.id, [(q.chapter.num, True)])
+        self.assertEqual(readiness.user_stats(self.user.id), {str(q.chapter.num): [2, 3]})
+
+
+class DashboardConditionalGetTests(TestCase):
+    """ダッシュボードの条件付きGET：別のプロセスが合格可能性を更新したら、古い ETag でも 200 を返す"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+        self.client.force_login(self.user)
+        q = self.questions[0]
+        Attempt.objects.create(user=self.user, question=q, is_correct=True)
+        readiness.record_attempts(self.user.id, [(q.chapter.num, True)])
+
+    def test_stamp_bumped_elsewhere_returns_200(self):
+        self.client.get("/", secure=True)  # CSRF クッキー（ETag の材料）を受け取る
+        first = self.client.get("/", secure=True)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(self.client.get("/", secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # 別のワーカーが解答を記録した（このプロセスのキャッシュには何も残らない）
+        UserReadiness.objects.filter(user=self.user).update(updated_at=timezone.now() + timedelta(seconds=1))
+
+        again = self.client.get("/", secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], etag)
+
+
+class StaticServeTests(TestCase):
+    """静的ファイルの配信：If-Modified-Since で 304、事前圧縮版そのものへのリクエストは 404"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        with open(os.path.join(self.root, "app.css"), "w") as f:
+            f.write("body { color: red; }\n" * 20)
+        with open(os.path.join(self.root, "app.css.gz"), "wb") as f:
+            f.write(gzip.compress(b"body { color: red; }\n" * 20))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        with self.settings(STATIC_ROOT=self.root):
+            return staticfiles.serve(self.factory.get("/static/" + path, **headers), path)
+
+    def test_if_modified_since(self):
+        first = self.get("app.css", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertEqual(first["Content-Type"], "text/css")
+        first.close()
+
+        again = self.get("app.css", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["Vary"], "Accept-Encoding")
+
+    def test_precompressed_file_is_not_served_directly(self):
+        with self.assertRaises(Http404):
+            self.get("app.css.gz")
+
+
+class OfflineSyncTests(TestCase):
+    """オフライン受験：同期は冪等で、正解キーを渡した模試は順位表・合格可能性に数えない"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+        self.cohort = Cohort.objects.create(name="c1", title="C1")
+        CohortMember.objects.create(cohort=self.cohort, user=self.user)
+        self.exam = mock.start_exam(self.user, [q.id for q in self.questions], lb.DEFAULT_BLUEPRINT, offline=True)
+
+    def test_bundle_keys_and_token(self):
+        bundle = offline.build_bundle(self.exam)
+        q = self.questions[0]
+        row = next(r for r in bundle["questions"] if r["id"] == q.id)
+        self.assertEqual(row["keys"], [offline.answer_key(bundle["salt"], q.id, correct_choice(q).id)])
+        self.assertEqual(offline.read_token(bundle["token"], self.user.id), self.exam.id)
+        self.assertIsNone(offline.read_token(bundle["token"], self.user.id + 1))
+
+    def test_sync_is_idempotent_and_not_ranked(self):
+        q0, q1, q2 = self.questions[:3]
+        answers = [
+            (q0.id, correct_choice(q0).id, 1000),
+            (q0.id, wrong_choice(q0).id, 1000),  # 同じ問題の2件目は捨てる
+            (q1.id, correct_choice(q2).id, 2000),  # 別の問題の選択肢は未選択扱い
+            (q2.id, None, None),
+        ]
+        self.assertEqual(offline.sync_answers(self.exam, answers), (3, True))
+        self.assertEqual(self.exam.score, 1)
+        self.assertEqual(offline.sync_answers(MockExam.objects.get(pk=self.exam.pk), answers), (0, False))
+
+        self.assertEqual(Attempt.objects.filter(user=self.user, mode=Attempt.MODE_OFFLINE).count(), 3)
+        self.assertFalse(Attempt.objects.filter(user=self.user, mode=Attempt.MODE_MOCK).exists())
+        self.assertIsNone(lb.rank(self.cohort.id, lb.METRIC_SCORE, self.user.id))
+        self.assertFalse(UserReadiness.objects.filter(user=self.user).exists())
+
+        lb.rebuild_entries(self.cohort.id)  # 作り直しでも数えない
+        self.assertIsNone(lb.rank(self.cohort.id, lb.METRIC_SCORE, self.user.id))
+        self.assertEqual(readiness.stats_from_attempts([self.user.id]), {})
+
+
+class ProvisionUsersTests(TestCase):
+    """provision_users：パスワードを AUTH_PASSWORD_VALIDATORS で行ごとに検証し、空欄は --allow-unusable のときだけ通す"""
+
+    def provision(self, text: str, *args):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("username,password,email\n" + text)
+        call_command("provision_users", path, "--workers", "1", *args, stdout=io.StringIO())
+
+    def test_weak_and_blank_passwords_are_reported_per_line(self):
+        with self.assertRaises(CommandError) as ctx:
+            self.provision("taro,Kx8-vhq2-Lmw9,\nhanako,12345678,\njiro,,\nsaburo,saburo1,\n")
+        message = str(ctx.exception)
+        self.assertNotIn("2行目", message)
+        self.assertIn("3行目", message)  # 数字だけ・よくあるパスワード
+        self.assertIn("4行目: パスワードが空欄です", message)
+        self.assertIn("5行目", message)  # 短い・ユーザー名に似ている
+        self.assertFalse(User.objects.exists())  # 1件でも不正なら何も作らない
+
+    def test_allow_unusable(self):
+        self.provision("taro,Kx8-vhq2-Lmw9,taro@example.com\njiro,,\n", "--allow-unusable")
+        self.assertTrue(User.objects.get(username="taro").check_password("Kx8-vhq2-Lmw9"))
+        self.assertFalse(User.objects.get(username="jiro").has_usable_password())
+
+
+class PacingTests(TestCase):
+    """解答時間の累計：F() での差分加算が、解答履歴からの作り直しと一致する"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+
+    def snapshot(self):
+        return (
+            set(QuestionPacing.objects.values_list("question_id", "answered", "correct", "total_ms", "slow")),
+            set(ChapterPacing.objects.values_list("chapter_id", "answered", "correct", "total_ms", "slow")),
+        )
+
+    def test_incremental_matches_rebuild(self):
+        slow = pacing.budget_ms() + 1
+        for elapsed in ((1000, slow, None), (3000, 500, 2000)):  # 2回目は同じ問題に加算。None は数えない
+            exam = mock.start_exam(self.user, [q.id for q in self.questions], lb.DEFAULT_BLUEPRINT)
+            for q, ms in zip(self.questions, elapsed):
+                mock.record_answer(exam, q.id, correct_choice(q), elapsed_ms=ms)
+            mock.finalize_exam(exam)
+
+        q0 = QuestionPacing.objects.get(question=self.questions[0])
+        self.assertEqual((q0.answered, q0.correct, q0.total_ms, q0.slow), (2, 2, 4000, 0))
+        self.assertEqual(QuestionPacing.objects.get(question=self.questions[1]).slow, 1)
+
+        before = self.snapshot()
+        pacing.rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+
+class SyntheticDataTests(TestCase):
+    """gen_synthetic：削除は版数を1回だけ進め、解答履歴は今回作ったユーザーにだけ付く"""
+
+    def test_generate_and_purge(self):
+        cache.clear()
+        leftover = User.objects.create_user("synth_9999999", password="x")  # 前回の残り
+        out = io.StringIO()
+        call_command("gen_synthetic", questions=40, users=3, attempts=50, batch=20, stdout=out)
+        self.assertFalse(Attempt.objects.filter(user=leftover).exists())
+        self.assertEqual(Attempt.objects.values("user_id").distinct().count(), 3)
+
+        before = bank_version()
+        call_command("gen_synthetic", purge=True, stdout=out)
+        self.assertEqual(BankState.objects.get(pk=1).version, before + 1)
+        self.assertFalse(Question.objects.exists())
+        self.assertTrue(post_delete.has_listeners(Question))  # 受信は元に戻っている
+
+
+class BenchTemplatesTests(TestCase):
+    """bench_templates：導入前のテンプレートも描画し、設定済みのキャッシュは消さない"""
+
+    def test_keeps_default_cache(self):
+        make_bank()
+        cache.set("bench_sentinel", 1)
+        out = io.StringIO()
+        call_command("bench_templates", iterations=2, stdout=out)
+        self.assertEqual(cache.get("bench_sentinel"), 1)
+        self.assertEqual(out.getvalue().count(" before "), 2)
+
+
+class MockSessionStateTests(TestCase):
+    """模試の画面：選択肢の表示順は模試×問題で固定で、問題ごとのキーをセッションに置かない"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank()
+        self.user = User.objects.create_user("taro", password="x")
+        self.client.force_login(self.user)
+        self.exam = mock.start_exam(self.user, [q.id for q in self.questions], "official")
+        session = self.client.session
+        session["mock_exam_id"] = self.exam.id
+        session["mock_index"] = 0
+        session.save()
+
+    def test_choice_order_is_derived_not_stored(self):
+        q = self.questions[0]
+        first = self.client.get("/mock/session/", secure=True)
+        again = self.client.get("/mock/session/", secure=True)
+        order = [c.id for c in first.context["choices"]]
+        self.assertEqual(order, [c.id for c in again.context["choices"]])
+        self.assertEqual(order, [c.id for c in mock.ordered_choices(self.exam, q.id, q.choices.all())])
+
+        self.client.post("/mock/session/", {"choice": correct_choice(q).id}, secure=True)
+        self.client.post("/mock/session/", {"next": "1"}, secure=True)
+        self.client.get("/mock/session/", secure=True)
+        keys = set(self.client.session.keys())
+        self.assertFalse([k for k in keys if k.startswith("choice_order_")])
+        self.assertLessEqual({k for k in keys if k.startswith("mock_")}, set(mock.mock_session_keys()))
+
+
+class BankImageTests(TestCase):
+    """問題バンクイメージ：書き出したイメージから読んだ内容がDBと一致し、版数が進んだら使わない"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        override = self.settings(EXAM_BANK_IMAGE_DIR=self.dir, EXAM_BANK_IMAGE_AUTO_REBUILD=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.forget_image)
+        self.forget_image()
+
+        self.questions = make_bank(chapters=3, per_chapter=4)
+        judge = self.questions[5]
+        judge.kind, judge.note, judge.stem = Question.KIND_JUDGE, "補足：ノート", "○×問題 — 日本語の本文"
+        judge.save()
+        self.excluded = self.questions[2]
+        self.excluded.is_excluded = True
+        self.excluded.save()
+        cache.clear()  # テスト内では on_commit が走らないので、版数のキャッシュは手で捨てる
+        bank._eligible_memo.clear()  # 同じ版数番号の別テストのメモを使わない
+
+    @staticmethod
+    def forget_image():
+        bank_image._current, bank_image._checked_at = None, 0.0
+
+    def test_round_trip(self):
+        version = bank_version()
+        expected_ids = {ch: list(eligible_ids(ch)) for ch in (1, 2, 3)}  # イメージが無いのでDBから
+        bank_image.build_image(version)
+        self.forget_image()
+        img = bank_image.current_image(version)
+        self.assertIsNotNone(img)
+
+        for q in Question.objects.filter(is_excluded=False).prefetch_related("choices").select_related("chapter"):
+            got = img.question(q.id)
+            self.assertEqual(
+                (got.stem, got.kind, got.note, got.chapter_num),
+                (q.stem, q.kind, q.note, q.chapter.num),
+            )
+            self.assertEqual(
+                [(c.id, c.text, c.is_correct) for c in got.choices],
+                [(c.id, c.text, c.is_correct) for c in q.choices.order_by("id")],
+            )
+        for ch, ids in expected_ids.items():
+            self.assertEqual(list(img.chapter_ids(ch)), ids)
+            self.assertEqual(list(eligible_ids(ch)), ids)  # 版数が一致するのでイメージから
+        self.assertIsNone(img.question(self.excluded.id))
+        self.assertNotIn(self.excluded.id, list(img.chapter_ids(self.excluded.chapter.num)))
+
+    def test_stale_image_is_not_used(self):
+        version = bank_version()
+        bank_image.build_image(version)
+        self.forget_image()
+        self.assertIsNotNone(bank_image.current_image(version))
+
+        bump_bank_version()
+        cache.clear()
+        self.assertEqual(bank_version(), version + 1)
+        self.assertIsNone(bank_image.current_image(bank_version()))
+
+
+class PracticeTests(TestCase):
+    """章別演習：キーセットのカーソルでページをまたいで進み、再開・二重送信・やり直しでカーソルが正しく動く"""
+
+    def setUp(self):
+        cache.clear()
+        self.questions = make_bank(chapters=1, per_chapter=practice.PAGE_SIZE + 5)
+        self.ids = [q.id for q in self.questions]
+        self.user = User.objects.create_user("taro", password="x")
+        self.url = "/practice/1/"
+
+    def answer(self, client, qid: int):
+        q = Question.objects.get(pk=qid)
+        return client.post(self.url, {"qid": qid, "choice": correct_choice(q).id}, secure=True)
+
+    def progress(self) -> PracticeProgress:
+        return PracticeProgress.objects.get(user=self.user, chapter__num=1)
+
+    def test_pages_across_boundary(self):
+        progress = practice.progress_for(self.user, self.questions[0].chapter)
+        seen = []
+        while True:
+            q = practice.next_question(self.user.id, 1, progress.last_id)
+            if q is None:
+                break
+            seen.append(q.id)
+            self.assertEqual(practice.record_practice(progress, q, None), (False, True))
+            progress.refresh_from_db()
+        self.assertEqual(seen, self.ids)  # 2ページ目（PAGE_SIZE 問目の次）も飛ばさず重複しない
+        self.assertEqual(progress.answered, len(self.ids))
+
+    def test_resume_in_new_session(self):
+        self.client.force_login(self.user)
+        for qid in self.ids[:3]:
+            self.answer(self.client, qid)
+
+        cache.clear()  # 別のプロセス（ページのキャッシュなし）
+        other = Client()
+        other.force_login(self.user)  # 別のセッション
+        self.assertEqual(other.get(self.url, secure=True).context["question"].id, self.ids[3])
+
+    def test_resubmit_does_not_record_twice(self):
+        self.client.force_login(self.user)
+        self.answer(self.client, self.ids[0])
+        self.answer(self.client, self.ids[1])
+        again = self.answer(self.client, self.ids[0])  # 別タブ・戻るボタンからの再送信
+
+        self.assertEqual(again.status_code, 302)
+        self.assertEqual(Attempt.objects.filter(user=self.user, question_id=self.ids[0]).count(), 1)
+        self.assertEqual(self.progress().last_id, self.ids[1])
+        self.assertEqual(self.progress().answered, 2)
+
+        q0 = practice.next_question(self.user.id, 1, 0)  # カーソルより前の問題を直接記録しようとしても記録しない
+        self.assertEqual(practice.record_practice(self.progress(), q0, None), (False, False))
+        self.assertEqual(Attempt.objects.filter(user=self.user).count(), 2)
+
+    def test_restart_resets_cursor(self):
+        self.client.force_login(self.user)
+        for qid in self.ids[:2]:
+            self.answer(self.client, qid)
+        self.client.post(self.url, {"restart": "1"}, secure=True)
+
+        progress = self.progress()
+        self.assertEqual((progress.last_id, progress.answered, progress.correct), (0, 0, 0))
+        self.assertEqual(self.client.get(self.url, secure=True).context["question"].id, self.ids[0])
+
+
+class BankValidatorTests(TestCase):
+    """問題ファイルの検査：チャンク境界をまたぐ要素・行番号・壊れた要素・各エラーコード"""
+
+    CHAPTERS = frozenset([1, 2])
+    KINDS = frozenset(["single", "multi", "judge"])
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, text: str, name: str = "bank.json", tail: bytes = b"") -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8") + tail)
+        return path
+
+    @staticmethod
+    def question(**fields) -> dict:
+        q = {
+            "chapter": 1,
+            "kind": "single",
+            "stem": "問題文 — \"引用\" と \\u3042",
+            "is_excluded": False,
+            "choices": [{"text": "正解", "correct": True}, {"text": "誤り", "correct": False}],
+        }
+        q.update(fields)
+        return q
+
+    def test_split_across_chunks(self):
+        items = [self.question(stem=f"Q{i} " + "あ" * i, score=-12.5e-3, flag=None) for i in range(20)]
+        path = self.write(json.dumps(items, ensure_ascii=False, indent=2))
+        for chunk_size in (1, 3, 7, 64, bank_validator.CHUNK_SIZE):
+            with self.subTest(chunk_size=chunk_size):
+                got = list(bank_validator.iter_json_array(path, chunk_size=chunk_size))
+                self.assertEqual([v for _, _, v in got], items)
+                self.assertEqual([i for i, _, _ in got], list(range(20)))
+
+    def test_line_numbers(self):
+        text = '[\n  {"a": 1},\n\n  {"b":\n    2},\n  {"c": "x\\ny"}\n]\n'
+        path = self.write(text)
+        for chunk_size in (1, 5, 1024):
+            with self.subTest(chunk_size=chunk_size):
+                lines = [line for _, line, _ in bank_validator.iter_json_array(path, chunk_size=chunk_size)]
+                self.assertEqual(lines, [2, 4, 6])
+
+    def test_malformed_element_is_reported_without_reading_to_eof(self):
+        # 壊れた要素の後ろに大量の空白と不正なUTF-8を置く。末尾まで読むと UnicodeDecodeError になる
+        text = '[\n  {"a": 1},\n  {"a": 1 "b": 2},\n' + " " * 50000
+        path = self.write(text, tail=b"\xff\xfe]")
+        with self.assertRaises(bank_validator.BankSyntaxError) as raised:
+            list(bank_validator.iter_json_array(path, chunk_size=16))
+        self.assertEqual(raised.exception.line, 3)
+
+        text = "[" + json.dumps(self.question()) + ',\n{"chapter": }]'
+        report = bank_validator.validate_file(self.write(text, name="bad.json"), self.CHAPTERS, self.KINDS)
+        self.assertEqual(report["questions"], 1)
+        self.assertEqual([(i["code"], i["line"], i["index"]) for i in report["issues"]], [("syntax", 2, 1)])
+
+    def test_structure_errors(self):
+        cases = {
+            '{"a": 1}': 1,  # トップレベルが配列ではない
+            '[{"a": 1}\n{"b": 2}]': 2,  # 区切りがない
+            '[{"a": 1},\n': 2,  # 閉じられていない
+        }
+        for text, line in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(bank_validator.BankSyntaxError) as raised:
+                    list(bank_validator.iter_json_array(self.write(text), chunk_size=4))
+                self.assertEqual(raised.exception.line, line)
+
+    def test_each_issue_code(self):
+        dup = [{"text": "同じ", "correct": True}, {"text": " 同じ ", "correct": False}]
+        cases = {
+            "not_object": ["not a question"],
+            "unknown_chapter": self.question(chapter=9),
+            "unknown_kind": self.question(kind="essay"),
+            "empty_stem": self.question(stem="  "),
+            "bad_is_excluded": self.question(is_excluded="yes"),
+            "too_few_choices": self.question(choices=[{"text": "1つだけ", "correct": True}]),
+            "bad_choice": self.question(choices=[{"text": "正解", "correct": True}, "誤り"]),
+            "empty_choice": self.question(choices=[{"text": "正解", "correct": True}, {"text": ""}]),
+            "duplicate_choice": self.question(choices=dup),
+            "no_correct_choice": self.question(choices=[{"text": "a"}, {"text": "b", "correct": "true"}]),
+            "multiple_correct": self.question(choices=[{"text": "a", "correct": True}, {"text": "b", "correct": True}]),
+        }
+        self.assertEqual(bank_validator.validate_question(self.question(), self.CHAPTERS, self.KINDS), [])
+        multi = self.question(kind="multi", choices=cases["multiple_correct"]["choices"])
+        self.assertEqual(bank_validator.validate_question(multi, self.CHAPTERS, self.KINDS), [])  # multi は複数正解でよい
+        for code, q in cases.items():
+            with self.subTest(code=code):
+                issues = bank_validator.validate_question(q, self.CHAPTERS, self.KINDS)
+                self.assertEqual([c for c, _ in issues], [code])
+
+        path = self.write(json.dumps([self.question(), cases["empty_stem"]], indent=1))
+        report = bank_validator.validate_file(path, self.CHAPTERS, self.KINDS)
+        self.assertEqual(report["questions"], 2)
+        self.assertEqual([(i["code"], i["index"]) for i in report["issues"]], [("empty_stem", 1)])
+
+        missing = bank_validator.validate_file(os.path.join(self.dir, "missing.json"), self.CHAPTERS, self.KINDS)
+        self.assertEqual([i["code"] for i in missing["issues"]], ["io"])
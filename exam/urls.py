@@ -10,4 +10,11 @@ urlpatterns = [  # URLパターンのリストを定義開始
     path("mock/start/", views.mock_start, name="mock_start"),  # 模擬試験開始用URL、ビューはmock_start、名前は'mock_start'
     path("mock/session/", views.mock_session, name="mock_session"),  # 模擬試験の問題回答セッション用URL、ビューはmock_session
     path("mock/result/", views.mock_result, name="mock_result"),  # 模擬試験の結果表示用URL、ビューはmock_result
+    path("mock/offline/", views.mock_offline_bundle, name="mock_offline_bundle"),  # オフライン受験の出題パッケージ
+    path("mock/offline/sync/", views.mock_offline_sync, name="mock_offline_sync"),  # オフライン受験の解答の一括同期
+    path("practice/<int:num>/", views.practice_chapter, name="practice_chapter"),  # 章別演習（途中から再開）
+    path("cohorts/<slug:name>/leaderboard/", views.leaderboard, name="leaderboard"),  # グループ内の順位表
+    # スタッフ向け
+    path("export/attempts/", views.attempt_export, name="attempt_export"),  # 解答履歴のストリーミングエクスポート
+    path("staff/profiles/", views.profile_list, name="profile_list"),  # 保存済みプロファイルの一覧
 ]  # urlpatternsリストの終了
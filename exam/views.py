@@ -2,28 +2,53 @@
 
 from __future__ import annotations  # 未来の型注釈仕様を使うためのimport（Python 3.7+で利用可能）
 
-import random  # ランダム操作用モジュール
+import hashlib  # ETag の生成
+import json  # オフライン受験の同期データ
+from datetime import datetime, timezone as dt_timezone  # Last-Modified の日時
 
 from django.contrib.auth.forms import UserCreationForm  # ユーザー登録用フォーム
-from django.shortcuts import render, redirect, get_object_or_404  # ビューでのレンダリング・リダイレクト・存在チェック
+from django.shortcuts import render, redirect  # ビューでのレンダリング・リダイレクト
 from django.contrib.auth.decorators import login_required  # ログイン必須デコレーター
+from django.contrib.admin.views.decorators import staff_member_required  # スタッフ限定デコレーター
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse  # 404・エラー応答・JSON・ストリーミング応答
 from django.contrib import messages  # ユーザへのメッセージ送信機能
+from django.views.decorators.cache import cache_control  # 認証済みページのキャッシュ指示
+from django.views.decorators.http import condition, require_POST, require_safe  # 条件付きGET（304）・メソッド制限
+from django.views.decorators.vary import vary_on_cookie  # セッションごとに内容が変わることを示す
 from django.utils import timezone  # タイムゾーン対応の現在時刻取得
 import logging  # ロギング機能
 
 # ロガーの取得
 logger = logging.getLogger(__name__)
-from django.db.models import Count, Q  # 集約関数Countと条件付きクエリ用Qオブジェクト
 from django.views.decorators.csrf import csrf_protect  # CSRF保護デコレーター
 
-from .models import Question, Choice, Attempt, Chapter  # 自作モデルのインポート
+from .models import Chapter, Cohort, CohortMember, MockExam  # 自作モデルのインポート
 
 from .logic.selector import build_mock_set_ids  # 出題セットIDを作成するロジック関数
 from .logic.quality import quota_deficits, total_quota  # 問題数不足検知や合計問題数計算関数
 from .logic.smart_explain import build_diff_html, extract_hints  # ★追加
-
-
-EXAM_DURATION_SEC = 75 * 60  # 試験時間は75分（秒数に換算）
+from .logic.export import EXPORT_FORMATS, export_queryset, iter_export  # 解答履歴のエクスポート
+from exam_preparation.profiling import recent_profiles  # 保存済みプロファイルの一覧
+from .logic.mock import (  # 模試の台帳（開始・解答記録・確定）
+    EXAM_DURATION_SEC,
+    chapter_breakdown,
+    exam_score,
+    finalize_exam,
+    mock_session_keys,
+    open_exam_for,
+    ordered_choices,
+    record_answer,
+    remaining_seconds,
+    start_exam,
+)
+from .logic import leaderboard as lb  # グループの順位表
+from .logic.readiness import readiness  # 合格可能性の推定
+from .logic import practice  # 章別演習（キーセット方式のページ取得・カーソル）
+from .logic import offline  # オフライン受験（出題パッケージ・一括同期）
+from .logic import pacing  # 問題の表示から解答までの時間
+from .logic.quota import blueprint_choices, quota_plan  # 出題設計（章別出題数）
+from .logic.freshness import user_stamp  # ユーザー固有の内容の更新時刻
+from .logic.bank import bank_state, bank_version, chapter_coverage, load_question  # 問題バンク版数・章別在庫・出題用の問題取得
 
 
 # 進捗パーセントを 0–100 の整数に正規化（%記号なし）
@@ -44,39 +69,94 @@ def _progress_percent(now: int, total: int) -> int:
     return max(0, min(100, pct))  # 0〜100の範囲に収めて返す
 
 
-def _get_shuffled_choices_for_question(request, question):
-    """
-    表示順を毎回ランダム化。ただし同一設問内では固定したいので、
-    セッションに順序(choicesのid列)を保存して再利用する。
-    """
-    key = f"choice_order_{question.id}"  # セッションキーを問題IDに基づいて作成
-    order = request.session.get(key)  # セッションから順序を取得
-    if not order:  # セッションに順序がなければ
-        order = list(question.choices.values_list("id", flat=True))  # 選択肢IDリストを取得
-        random.shuffle(order)  # ランダムに並べ替え
-        request.session[key] = order  # セッションに保存
+# ---- 条件付きGET ----
+# ETag はページの内容を決める状態（問題バンク版数・ユーザー固有の状態）と、
+# ページに埋め込む CSRF トークンの元になるセッション/クッキーから作る。
+# 未表示のメッセージがあるときや、時間切れの判定が必要なときは None を返して通常どおり描画する。
+# Last-Modified は秒単位のため、ブラウザは ETag（If-None-Match、こちらが優先される）で再検証する前提。
+
+
+def _etag(request, *parts) -> str | None:
+    if len(messages.get_messages(request)):
+        return None  # メッセージは表示したら消えるので、キャッシュ済みのページで代用しない
+    raw = "|".join(
+        str(p)
+        for p in (
+            request.user.pk,
+            request.session.session_key,
+            request.META.get("CSRF_COOKIE", ""),
+            *parts,
+        )
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _user_stamp(request) -> float:
+    # ETag と Last-Modified の両方で使うので、1リクエストにつき1回だけ読む
+    if not hasattr(request, "_exam_user_stamp"):
+        request._exam_user_stamp = user_stamp(request.user.pk)
+    return request._exam_user_stamp
+
+
+def _dashboard_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    return _etag(request, "dashboard", bank_version(), _user_stamp(request))
+
+
+def _dashboard_last_modified(request):
+    if not request.user.is_authenticated:
+        return None
+    ts = max(bank_state()[1], _user_stamp(request))
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
 
-    # order に従って並べ替えた Choice インスタンスのリストを返す
-    choices = list(question.choices.all())  # 全選択肢を取得
-    pos = {cid: i for i, cid in enumerate(order)}  # id→順序の辞書作成
-    choices.sort(key=lambda c: pos.get(c.id, 10**9))  # orderに従って並び替え。なければ最後尾扱い
-    return choices
+
+def _session_etag(request):
+    touched = request.session.get("mock_touched")
+    deadline = request.session.get("mock_deadline")
+    if not request.user.is_authenticated or touched is None or deadline is None:
+        return None
+    if timezone.now().timestamp() >= deadline:
+        return None  # 時間切れ（ビューで結果画面へリダイレクトさせる）
+    return _etag(
+        request,
+        "mock",
+        bank_version(),
+        request.session.get("mock_exam_id"),
+        request.session.get("mock_index", 0),
+        touched,
+    )
+
+
+def _session_last_modified(request):
+    touched = request.session.get("mock_touched")
+    if not request.user.is_authenticated or touched is None:
+        return None
+    return datetime.fromtimestamp(max(bank_state()[1], touched), tz=dt_timezone.utc)
+
+
+def _touch_mock(request) -> None:
+    # 出題状態（問題番号・解答・スコア）が変わったら呼ぶ。以後の条件付きGETで新しい内容を返させる
+    request.session["mock_touched"] = timezone.now().timestamp()
 
 
 @login_required  # ログイン必須
+@cache_control(private=True, no_cache=True)  # 共有キャッシュには置かせず、ブラウザは毎回再検証する
+@vary_on_cookie
+@condition(etag_func=_dashboard_etag, last_modified_func=_dashboard_last_modified)
 def dashboard(request):
-    q_count = Question.objects.filter(is_excluded=False).count()
-    # 除外されていない問題の総数を取得
+    plan = quota_plan()  # 既定の出題設計（公式配点。版数単位でキャッシュ）
+
+    ch_coverage = [dict(ch, quota=plan.get(ch["num"])) for ch in chapter_coverage()]
+    # 章ごとに出題可能な問題数(n)と出題数(quota)を章番号順に並べたもの（問題バンク版数単位でキャッシュ）
 
-    ch_coverage = Chapter.objects.annotate(
-        n=Count("question", filter=Q(question__is_excluded=False))
-    ).order_by("num")
-    # 章ごとに出題可能な問題数(n)を集計し、章番号順に並べる
+    q_count = sum(ch["n"] for ch in ch_coverage)
+    # 除外されていない問題の総数（全問題はいずれかの章に属する）
 
-    total_quota_val = sum(ch.official_quota for ch in ch_coverage)
-    # 全章の公式問題数合計を計算
+    total_quota_val = plan.total
+    # 全章の出題数合計（selector / quality と同じ設計から算出）
 
-    total_stock_for_quota = sum(min(ch.n, ch.official_quota) for ch in ch_coverage)
+    total_stock_for_quota = sum(min(ch["n"], ch["quota"]) for ch in ch_coverage)
     # 問題数と問題数の少ない方を足し合わせた実際の出題可能数合計
 
     deficits = quota_deficits()  # 問題数不足の章のリストを取得（カスタム関数）
@@ -92,6 +172,9 @@ def dashboard(request):
             "total_stock_for_quota": total_stock_for_quota,
             "deficits": deficits,  # 問題数不足章情報
             "has_deficit": has_deficit,  # 不足有無フラグ
+            "bank_version": bank_version(),  # 章別表のフラグメントキャッシュのキー
+            "blueprints": blueprint_choices(),  # 選べる出題設計（2つ以上あれば開始ボタンを並べる）
+            "readiness": readiness(request.user.id),  # 合格可能性（UserReadiness の1行から推定）
         },
     )
 
@@ -113,15 +196,17 @@ def signup(request):
 
 @login_required
 def mock_start(request):
+    blueprint = quota_plan(request.GET.get("blueprint")).name  # 出題設計（不明な名前は既定）
+
     # ★ 追加：開始前チェック
-    deficits = quota_deficits()  # 問題数不足章を確認
+    deficits = quota_deficits(blueprint)  # 問題数不足章を確認
     if deficits:
         msg = "問題数不足の章があります：" + ", ".join(
             [f"Ch{d['ch']}不足{d['lack']}" for d in deficits]
         )  # 不足章のメッセージ作成
         messages.warning(request, msg)  # 警告メッセージ表示
 
-    ids = build_mock_set_ids()  # 出題問題IDリストを作成
+    ids = build_mock_set_ids(blueprint, request.user.id)  # 出題問題IDリストを作成（未解答の問題を優先）
     if not ids:
         messages.error(
             request, "出題可能な問題がありません。管理画面から問題を追加してください。"
@@ -129,43 +214,38 @@ def mock_start(request):
         return redirect("dashboard")  # ダッシュボードに戻る
 
     # ★ 追加：40問に満たない場合の注意
-    intended = total_quota()  # 想定問題数（通常40問）
+    intended = total_quota(blueprint)  # 想定問題数（公式配点なら40問）
     if len(ids) < intended:
         messages.warning(
             request,
             f"今回は {len(ids)}問です（想定 {intended}問）。不足章のため減少しています。",
         )  # 不足のため問題数が減っている警告
 
-    request.session["mock_ids"] = ids  # 問題IDリストをセッションに保存
+    _clear_mock_session(request)  # 前回の模試の残りを消す
+    exam = start_exam(request.user, ids, blueprint)  # 出題セット・開始時刻を模試の台帳に保存
+    request.session["mock_exam_id"] = exam.id  # 受験中の模試ID
     request.session["mock_index"] = 0  # 現在の問題番号を0に初期化
-    request.session["mock_correct"] = 0  # 正解数を0に初期化
-    request.session["mock_started_at"] = timezone.now().timestamp()  # 開始時刻を保存
+    request.session["mock_deadline"] = exam.started_at.timestamp() + EXAM_DURATION_SEC  # 終了時刻
+    pacing.mark_shown(request.session, "mock_shown", ids[0])  # 1問目の解答時間の起点
+    _touch_mock(request)
     return redirect("mock_session")  # 問題回答画面へリダイレクト
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@vary_on_cookie
+@condition(etag_func=_session_etag, last_modified_func=_session_last_modified)
 def mock_session(request):
-    ids = request.session.get("mock_ids")  # 出題問題IDリストをセッションから取得
+    exam = open_exam_for(request.user, request.session.get("mock_exam_id"))  # 受験中の模試
     idx = request.session.get("mock_index", 0)  # 現在の問題番号（デフォルト0）
-    correct_total = request.session.get("mock_correct", 0)  # 現時点の正解数
-    started_at_ts = request.session.get("mock_started_at")  # 試験開始タイムスタンプ
 
-    if not ids:
-        messages.info(request, "モックを開始してください。")  # 出題セットなしなら案内
+    if exam is None or exam.status != MockExam.STATUS_OPEN:
+        messages.info(request, "モックを開始してください。")  # 受験中の模試なしなら案内
         return redirect("dashboard")  # ダッシュボードへ
+    ids = exam.question_ids  # 出題順の問題IDリスト
 
-    # 残り時間の計算（サーバ側で毎回チェック）
-    if started_at_ts is None:
-        request.session["mock_started_at"] = timezone.now().timestamp()  # 開始時刻をセット
-        started_at_ts = request.session["mock_started_at"]
-
-    try:
-        elapsed = max(0, int(timezone.now().timestamp() - float(started_at_ts)))
-        # 経過秒数を計算。マイナス防止のためmaxで0以上
-    except Exception:
-        elapsed = 0  # 失敗時は0秒経過とみなす
-
-    remaining = max(0, EXAM_DURATION_SEC - elapsed)  # 残り秒数計算（0未満にならない）
+    # 残り時間の計算（サーバ側で毎回チェック。起点は台帳の開始日時）
+    remaining = remaining_seconds(exam)
     if remaining <= 0:
         return redirect("mock_result")  # 時間切れなら結果画面へ
 
@@ -173,56 +253,57 @@ def mock_session(request):
     if idx >= len(ids):
         return redirect("mock_result")  # 問題全回答済なら結果画面へ
 
-    q = get_object_or_404(Question, pk=ids[idx])  # 現在の問題を取得（存在しなければ404）
+    loaded = load_question(ids[idx])  # 現在の問題と選択肢を取得（イメージがあればDBを使わない）
+    if loaded is None:
+        raise Http404("問題が見つかりません")  # 存在しなければ404
+    q, all_choices = loaded
+    choices = ordered_choices(exam, q.id, all_choices)  # 表示順に並べた選択肢（模試×問題で固定。以降はこのリストを参照）
 
     judged = False  # 採点済みフラグ初期化
     was_correct = False  # 正誤フラグ初期化
     chosen_id = None  # 選択された選択肢ID初期化
-    # （関数先頭のローカル変数に追加しておくと楽）
     smart_diff_html = ""
     smart_hints = []
-    chosen = None  # ★ 既存に無ければ先に定義
-
 
     if request.method == 'POST':
+        if 'next' in request.POST:
+            # 「次へ」は採点済みの設問から進むだけ（再採点しない）
+            request.session['mock_index'] = idx + 1
+            if idx + 1 < len(ids):
+                pacing.mark_shown(request.session, "mock_shown", ids[idx + 1])  # 次の問題の解答時間の起点
+            _touch_mock(request)
+            return redirect('mock_session')
+
         chosen_id = request.POST.get('choice')
-        if chosen_id is None and 'next' not in request.POST:
+        if chosen_id is None:
             messages.warning(request, "選択肢を選んでください。")
         else:
-            chosen = None
-            if chosen_id:
-                try:
-                    chosen = Choice.objects.get(pk=chosen_id, question=q)
-                except Choice.DoesNotExist:
-                    chosen = None
-
-            was_correct = bool(chosen and chosen.is_correct)
+            chosen = next((c for c in choices if str(c.id) == chosen_id), None)
+            # 取得済みの選択肢から探す（他の設問の選択肢IDが送られてもNone）
+
+            # 台帳に記録（二重送信・再読み込みでは最初の解答が返り、スコアは増えない）
+            answer = record_answer(
+                exam, q.id, chosen, pacing.elapsed_since_shown(request.session, "mock_shown", q.id)
+            )
+            _touch_mock(request)  # 解答後はスコア表示が変わる
+            chosen_id = answer.choice_id
+            chosen = next((c for c in choices if c.id == chosen_id), None)
+            was_correct = answer.is_correct
             judged = True
 
-            # Attempt保存 …（既存のまま）
-
-            if was_correct:
-                correct_total += 1
-                request.session['mock_correct'] = correct_total
-            else:
+            if not was_correct:
                 # ★ ここがスマート解説の肝：差分とヒントを生成
-                correct_text = " / ".join(
-                    q.choices.filter(is_correct=True).values_list("text", flat=True)
-                )
+                correct_text = " / ".join(c.text for c in choices if c.is_correct)
                 chosen_text = chosen.text if chosen else ""
                 smart_diff_html = build_diff_html(chosen_text, correct_text)
                 smart_hints = extract_hints(q.stem, correct_text)
 
-            if 'next' in request.POST:
-                request.session['mock_index'] = idx + 1
-                return redirect('mock_session')
-
 
     # 進捗（%はサーバ側で算出してテンプレへ）
     progress = {
         "now": idx + 1,  # 現在の問題番号（1始まり表示）
         "total": len(ids),  # 問題総数
-        "score": correct_total,  # 現時点の正解数
+        "score": exam_score(exam),  # 現時点の正解数（台帳から集計）
         "percent": _progress_percent(idx, len(ids)),  # 現在問題に入る前の達成率（0〜100）
     }
 
@@ -233,8 +314,11 @@ def mock_session(request):
         "chosen_id": int(chosen_id) if chosen_id else None,
         "progress": progress,
         "remaining_sec": remaining,
+        "deadline_ms": int((exam.started_at.timestamp() + EXAM_DURATION_SEC) * 1000),  # 304 で再利用されても正しく数える
         "duration_sec": EXAM_DURATION_SEC,
-        "choices": _get_shuffled_choices_for_question(request, q),  # 既存
+        "choices": choices,  # 表示順の選択肢
+        "answer_key": [c for c in choices if c.is_correct],  # 正解の選択肢（追加クエリなし）
+        "bank_version": bank_version(),  # 問題文・解説のフラグメントキャッシュのキー
         "smart_diff_html": smart_diff_html,  # ★追加
         "smart_hints": smart_hints,          # ★追加
     })
@@ -243,37 +327,227 @@ def mock_session(request):
 @login_required
 def mock_result(request):
     """
-    結果画面：スコアと簡単な章別内訳（正規化せず、直近セッションの Attempt から概算）
+    結果画面：スコアと章別内訳（今回の模試の解答台帳から集計）
+    受験中なら確定させ、解答履歴（Attempt）をまとめて書き込む。再読み込みしても確定は1回だけ。
     """
-    ids = request.session.get("mock_ids") or []  # 問題IDリストを取得、なければ空リスト
-    total = len(ids)  # 問題数
-    score = request.session.get("mock_correct", 0)  # 正解数
-
-    # 章別内訳（今回の mock のみを対象に粗集計）
-    attempts = Attempt.objects.filter(
-        user=request.user, mode=Attempt.MODE_MOCK
-    ).order_by("-answered_at")[
-        :total
-    ]  # 直近 total 件の回答履歴を取得
-
-    ch_stat: dict[int, dict[str, int]] = {}  # 章ごとの正解数・回答数を格納する辞書
-    for at in attempts:
-        ch = at.question.chapter.num  # 回答問題の章番号
-        if ch not in ch_stat:
-            ch_stat[ch] = {"c": 0, "n": 0}  # 初期化
-        ch_stat[ch]["n"] += 1  # 回答数を加算
-        ch_stat[ch]["c"] += int(at.is_correct)  # 正解数を加算（Trueは1、Falseは0）
-
-    # セッションをクリア（任意）
-    for k in ("mock_ids", "mock_index", "mock_correct"):
-        request.session.pop(k, None)  # セッションから出題情報を削除
+    exam = open_exam_for(request.user, request.session.get("mock_exam_id"))
+    if exam is None:
+        messages.info(request, "モックを開始してください。")
+        return redirect("dashboard")
+
+    finalize_exam(exam)  # 確定済みなら何もしない
+    _clear_mock_session(request, keep_exam=True)  # 出題状態を削除（結果の再表示用にIDは残す）
 
     return render(
         request,
         "exam/result.html",  # 結果画面テンプレート
         {
-            "total": total,  # 問題総数
-            "score": score,  # 正解数
-            "ch_stat": ch_stat,  # 章別統計
+            "total": len(exam.question_ids),  # 問題総数
+            "score": exam.score,  # 正解数（台帳から確定）
+            "ch_stat": chapter_breakdown(exam),  # 章別統計
+        },
+    )
+
+
+@login_required
+@require_safe
+@cache_control(private=True, no_store=True)
+def mock_offline_bundle(request):
+    """
+    オフライン受験用の出題パッケージ（JSON）を返し、模試を開始する。
+    端末で解き終えたら mock_offline_sync に解答をまとめて送る（1回の模試でリクエストは2回）。
+    パッケージの正解キーから正解を割り出せるため、この模試は練習扱い（順位表・合格可能性に数えない）。
+    """
+    blueprint = quota_plan(request.GET.get("blueprint")).name
+    ids = build_mock_set_ids(blueprint, request.user.id)
+    if not ids:
+        return JsonResponse({"error": "出題可能な問題がありません。"}, status=503)
+    exam = start_exam(request.user, ids, blueprint, offline=True)  # セッションの出題状態は使わない。順位表・合格可能性には数えない
+    return JsonResponse(
+        offline.build_bundle(exam),
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+@login_required
+@require_POST
+def mock_offline_sync(request):
+    """
+    オフラインで解いた模試の解答を一括で受け取り、採点・確定して結果を返す。
+    本文: {"token": 出題パッケージの token, "answers": [[問題ID, 選択肢ID または null, 解答ミリ秒（省略可）], ...]}
+    通信が途切れて再送されても、確定済みなら同じ結果を返す。
+    """
+    try:
+        body = json.loads(request.body)
+        answers = [
+            (int(row[0]), int(row[1]) if row[1] is not None else None, pacing.clamp_ms(row[2]) if len(row) > 2 else None)
+            for row in body["answers"]
+        ]
+        token = str(body["token"])
+    except (ValueError, TypeError, KeyError, IndexError):
+        return JsonResponse({"error": "送信データの形式が正しくありません。"}, status=400)
+
+    exam = open_exam_for(request.user, offline.read_token(token, request.user.id))
+    if exam is None:
+        return JsonResponse({"error": "模試が見つからないか、同期の期限を過ぎています。"}, status=404)
+
+    accepted, finalized = offline.sync_answers(exam, answers)
+    return JsonResponse(
+        {
+            "exam": exam.id,
+            "status": exam.status,
+            "score": exam.score,
+            "total": len(exam.question_ids),
+            "accepted": accepted,
+            "finalized": finalized,
+            "chapters": chapter_breakdown(exam),
         },
+        json_dumps_params={"ensure_ascii": False},
     )
+
+
+def _clear_mock_session(request, keep_exam: bool = False) -> None:
+    """模試の出題状態（問題番号・期限など）をセッションから削除する"""
+    for k in mock_session_keys(include_exam=not keep_exam):
+        request.session.pop(k, None)
+
+
+@login_required
+def practice_chapter(request, num):
+    """
+    章別演習。章の出題対象を問題ID順に1問ずつ解く。進捗はカーソル（最後に解答した問題ID）で保存し、途中から再開できる。
+    POST choice=... で解答、POST restart=1 で章の最初から。
+    """
+    chapter = Chapter.objects.filter(num=num).first()
+    if chapter is None:
+        raise Http404("章が見つかりません")
+    progress = practice.progress_for(request.user, chapter)
+
+    if request.method == "POST" and "restart" in request.POST:
+        practice.restart(progress)
+        return redirect("practice_chapter", num=num)
+
+    q = practice.next_question(request.user.id, num, progress.last_id)
+    context = {
+        "chapter": chapter,
+        "progress": progress,
+        "question": q,
+        "judged": False,
+        "bank_version": bank_version(),  # 問題文・解説のフラグメントキャッシュのキー
+    }
+    if q is None:
+        return render(request, "exam/practice.html", context)  # 章の最後まで解き終えた
+
+    choices = practice.ordered_choices(request.user.id, q)
+    context.update(choices=choices, answer_key=[c for c in choices if c.is_correct])
+
+    if request.method == "POST":
+        if request.POST.get("qid") != str(q.id):
+            return redirect("practice_chapter", num=num)  # 解答済みの問題の再送信（カーソルは先へ進んでいる）
+        chosen_id = request.POST.get("choice")
+        if chosen_id is None:
+            messages.warning(request, "選択肢を選んでください。")
+        else:
+            chosen = next((c for c in choices if str(c.id) == chosen_id), None)
+            was_correct, _ = practice.record_practice(
+                progress, q, chosen, pacing.elapsed_from_token(request.POST.get("shown"), q.id)
+            )
+            progress.refresh_from_db(fields=["answered", "correct"])
+            context.update(judged=True, was_correct=was_correct, chosen_id=chosen.id if chosen else None)
+            if not was_correct:
+                correct_text = " / ".join(c.text for c in choices if c.is_correct)
+                context.update(
+                    smart_diff_html=build_diff_html(chosen.text if chosen else "", correct_text),
+                    smart_hints=extract_hints(q.stem, correct_text),
+                )
+
+    context["shown"] = request.POST.get("shown") or pacing.shown_token(q.id)  # 解答時間の起点（エラー再表示では引き継ぐ）
+    return render(request, "exam/practice.html", context)
+
+
+@login_required
+def leaderboard(request, name):
+    """
+    グループ内の順位表。?metric=score（公式配点の模試の最高点）または ch<章番号>（章の正答率）、?page=N。
+    スタッフとグループの所属者だけが見られる。ページ・順位・人数は並び順のインデックスで引く（全件は読まない）。
+    """
+    cohort = Cohort.objects.filter(name=name).first()
+    if cohort is None or not (
+        request.user.is_staff
+        or CohortMember.objects.filter(cohort=cohort, user=request.user).exists()
+    ):
+        raise Http404("グループが見つかりません")
+
+    metric = request.GET.get("metric", lb.METRIC_SCORE)
+    if metric not in lb.metrics():
+        metric = lb.METRIC_SCORE
+    try:
+        page = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        page = 1
+
+    entries = []
+    for rank, row in lb.page(cohort.id, metric, (page - 1) * lb.PAGE_SIZE):
+        if metric == lb.METRIC_SCORE:
+            value = f"{row.best_score}点"
+        else:
+            value = f"{round(row.rate * 100)}%（{row.correct}/{row.answered}）"
+        entries.append({"rank": rank, "user_id": row.user_id, "username": row.user.username, "value": value})
+    size = lb.size(cohort.id, metric)
+
+    return render(
+        request,
+        "exam/leaderboard.html",
+        {
+            "cohort": cohort,
+            "metric": metric,
+            "metrics": lb.metrics(),
+            "entries": entries,
+            "my_rank": lb.rank(cohort.id, metric, request.user.id),  # 並び順のインデックス上の COUNT
+            "size": size,
+            "page": page,
+            "has_prev": page > 1,
+            "has_next": page * lb.PAGE_SIZE < size,
+        },
+    )
+
+
+@staff_member_required
+def attempt_export(request):
+    """
+    解答履歴（Attempt）のストリーミングエクスポート（スタッフ限定）。
+    例: /export/attempts/?user=alice&from=2025-10-01&to=2025-10-31&mode=mock&chapter=3&format=csv
+    行は values_list + iterator でチャンク単位に流すため、件数によらずメモリ使用量は一定。
+    """
+    fmt = request.GET.get("format", "csv")  # 出力形式（csv / coljson）
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("format は csv または coljson を指定してください。")
+    try:
+        chapter = int(request.GET["chapter"]) if request.GET.get("chapter") else None
+        qs = export_queryset(
+            user=request.GET.get("user"),
+            since=request.GET.get("from"),
+            until=request.GET.get("to"),
+            mode=request.GET.get("mode"),
+            chapter=chapter,
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))  # 日付・章番号の形式エラー
+
+    if fmt == "coljson":
+        content_type, ext = "application/x-ndjson; charset=utf-8", "ndjson"
+    else:
+        content_type, ext = "text/csv; charset=utf-8", "csv"
+    response = StreamingHttpResponse(iter_export(qs, fmt), content_type=content_type)
+    stamp = timezone.localtime().strftime("%Y%m%d%H%M%S")
+    response["Content-Disposition"] = f'attachment; filename="attempts_{stamp}.{ext}"'
+    return response
+
+
+@staff_member_required
+def profile_list(request):
+    """
+    保存済みプロファイルの一覧（スタッフ限定）。各リクエストの所要時間・SQL件数と上位の重い関数を表示する。
+    計測は任意のページに ?_profile=1 を付けてアクセスすると行われる。
+    """
+    return render(request, "exam/profiles.html", {"profiles": recent_profiles()})
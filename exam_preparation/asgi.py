@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "exam_preparation.settings")
+# リクエストを受けるプロセスの印（ウォームアップ・模試の掃除スレッドを動かす。0 で無効）。設定の読み込み前に立てる
+os.environ.setdefault("EXAM_SERVER_PROCESS", "1")
 
 application = get_asgi_application()
@@ -0,0 +1,123 @@
+# exam_preparation/exam_preparation/log.py
+
+"""
+非同期（キュー経由）の構造化ログ。
+
+リクエストスレッドは QueueHandler でレコードをキューに積むだけにし、
+ファイルへの書き込み（JSON Lines）はバックグラウンドの QueueListener が行う。
+ディスクが詰まってもリクエスト処理はブロックされない。
+"""
+
+import atexit  # プロセス終了時にキューを書き切るため
+import contextvars  # リクエスト単位の文脈（ID・ユーザー・ビュー）の保持
+import copy  # キューに積むレコードの複製
+import json  # JSON Lines 形式の出力
+import logging  # 標準ロギング
+import logging.handlers  # QueueHandler / QueueListener / WatchedFileHandler
+import os  # 書き込みスレッドを起動したプロセスの判定
+import queue  # スレッド間キュー
+import threading  # 書き込みスレッドの起動の排他
+from datetime import datetime, timezone  # タイムスタンプの整形
+
+# リクエスト単位の文脈。ミドルウェアが設定し、ログフィルタがレコードに書き写す
+request_id_var = contextvars.ContextVar("request_id", default="-")
+user_var = contextvars.ContextVar("user", default="-")
+view_var = contextvars.ContextVar("view", default="-")
+
+# JSONに出力する追加フィールド（extra= で渡されたもの）
+EXTRA_FIELDS = ("request_id", "user", "view", "method", "path", "status", "latency_ms")
+
+
+class RequestContextFilter(logging.Filter):
+    """リクエストスレッド側でレコードに request_id / user / view を付与するフィルタ"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        if not hasattr(record, "user"):
+            record.user = user_var.get()
+        if not hasattr(record, "view"):
+            record.view = view_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード＝1行のJSONに整形するフォーマッタ"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "process": record.process,
+        }
+        for key in EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class QueueFileHandler(logging.handlers.QueueHandler):
+    """
+    dictConfig から使えるキュー型ファイルハンドラ（Python 3.11 の dictConfig は queue 指定に未対応のため自前で組む）。
+
+    書き込みスレッド（QueueListener）はプロセスごとに、そのプロセスで最初のレコードを受けたときに起動する。
+    dictConfig の時点で起動すると、gunicorn --preload などで設定後に fork したワーカーには
+    スレッドが無く、キューに積まれたレコードが書かれないため。
+    書き込み先は WatchedFileHandler（追記のみ）。複数のワーカーが同じファイルを開くため、プロセス内で
+    ローテーションはせず logrotate などの外部ツールに任せる（移動されたら次の書き込みで開き直す）。
+    """
+
+    def __init__(self, filename, encoding="utf-8"):
+        super().__init__(queue.SimpleQueue())
+        self.filename = filename
+        self.encoding = encoding
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self._stop)  # 終了時に残りを書き切ってからスレッドを止める
+
+    def _after_fork(self) -> None:
+        # 親のスレッド・キュー・ロックは子に引き継がれないものとして作り直す
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            target = logging.handlers.WatchedFileHandler(self.filename, encoding=self.encoding, delay=True)
+            target.setFormatter(JsonFormatter())
+            self.listener = logging.handlers.QueueListener(self.queue, target, respect_handler_level=False)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def _stop(self) -> None:
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        self.queue.put_nowait(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 既定の prepare は文字列化してしまうため、構造化フィールドを残したまま引数だけ確定させる
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
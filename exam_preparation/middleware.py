@@ -0,0 +1,136 @@
+# exam_preparation/exam_preparation/middleware.py
+
+import cProfile  # リクエスト単位のプロファイル
+import logging  # アクセスログの出力
+import time  # 処理時間の計測
+import uuid  # リクエストIDの採番
+
+from django.conf import settings  # プロファイラの有効化・レート制限の設定値
+from django.core.cache import cache  # レート制限のカウンタ
+from django.db import connection  # 発行SQLの記録
+from django.utils import timezone  # プロファイルIDの時刻部分
+
+from .log import request_id_var, user_var, view_var  # リクエスト単位のログ文脈
+from .profiling import save_profile  # プロファイル結果の保存
+
+logger = logging.getLogger("exam.request")
+
+
+class RequestLogMiddleware:
+    """
+    リクエストごとに request_id / user / view をログ文脈に設定し、
+    完了時に1行の構造化アクセスログ（ステータス・処理時間）を出力する。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        # 上流（プロキシ等）が付けたIDがあれば引き継ぐ
+        rid = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        tokens = [request_id_var.set(rid), view_var.set("-")]
+        request.request_id = rid
+
+        user = getattr(request, "user", None)
+        tokens.append(user_var.set(user.get_username() if user is not None and user.is_authenticated else "-"))
+        try:
+            response = self.get_response(request)
+            response["X-Request-ID"] = rid
+            logger.info(
+                "%s %s %s",
+                request.method,
+                request.path,
+                response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            return response
+        finally:
+            for var, token in zip((request_id_var, view_var, user_var), tokens):
+                var.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # URL名（なければ関数名）をログ文脈に設定
+        match = request.resolver_match
+        view_var.set(match.view_name if match and match.view_name else view_func.__name__)
+        return None
+
+
+class ProfilerMiddleware:
+    """
+    スタッフが ?_profile=1 またはヘッダ X-Profile: 1 を付けたリクエストだけを cProfile で計測し、
+    発行SQLと合わせて logs/profiles/ に保存する。
+    1分あたりの計測回数は PROFILER_RATE_PER_MIN で制限するため、本番で有効にしたままでも負荷は限定的。
+    回数は Django のキャッシュで数える。既定の LocMemCache はプロセスごとなので上限もワーカーごと
+    （全体では PROFILER_RATE_PER_MIN × ワーカー数）。Redis などの共有キャッシュを CACHES に設定すれば全体での上限になる。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "PROFILER_ENABLED", True)
+        self.rate = getattr(settings, "PROFILER_RATE_PER_MIN", 6)
+
+    def __call__(self, request):
+        if not self._wanted(request) or not self._acquire():
+            return self.get_response(request)
+
+        queries = []
+
+        def record_sql(execute, sql, params, many, context):
+            # 発行SQLと所要時間を記録（パラメータは個人情報を含みうるので残さない）
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({"sql": sql, "ms": round((time.perf_counter() - t0) * 1000, 3)})
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(record_sql):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        match = request.resolver_match
+        profile_id = f"{timezone.now():%Y%m%d%H%M%S%f}_{uuid.uuid4().hex[:6]}"
+        save_profile(
+            profile_id,
+            profiler,
+            {
+                "at": timezone.now().isoformat(),
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": match.view_name if match else "-",
+                "user": request.user.get_username(),
+                "status": response.status_code,
+                "total_ms": elapsed_ms,
+            },
+            queries,
+        )
+        response["X-Profile-Id"] = profile_id
+        return response
+
+    def _wanted(self, request) -> bool:
+        if not self.enabled:
+            return False
+        if request.GET.get("_profile") != "1" and request.headers.get("X-Profile") != "1":
+            return False
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
+
+    def _acquire(self) -> bool:
+        # 分単位の固定窓でカウントし、上限を超えたら計測しない（数えるのはキャッシュを共有するプロセスの範囲）
+        key = f"exam:profiler:{int(time.time() // 60)}"
+        cache.add(key, 0, 120)
+        try:
+            return cache.incr(key) <= self.rate
+        except ValueError:
+            return False
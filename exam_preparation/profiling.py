@@ -0,0 +1,73 @@
+# exam_preparation/exam_preparation/profiling.py
+
+"""
+スタッフ向けのリクエスト単位プロファイラ。
+
+ProfilerMiddleware が cProfile で計測した結果（.prof）と、発行SQL・上位関数の要約（.json）を
+logs/profiles/ に保存する。一覧は exam の profile_list ビューで参照する。
+"""
+
+import io  # pstats の出力先
+import json  # 要約の保存・読み込み
+import pstats  # プロファイル結果の集計
+from pathlib import Path  # パス操作
+from typing import Dict, List  # 型アノテーション
+
+from django.conf import settings  # 保存先・保持件数の設定値
+
+TOP_N = 20  # 要約に残す上位関数の数
+
+
+def profile_dir() -> Path:
+    """保存先ディレクトリ（settings.PROFILER_DIR）"""
+    return Path(getattr(settings, "PROFILER_DIR", Path(settings.BASE_DIR) / "logs" / "profiles"))
+
+
+def top_functions(stats: pstats.Stats, n: int = TOP_N) -> List[Dict]:
+    """累積時間の大きい順に上位n関数を返す"""
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append(
+            {
+                "func": f"{Path(filename).name}:{line}({func})",
+                "calls": nc,
+                "tottime_ms": round(tt * 1000, 3),
+                "cumtime_ms": round(ct * 1000, 3),
+            }
+        )
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:n]
+
+
+def save_profile(profile_id: str, profiler, meta: Dict, queries: List[Dict]) -> Path:
+    """プロファイル本体（.prof）と要約（.json）を保存し、古いものを保持件数まで削除する"""
+    out = profile_dir()
+    out.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(out / f"{profile_id}.prof")  # snakeviz 等でそのまま開ける
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    summary = dict(meta)
+    summary["id"] = profile_id
+    summary["queries"] = queries
+    summary["query_count"] = len(queries)
+    summary["query_ms"] = round(sum(q["ms"] for q in queries), 3)
+    summary["top"] = top_functions(stats)
+    path = out / f"{profile_id}.json"
+    path.write_text(json.dumps(summary, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    keep = getattr(settings, "PROFILER_KEEP", 200)
+    for old in sorted(out.glob("*.json"), reverse=True)[keep:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+    return path
+
+
+def recent_profiles(limit: int = 50) -> List[Dict]:
+    """新しい順に要約を返す（IDは時刻から始まるのでファイル名順＝時刻順）"""
+    rows = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True)[:limit]:
+        try:
+            rows.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue  # 書き込み途中・破損ファイルは無視
+    return rows
@@ -92,6 +92,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "exam_preparation.middleware.RequestLogMiddleware",  # リクエストID・ユーザー・処理時間の構造化ログ
+    "exam_preparation.middleware.ProfilerMiddleware",  # スタッフ限定のリクエスト単位プロファイラ
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -171,13 +173,42 @@ LOCALE_PATHS = [
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# collectstatic で内容ハッシュ付きのファイル名と .gz / .br（brotli があれば）を書き出す
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "exam_preparation.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+# 前段のWebサーバーが /static/ を配信しない場合、Django が事前圧縮版＋immutable キャッシュで配信する
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'True').lower() == 'true'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# 問題バンク
+EXAM_BANK_VERSION_TTL = int(os.getenv('EXAM_BANK_VERSION_TTL', 5))  # 版数キャッシュの有効秒数
+EXAM_BANK_IMAGE_DIR = BASE_DIR / "bankimage"  # build_bank_image の出力先（全ワーカーでメモリマップ）
+EXAM_BANK_IMAGE_AUTO_REBUILD = os.getenv('EXAM_BANK_IMAGE_AUTO_REBUILD', 'True').lower() == 'true'  # 版数更新時にイメージを作り直す
+
+EXAM_WARMUP = os.getenv('EXAM_WARMUP', 'False').lower() == 'true'  # 起動時に問題バンク・テンプレート等を読み込んでおく
+# リクエストを受けるプロセスか（ウォームアップ・プロセス内の掃除を動かすか）。wsgi.py / asgi.py が 1 にする
+EXAM_SERVER_PROCESS = os.getenv('EXAM_SERVER_PROCESS', '0').lower() in ('1', 'true')
+
+# 放置された模試の掃除（制限時間切れの模試を確定する。セッションには触らない）
+EXAM_SWEEP_INTERVAL = int(os.getenv('EXAM_SWEEP_INTERVAL', 0))  # プロセス内の実行間隔（秒）。0なら sweep_mocks コマンドのみ
+EXAM_SWEEP_GRACE = int(os.getenv('EXAM_SWEEP_GRACE', 60))  # 制限時間に加える猶予秒数
+
+# スタッフ向けプロファイラ（?_profile=1 または X-Profile: 1）
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'True').lower() == 'true'
+PROFILER_RATE_PER_MIN = int(os.getenv('PROFILER_RATE_PER_MIN', 6))  # キャッシュ単位（既定ではワーカーごと）の1分あたりの計測上限
+PROFILER_DIR = BASE_DIR / "logs" / "profiles"
+PROFILER_KEEP = 200  # 保持するプロファイル数
+
 # ロギング設定
+# ファイル出力はキュー経由（QueueHandler → バックグラウンドの QueueListener）で行い、
+# リクエストスレッドがディスク書き込みで待たされないようにする。出力は JSON Lines。
+# ローテーションは logrotate などで行う（複数ワーカーが同じファイルに追記するため、プロセス内では回さない）。
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -191,12 +222,17 @@ LOGGING = {
             'style': '{',
         },
     },
+    'filters': {
+        'request_context': {
+            '()': 'exam_preparation.log.RequestContextFilter',
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'WARNING',
-            'class': 'logging.FileHandler',
+            'level': os.getenv('LOG_FILE_LEVEL', 'INFO'),
+            'class': 'exam_preparation.log.QueueFileHandler',
             'filename': BASE_DIR / 'logs/django.log',
-            'formatter': 'verbose',
+            'filters': ['request_context'],
         },
         'console': {
             'level': 'INFO',
@@ -215,5 +251,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        # リクエストごとのアクセスログはキュー経由のファイルだけに出す（同期的なコンソール出力を通さない）
+        'exam.request': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
@@ -0,0 +1,134 @@
+# exam_preparation/exam_preparation/staticfiles.py
+
+from __future__ import annotations  # 将来のバージョンのアノテーションの互換性を確保
+import gzip  # 事前圧縮（gzip）
+import logging  # 圧縮結果・フォールバックの記録
+import mimetypes  # 元ファイルの Content-Type
+import os  # ファイルの存在確認
+from typing import Iterator, Optional, Tuple  # 型アノテーション用
+
+from django.conf import settings  # STATIC_ROOT
+from django.core.exceptions import SuspiciousFileOperation  # safe_join の範囲外指定
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage  # 内容ハッシュ付きファイル名
+from django.http import FileResponse, Http404, HttpResponseNotModified  # ファイル応答・304
+from django.utils.http import http_date  # Last-Modified の書式
+from django.utils._os import safe_join  # STATIC_ROOT 外へのパス指定を防ぐ
+from django.views.decorators.http import require_safe  # GET / HEAD のみ
+from django.views.static import was_modified_since  # If-Modified-Since の判定（django.views.static.serve と同じ）
+
+try:  # brotli があれば .br も作る（無ければ gzip のみ）
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt", ".map", ".html", ".xml")  # 圧縮対象の拡張子
+MIN_SAVING = 0.05  # 5%以上小さくならなければ圧縮版を置かない
+IMMUTABLE = "public, max-age=31536000, immutable"  # 内容ハッシュ付きのファイル（中身が変われば名前も変わる）
+REVALIDATE = "public, max-age=0, must-revalidate"  # ハッシュなしのファイル
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic で内容ハッシュ付きのファイル名（style.3f2a....css）を書き出し、
+    さらにテキスト系のファイルには .gz（brotli があれば .br も）を並べて置く。
+    collectstatic 前（開発中）は {% static %} がハッシュなしの名前を返す。
+    """
+
+    manifest_strict = False  # マニフェストに無いファイルも例外にしない
+
+    def stored_name(self, name: str) -> str:
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name  # collectstatic 前で STATIC_ROOT にファイルが無い
+
+    def post_process(self, paths, dry_run=False, **options) -> Iterator[Tuple]:
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        written = 0
+        for hashed in set(self.hashed_files.values()):
+            if hashed.endswith(COMPRESSIBLE):
+                written += self._compress(hashed)
+        logger.info("事前圧縮: %d ファイル", written)
+
+    def _compress(self, name: str) -> int:
+        # 元ファイルの横に .gz / .br を書く（mtime=0 で同じ内容なら同じバイト列）
+        path = self.path(name)
+        with open(path, "rb") as f:
+            data = f.read()
+        variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=11)))
+        n = 0
+        for ext, body in variants:
+            if len(body) <= len(data) * (1 - MIN_SAVING):
+                with open(path + ext, "wb") as f:
+                    f.write(body)
+                n += 1
+        return n
+
+
+# Accept-Encoding で選ぶ順（brotli 優先）
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _pick(path: str, accept: str) -> Tuple[str, Optional[str]]:
+    # 受け付けられる事前圧縮版があればそのパスと Content-Encoding を返す
+    accepted = {token.split(";")[0].strip() for token in accept.split(",")}
+    for encoding, ext in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + ext):
+            return path + ext, encoding
+    return path, None
+
+
+@require_safe
+def serve(request, path: str):
+    """
+    STATIC_ROOT（collectstatic の出力）からファイルを返す。前段のWebサーバーが /static/ を配信しない構成用。
+    事前圧縮版（.br / .gz）があればそれを返し、内容ハッシュ付きのファイルは1年間の immutable キャッシュにする。
+    Last-Modified は元ファイルの更新時刻で、If-Modified-Since が新しければ 304 を返す。
+    事前圧縮版そのもの（app.css.gz など）へのリクエストは、Content-Type を正しく付けられないので 404 にする。
+    """
+    try:
+        full = safe_join(str(settings.STATIC_ROOT), path)
+    except SuspiciousFileOperation:
+        raise Http404("静的ファイルが見つかりません")
+    if not os.path.isfile(full) or _is_precompressed(full):
+        raise Http404("静的ファイルが見つかりません")
+
+    mtime = os.stat(full).st_mtime
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), mtime):
+        response = HttpResponseNotModified()
+    else:
+        chosen, encoding = _pick(full, request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        content_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+        response = FileResponse(open(chosen, "rb"), content_type=content_type)
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["Last-Modified"] = http_date(mtime)
+    response["Vary"] = "Accept-Encoding"
+    hashed = path in _hashed_names()
+    response["Cache-Control"] = IMMUTABLE if hashed else REVALIDATE
+    return response
+
+
+def _is_precompressed(full: str) -> bool:
+    # post_process が元ファイルの隣に置いた .gz / .br か（元ファイルが無い .gz は通常のファイルとして返す）
+    base, ext = os.path.splitext(full)
+    return ext in (".gz", ".br") and os.path.isfile(base)
+
+
+_hashed: Optional[set] = None  # マニフェストのハッシュ付きファイル名（プロセス内で1回だけ読む）
+
+
+def _hashed_names() -> set:
+    global _hashed
+    if _hashed is None:
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        manifest = getattr(staticfiles_storage, "hashed_files", {}) or {}
+        _hashed = set(manifest.values())
+    return _hashed
@@ -17,8 +17,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings  # 静的ファイル配信の有無
 from django.contrib import admin  # 管理サイト用モジュールのインポート
-from django.urls import path, include  # URLパターン作成のためのpath関数と、他のURL設定を読み込むinclude関数をインポート
+from django.urls import path, include, re_path  # URLパターン作成のためのpath関数と、他のURL設定を読み込むinclude関数をインポート
+
+from .staticfiles import serve as serve_static  # 事前圧縮版を選んで返す静的ファイル配信
 
 urlpatterns = [  # URLパターンのリストを定義開始
     path("admin/", admin.site.urls),  # 管理サイトのURLにアクセスした場合に管理画面のURL設定を読み込む
@@ -26,6 +29,12 @@ urlpatterns = [  # URLパターンのリストを定義開始
     path("", include("exam.urls")),  # ルートURL以下のパスはexamアプリのurls.pyで処理させる
 ]  # urlpatternsリストの終了
 
+if settings.SERVE_STATIC:
+    # collectstatic の出力（STATIC_ROOT）を配信（前段のWebサーバーで配信する場合は SERVE_STATIC=False）
+    urlpatterns.append(
+        re_path(r"^%s(?P<path>.+)$" % settings.STATIC_URL.lstrip("/"), serve_static)
+    )
+
 # エラーハンドラーの登録
 handler404 = 'exam_preparation.handlers.handler404'
 handler500 = 'exam_preparation.handlers.handler500'
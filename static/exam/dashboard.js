@@ -0,0 +1,36 @@
+// exam_preparation/static/exam/dashboard.js
+// ダッシュボード：章別の充足率ゲージ
+
+// 章出題数：幅= min(stock/quota,1) * 100%、充足率は同じ値を%表示
+(function () {
+  var rows = document.querySelectorAll('.quota-row');
+  rows.forEach(function (row) {
+    var stock = parseFloat(row.getAttribute('data-stock') || '0');
+    var quota = parseFloat(row.getAttribute('data-quota') || '0');
+    var ratio = (quota > 0) ? Math.min(stock / quota, 1) : 0;
+    var percentText = (quota > 0)
+      ? Math.round((stock / quota) * 100)
+      : 0;
+
+    // パーセント表示
+    var pctCell = row.querySelector('.quota-percent');
+    if (pctCell) {
+      if (quota > 0) {
+        pctCell.textContent = percentText + '%';
+      } else {
+        pctCell.textContent = '-';
+      }
+    }
+
+    // バー幅
+    var fill = row.querySelector('.quota-fill');
+    if (fill) fill.style.width = Math.round(ratio * 100) + '%';
+
+    // 状態クラス
+    var bar = row.querySelector('.quota-bar');
+    if (bar) {
+      if (quota > 0 && stock < quota) bar.classList.add('need');
+      else bar.classList.add('ok');
+    }
+  });
+})();
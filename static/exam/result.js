@@ -0,0 +1,26 @@
+// exam_preparation/static/exam/result.js
+// 結果画面：正解率のゲージ
+
+// 進捗バー描画（総合）
+(function () {
+  var el = document.getElementById('total-bar');
+  if (!el) return;
+  var raw = (el.getAttribute('data-pct') || '0').toString().replace('%', '');
+  var n = parseFloat(raw);
+  if (isNaN(n) || n < 0) n = 0;
+  if (n > 100) n = 100;
+  el.style.width = Math.round(n) + '%';
+})();
+
+// 章別ゲージ描画
+(function () {
+  var rows = document.querySelectorAll('tr.row');
+  rows.forEach(function (row) {
+    var raw = (row.getAttribute('data-pct') || '0').toString().replace('%', '');
+    var n = parseFloat(raw);
+    if (isNaN(n) || n < 0) n = 0;
+    if (n > 100) n = 100;
+    var fill = row.querySelector('.quota-fill');
+    if (fill) fill.style.width = Math.round(n) + '%';
+  });
+})();
@@ -0,0 +1,45 @@
+// exam_preparation/static/exam/session.js
+// 模試画面：進捗バーと残り時間のカウントダウン
+
+// ---- 進捗バー幅設定（未定義/不正値に強い） ----
+(function () {
+  var el = document.getElementById('progbar');
+  if (!el) return;
+  var raw = (el.getAttribute('data-pct') || '0').toString().replace('%', '');
+  var n = parseFloat(raw);
+  if (isNaN(n) || n < 0) n = 0;
+  if (n > 100) n = 100;
+  el.style.width = Math.round(n) + '%';
+})();
+
+// ---- 残り時間のカウントダウン表示（純JS・最小実装） ----
+(function () {
+  var el = document.getElementById('time-left');
+  if (!el) return;
+  // 終了時刻があればそこから数える（条件付きGETでキャッシュ済みのページが表示されても正しい残り時間になる）
+  var deadline = parseInt(el.getAttribute('data-deadline'), 10);
+  var remain = (deadline > 0)
+    ? Math.round((deadline - Date.now()) / 1000)
+    : parseInt(el.getAttribute('data-remaining'), 10);
+  if (isNaN(remain) || remain < 0) remain = 0;
+
+  function fmt(sec) {
+    var m = Math.floor(sec / 60);
+    var s = sec % 60;
+    return (m < 10 ? '0' + m : m) + ':' + (s < 10 ? '0' + s : s);
+  }
+
+  function tick() {
+    if (remain <= 0) {
+      // 時間切れ：結果画面へ移動
+      window.location.href = el.getAttribute('data-result-url');
+      return;
+    }
+    el.textContent = fmt(remain);
+    remain -= 1;
+    setTimeout(tick, 1000);
+  }
+  // 初回描画
+  el.textContent = fmt(remain);
+  setTimeout(tick, 1000);
+})();